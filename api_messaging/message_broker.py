@@ -1,11 +1,16 @@
 from enum import Enum
+from threading import local
 from typing import TYPE_CHECKING
 
 from django.conf import settings
+from kombu import Connection, Queue
+from kombu.mixins import ConsumerMixin
 from message_lib import QueueParams
 from message_lib.consumer import AbstractMessageConsumer
 from message_lib.producer import MessageProducer
 
+from api_messaging.worker_pool import UserOrderedWorkerPool
+
 if TYPE_CHECKING:
     from collections.abc import Callable
 
@@ -16,9 +21,35 @@ if TYPE_CHECKING:
 class ProducerQueues(Enum):
     MIDAS = settings.MIDAS_QUEUE_NAME
     WAREHOUSE = settings.WAREHOUSE_QUEUE_NAME
+    ANGELIA = settings.ANGELIA_QUEUE_NAME
+
+
+# also used by history.warehouse_buffer, which publishes batches of warehouse events without the producer
+WAREHOUSE_QUEUE_PARAMS = QueueParams(
+    queue_name=ProducerQueues.WAREHOUSE.value,
+    routing_key=ProducerQueues.WAREHOUSE.value,
+    exchange_name=f"{ProducerQueues.WAREHOUSE.value}_exchange",
+    exchange_type="direct",
+    use_deadletter=False,
+)
+
+
+class ThreadLocalMessageProducer(local):
+    """
+    A MessageProducer for each thread publishing with it, as kombu connections and producers can't be shared between
+    threads. The Angelia worker threads and the redelivery thread publish alongside the consuming thread.
+    """
 
+    def __init__(self, rabbitmq_dsn: str, queues_name_and_params: dict[str, QueueParams]) -> None:
+        # runs again with the same arguments the first time each thread uses it
+        self.producer = MessageProducer(rabbitmq_dsn=rabbitmq_dsn, queues_name_and_params=queues_name_and_params)
 
-sending_service = MessageProducer(
+    @property
+    def queues(self) -> dict:
+        return self.producer.queues
+
+
+sending_service = ThreadLocalMessageProducer(
     rabbitmq_dsn=settings.RABBIT_DSN,
     queues_name_and_params={
         ProducerQueues.MIDAS.name: QueueParams(
@@ -28,12 +59,12 @@ sending_service = MessageProducer(
             exchange_type="direct",
             use_deadletter=False,
         ),
-        ProducerQueues.WAREHOUSE.name: QueueParams(
-            queue_name=ProducerQueues.WAREHOUSE.value,
-            routing_key=ProducerQueues.WAREHOUSE.value,
-            exchange_name=f"{ProducerQueues.WAREHOUSE.value}_exchange",
-            exchange_type="direct",
-            use_deadletter=False,
+        ProducerQueues.WAREHOUSE.name: WAREHOUSE_QUEUE_PARAMS,
+        # delayed redeliveries go back onto the queue Angelia publishes to, with the same params as the consumer
+        ProducerQueues.ANGELIA.name: QueueParams(
+            queue_name=ProducerQueues.ANGELIA.value,
+            routing_key=settings.ANGELIA_QUEUE_ROUTING_KEY,
+            exchange_name=f"{ProducerQueues.ANGELIA.value}-exchange",
         ),
     },
 )
@@ -52,3 +83,42 @@ class AngeliaReceivingService(AbstractMessageConsumer):
 
     def on_message(self, body: dict, message: "type[Message]") -> None:
         self._callback(body, message)
+
+
+class ConcurrentAngeliaReceivingService(ConsumerMixin):
+    """
+    Consumes the Angelia queue with up to prefetch_count unacknowledged messages in flight, handing them to a pool of
+    worker threads that keeps each user's messages in order. The queue is expected to exist already.
+    """
+
+    # seconds between checks for handled messages to settle with the broker while no new messages arrive
+    ack_interval = 0.1
+
+    def __init__(
+        self,
+        rabbitmq_dsn: str,
+        queue_name: str,
+        callback: "Callable[[dict, type[Message]], None]",
+        workers: int,
+        prefetch_count: int,
+    ):
+        self.connection = Connection(rabbitmq_dsn)
+        self.queue = Queue(queue_name, no_declare=True)
+        self.prefetch_count = prefetch_count
+        self.pool = UserOrderedWorkerPool(callback, workers)
+
+    def get_consumers(self, Consumer, channel):  # noqa: N803
+        return [
+            Consumer(
+                queues=[self.queue], callbacks=[self.pool.submit], accept=["json"], prefetch_count=self.prefetch_count
+            )
+        ]
+
+    def on_iteration(self) -> None:
+        self.pool.apply_completed()
+
+    def run(self, _tokens: int = 1, **kwargs) -> None:
+        try:
+            super().run(_tokens, safety_interval=self.ack_interval, **kwargs)
+        finally:
+            self.pool.stop()
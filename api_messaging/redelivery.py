@@ -0,0 +1,98 @@
+"""
+Delayed redelivery of Angelia messages that failed on a race, such as a row another service hasn't committed yet.
+
+Instead of sleeping in the consumer, a failed message is added to a redis sorted set scored by the time it may be
+retried, and the original is acknowledged. A thread in each consumer process moves due messages back onto the
+Angelia queue with their attempt count in the X-retry-attempt header. It publishes on a connection of its own, as
+sending_service keeps a producer per thread.
+
+A redelivered message joins the back of the queue, so it is handled after any later messages for the same user that
+arrived while it waited. The per user ordering kept by api_messaging.worker_pool doesn't extend to retried messages,
+which is accepted in exchange for not holding up the consumer while a message waits.
+"""
+
+import json
+import logging
+import threading
+import time
+from uuid import uuid4
+
+from django.conf import settings
+
+from api_messaging.message_broker import ProducerQueues, sending_service
+from hermes.redis import r_write
+from prometheus.metrics import api_messaging_retries_counter, api_messaging_retry_delay_histogram
+
+logger = logging.getLogger("messaging")
+
+DELAYED_MESSAGES_KEY = "api_messaging:delayed"
+RETRY_ATTEMPT_HEADER = "X-retry-attempt"
+
+
+def get_retry_attempt(headers: dict) -> int:
+    return int(headers.get(RETRY_ATTEMPT_HEADER, 0))
+
+
+def schedule_redelivery(headers: dict, message: dict, attempt: int) -> None:
+    """Raises RedisError if the message could not be scheduled, it is then still the caller's to settle."""
+    now = time.time()
+    delay = settings.API_MESSAGING_RETRY_DELAY * 2 ** (attempt - 1)
+    delayed_message = {
+        "id": str(uuid4()),
+        "headers": {**headers, RETRY_ATTEMPT_HEADER: attempt},
+        "body": message,
+        "failed_at": now,
+    }
+    r_write.zadd(DELAYED_MESSAGES_KEY, {json.dumps(delayed_message): now + delay})
+    api_messaging_retries_counter.labels(path=headers.get("X-http-path"), outcome="scheduled").inc()
+
+
+def _redeliver(member: bytes, not_before: float) -> None:
+    delayed_message = json.loads(member)
+    headers = delayed_message["headers"]
+    try:
+        sending_service.queues[ProducerQueues.ANGELIA.name].send_message(delayed_message["body"], headers=headers)
+    except Exception:
+        # put it back to be picked up on a later poll
+        r_write.zadd(DELAYED_MESSAGES_KEY, {member: not_before})
+        raise
+
+    api_messaging_retries_counter.labels(path=headers.get("X-http-path"), outcome="redelivered").inc()
+    api_messaging_retry_delay_histogram.labels(path=headers.get("X-http-path")).observe(
+        time.time() - delayed_message["failed_at"]
+    )
+
+
+def redeliver_due_messages() -> int:
+    redelivered = 0
+    due = r_write.zrangebyscore(
+        DELAYED_MESSAGES_KEY,
+        "-inf",
+        time.time(),
+        start=0,
+        num=settings.API_MESSAGING_REDELIVERY_BATCH_SIZE,
+        withscores=True,
+    )
+    for member, not_before in due:
+        # only the consumer that removes a message redelivers it
+        if r_write.zrem(DELAYED_MESSAGES_KEY, member):
+            _redeliver(member, not_before)
+            redelivered += 1
+
+    return redelivered
+
+
+def _poll_for_due_messages() -> None:
+    while True:
+        try:
+            redeliver_due_messages()
+        except Exception:
+            logger.exception("Failed to redeliver delayed Angelia messages")
+
+        time.sleep(settings.API_MESSAGING_REDELIVERY_POLL_SECONDS)
+
+
+def start_redelivery_thread() -> threading.Thread:
+    thread = threading.Thread(target=_poll_for_due_messages, name="angelia-redelivery", daemon=True)
+    thread.start()
+    return thread
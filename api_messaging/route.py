@@ -1,37 +1,48 @@
 import logging
-from time import sleep
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import close_old_connections
 from django.http import Http404
+from redis.exceptions import RedisError
 from urllib3.exceptions import RequestError
 
 from api_messaging import angelia_background
 from api_messaging.exceptions import InvalidMessagePath, MessageReject, MessageRequeue
+from api_messaging.redelivery import get_retry_attempt, schedule_redelivery
+from history.warehouse_buffer import warehouse_buffer
+from prometheus.metrics import api_messaging_retries_counter
 
 logger = logging.getLogger("messaging")
 
 
-# Keeping it basic for now and only retry on DoesNotExist exceptions
+def _schedule_retry(headers: dict, message: dict, error: ObjectDoesNotExist) -> None:
+    attempt = get_retry_attempt(headers) + 1
+    if attempt >= settings.API_MESSAGING_RETRY_LIMIT:
+        api_messaging_retries_counter.labels(path=headers["X-http-path"], outcome="exhausted").inc()
+        logger.exception(f"An Angelia Background exception occurred. Traceback: {error}")
+        return
+
+    try:
+        schedule_redelivery(headers, message, attempt)
+    except RedisError:
+        raise MessageRequeue from error
+
+    logger.info(f"Retrying function: {headers['X-http-path']}, attempt {attempt}")
+
+
+# Keeping it basic for now and only retry on DoesNotExist exceptions. Retries are redelivered later rather than
+# waited for here, so the consumer moves on to the next message straight away.
 def retry(headers: dict, message: dict, route: dict) -> None:
-    for retry_count in range(settings.API_MESSAGING_RETRY_LIMIT):
-        try:
-            route[headers["X-http-path"]](message, headers)
-            logger.info(f"Angelia background message processed successfully: {headers['X-http-path']}")
-            break
-        except ObjectDoesNotExist as e:
-            sleep(1)
-            if retry_count + 1 == settings.API_MESSAGING_RETRY_LIMIT:
-                logger.exception(f"An Angelia Background exception occurred. Traceback: {e}")
-                break
-            else:
-                logger.info(f"Retrying function: {headers['X-http-path']}")
-        except KeyError:
-            raise InvalidMessagePath from None
-        except Exception as e:
-            logger.exception(f"An Angelia Background exception occurred. Traceback: {e}")
-            break
+    try:
+        route[headers["X-http-path"]](message, headers)
+        logger.info(f"Angelia background message processed successfully: {headers['X-http-path']}")
+    except ObjectDoesNotExist as e:
+        _schedule_retry(headers, message, e)
+    except KeyError:
+        raise InvalidMessagePath from None
+    except Exception as e:
+        logger.exception(f"An Angelia Background exception occurred. Traceback: {e}")
 
 
 def on_message_received(body, message):
@@ -96,4 +107,9 @@ def route_message(headers: dict, message: dict):
         "create_trusted": angelia_background.create_trusted,
     }
 
-    retry(headers, message, route)
+    # the data warehouse events a message sends are published together once it has been handled
+    warehouse_buffer.open()
+    try:
+        retry(headers, message, route)
+    finally:
+        warehouse_buffer.close()
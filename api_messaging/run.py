@@ -13,9 +13,21 @@ def run_receiver():
     # Django setting module needs to be initialised before these import can happen
     from django.conf import settings
 
-    from api_messaging.message_broker import AngeliaReceivingService
+    from api_messaging.message_broker import AngeliaReceivingService, ConcurrentAngeliaReceivingService
+    from api_messaging.redelivery import start_redelivery_thread
     from api_messaging.route import on_message_received
 
+    start_redelivery_thread()
+    if settings.ANGELIA_CONSUMER_WORKERS:
+        ConcurrentAngeliaReceivingService(
+            rabbitmq_dsn=settings.RABBIT_DSN,
+            queue_name=settings.ANGELIA_QUEUE_NAME,
+            callback=on_message_received,
+            workers=settings.ANGELIA_CONSUMER_WORKERS,
+            prefetch_count=settings.ANGELIA_CONSUMER_PREFETCH_COUNT,
+        ).run()
+        return
+
     AngeliaReceivingService(
         rabbitmq_dsn=settings.RABBIT_DSN,
         queue_params=QueueParams(
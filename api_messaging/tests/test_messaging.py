@@ -309,7 +309,7 @@ class TestLoyaltyCardMessaging(GlobalMockAPITestCase):
         for expected_q_type in ("last_name", "postcode"):
             self.assertIn(expected_q_type, question_types)
 
-    @patch("requests.get")
+    @patch("hermes.http_client.midas.get")
     def test_loyalty_card_add_authorise_main_cred_not_stored(self, mock_midas_balance):
         """Component test for loyalty_card_add_authorise message handler.
 
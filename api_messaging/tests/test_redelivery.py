@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from django.core.exceptions import ObjectDoesNotExist
+from django.test import SimpleTestCase, override_settings
+from redis.exceptions import RedisError
+
+from api_messaging.exceptions import MessageRequeue
+from api_messaging.redelivery import DELAYED_MESSAGES_KEY, RETRY_ATTEMPT_HEADER, redeliver_due_messages
+from api_messaging.route import retry
+
+server = fakeredis.FakeServer()
+mock_redis = fakeredis.FakeStrictRedis(server=server)
+
+
+@override_settings(API_MESSAGING_RETRY_LIMIT=3, API_MESSAGING_RETRY_DELAY=1.0)
+@patch("api_messaging.redelivery.r_write", mock_redis)
+class TestRedelivery(SimpleTestCase):
+    def setUp(self):
+        mock_redis.flushall()
+        self.headers = {"X-http-path": "loyalty_card_register"}
+        self.message = {"user_id": 1, "loyalty_card_id": 2}
+
+    def _delayed(self) -> list[tuple[dict, float]]:
+        return [
+            (json.loads(member), score)
+            for member, score in mock_redis.zrange(DELAYED_MESSAGES_KEY, 0, -1, withscores=True)
+        ]
+
+    def test_missing_object_is_scheduled_without_waiting(self):
+        handler = MagicMock(side_effect=ObjectDoesNotExist)
+        retry(self.headers, self.message, {"loyalty_card_register": handler})
+
+        handler.assert_called_once_with(self.message, self.headers)
+        ((delayed, not_before),) = self._delayed()
+        self.assertEqual(delayed["headers"][RETRY_ATTEMPT_HEADER], 1)
+        self.assertEqual(delayed["body"], self.message)
+        self.assertAlmostEqual(not_before, delayed["failed_at"] + 1.0)
+
+    def test_delay_doubles_with_each_attempt(self):
+        headers = {**self.headers, RETRY_ATTEMPT_HEADER: 1}
+        retry(headers, self.message, {"loyalty_card_register": MagicMock(side_effect=ObjectDoesNotExist)})
+
+        ((delayed, not_before),) = self._delayed()
+        self.assertEqual(delayed["headers"][RETRY_ATTEMPT_HEADER], 2)
+        self.assertAlmostEqual(not_before, delayed["failed_at"] + 2.0)
+
+    def test_last_attempt_is_not_scheduled(self):
+        headers = {**self.headers, RETRY_ATTEMPT_HEADER: 2}
+        retry(headers, self.message, {"loyalty_card_register": MagicMock(side_effect=ObjectDoesNotExist)})
+
+        self.assertEqual(self._delayed(), [])
+
+    def test_requeued_when_redis_is_unavailable(self):
+        handler = MagicMock(side_effect=ObjectDoesNotExist)
+        with patch.object(mock_redis, "zadd", side_effect=RedisError), self.assertRaises(MessageRequeue):
+            retry(self.headers, self.message, {"loyalty_card_register": handler})
+
+    @patch("api_messaging.redelivery.sending_service")
+    def test_only_due_messages_are_redelivered(self, mock_sending_service):
+        now = time.time()
+        due = {"headers": {**self.headers, RETRY_ATTEMPT_HEADER: 1}, "body": self.message, "failed_at": now - 1}
+        later = {"headers": {**self.headers, RETRY_ATTEMPT_HEADER: 1}, "body": {"user_id": 2}, "failed_at": now}
+        mock_redis.zadd(DELAYED_MESSAGES_KEY, {json.dumps(due): now - 0.1, json.dumps(later): now + 60})
+
+        self.assertEqual(redeliver_due_messages(), 1)
+
+        send_message = mock_sending_service.queues.__getitem__.return_value.send_message
+        send_message.assert_called_once_with(self.message, headers=due["headers"])
+        self.assertEqual([delayed["body"] for delayed, _ in self._delayed()], [{"user_id": 2}])
+
+    @patch("api_messaging.redelivery.sending_service")
+    def test_failed_publish_is_kept_for_the_next_poll(self, mock_sending_service):
+        mock_sending_service.queues.__getitem__.return_value.send_message.side_effect = ConnectionError
+        due = {"headers": self.headers, "body": self.message, "failed_at": time.time() - 1}
+        mock_redis.zadd(DELAYED_MESSAGES_KEY, {json.dumps(due): time.time() - 0.1})
+
+        with self.assertRaises(ConnectionError):
+            redeliver_due_messages()
+
+        self.assertEqual(len(self._delayed()), 1)
+
+    def test_redelivery_thread_publishes_on_its_own_producer(self):
+        due = {"headers": self.headers, "body": self.message, "failed_at": time.time() - 1}
+        mock_redis.zadd(DELAYED_MESSAGES_KEY, {json.dumps(due): time.time() - 0.1})
+
+        with patch("api_messaging.message_broker.MessageProducer") as mock_producer:
+            thread = threading.Thread(target=redeliver_due_messages)
+            thread.start()
+            thread.join()
+
+        mock_producer.assert_called_once()
+        send_message = mock_producer.return_value.queues.__getitem__.return_value.send_message
+        send_message.assert_called_once_with(self.message, headers=self.headers)
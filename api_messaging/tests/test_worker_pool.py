@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from api_messaging import route
+from api_messaging.exceptions import MessageRequeue
+from api_messaging.midas_messaging import to_midas
+from api_messaging.worker_pool import UserOrderedWorkerPool, user_worker_index
+
+
+class FakeMessage:
+    """Records how a message was settled, in place of a broker message."""
+
+    def __init__(self, path: str = "loyalty_card_add") -> None:
+        self.headers = {"X-http-path": path}
+        self.acknowledged = False
+        self.outcome = None
+
+    def _settle(self, outcome: str) -> None:
+        self.acknowledged = True
+        self.outcome = outcome
+
+    def ack(self) -> None:
+        self._settle("ack")
+
+    def reject(self) -> None:
+        self._settle("reject")
+
+    def requeue(self) -> None:
+        self._settle("requeue")
+
+
+class TestUserOrderedWorkerPool(SimpleTestCase):
+    def _drain(self, pool: UserOrderedWorkerPool, expected: int, timeout: float = 5) -> None:
+        applied = 0
+        deadline = time.monotonic() + timeout
+        while applied < expected and time.monotonic() < deadline:
+            applied += pool.apply_completed()
+            time.sleep(0.01)
+
+        self.assertEqual(applied, expected)
+
+    def test_messages_for_a_user_are_handled_in_order(self):
+        handled = []
+        lock = threading.Lock()
+
+        def handler(body, message):
+            # slow down early messages so any reordering within a user would show
+            time.sleep(0.01 * (5 - body["seq"]))
+            with lock:
+                handled.append((body["user_id"], body["seq"]))
+            message.ack()
+
+        pool = UserOrderedWorkerPool(handler, workers=4)
+        messages = []
+        for seq in range(5):
+            for user_id in (1, 2, 3):
+                message = FakeMessage()
+                messages.append(message)
+                pool.submit({"user_id": user_id, "seq": seq}, message)
+
+        self._drain(pool, len(messages))
+        pool.stop()
+
+        for user_id in (1, 2, 3):
+            self.assertEqual([seq for user, seq in handled if user == user_id], list(range(5)))
+
+        self.assertTrue(all(message.outcome == "ack" for message in messages))
+
+    def test_different_users_are_handled_in_parallel(self):
+        workers = 4
+        user_ids = []
+        user_id = 0
+        # one user per worker
+        while len(user_ids) < workers:
+            if user_worker_index({"user_id": user_id}, workers) not in {
+                user_worker_index({"user_id": other}, workers) for other in user_ids
+            }:
+                user_ids.append(user_id)
+            user_id += 1
+
+        barrier = threading.Barrier(workers, timeout=5)
+
+        def handler(body, message):
+            barrier.wait()
+            message.ack()
+
+        pool = UserOrderedWorkerPool(handler, workers=workers)
+        for user_id in user_ids:
+            pool.submit({"user_id": user_id}, FakeMessage())
+
+        # the barrier is only passed if every worker is handling a message at the same time
+        self._drain(pool, workers)
+        pool.stop()
+        self.assertFalse(barrier.broken)
+
+    def test_router_outcomes_are_applied_by_the_consuming_thread(self):
+        settled_by = []
+
+        class ThreadRecordingMessage(FakeMessage):
+            def _settle(self, outcome: str) -> None:
+                settled_by.append(threading.current_thread())
+                super()._settle(outcome)
+
+        ok, requeued = ThreadRecordingMessage(), ThreadRecordingMessage()
+        pool = UserOrderedWorkerPool(route.on_message_received, workers=2)
+        with patch("api_messaging.route.route_message", side_effect=[None, MessageRequeue()]):
+            pool.submit({"user_id": 1}, ok)
+            pool.submit({"user_id": 1}, requeued)
+            self._drain(pool, 2)
+
+        pool.stop()
+        self.assertEqual((ok.outcome, requeued.outcome), ("ack", "requeue"))
+        self.assertEqual(settled_by, [threading.current_thread()] * 2)
+
+    def test_workers_publish_on_their_own_producers(self):
+        workers = 4
+        used_by = defaultdict(set)
+        barrier = threading.Barrier(workers, timeout=5)
+
+        def new_producer(**kwargs):
+            producer = MagicMock()
+
+            def send_message(*args, **kwargs):
+                used_by[id(producer)].add(threading.current_thread())
+
+            producer.queues.__getitem__.return_value.send_message.side_effect = send_message
+            return producer
+
+        def handler(body, message):
+            barrier.wait()
+            to_midas(MagicMock(metadata={}, body=body))
+            message.ack()
+
+        pool = UserOrderedWorkerPool(handler, workers=workers)
+        with patch("api_messaging.message_broker.MessageProducer", side_effect=new_producer):
+            for worker in range(workers):
+                user_id = next(user for user in range(100) if user_worker_index({"user_id": user}, workers) == worker)
+                pool.submit({"user_id": user_id}, FakeMessage())
+
+            self._drain(pool, workers)
+
+        pool.stop()
+        self.assertEqual(len(used_by), workers)
+        self.assertTrue(all(len(threads) == 1 for threads in used_by.values()))
@@ -0,0 +1,104 @@
+import logging
+import queue
+import threading
+import zlib
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from kombu import Message
+
+logger = logging.getLogger("messaging")
+
+
+class DeferredAckMessage:
+    """
+    Stands in for a broker message while a worker thread handles it. Channels can't be shared between threads, so
+    the ack, reject or requeue chosen by the handler is only recorded, and applied later by the consuming thread.
+    """
+
+    def __init__(self, message: "Message") -> None:
+        self.message = message
+        self.headers = message.headers
+        self.outcome: str | None = None
+
+    @property
+    def acknowledged(self) -> bool:
+        return self.outcome is not None
+
+    def ack(self) -> None:
+        self.outcome = "ack"
+
+    def reject(self) -> None:
+        self.outcome = "reject"
+
+    def requeue(self) -> None:
+        self.outcome = "requeue"
+
+    def apply(self) -> None:
+        # on_message_received always settles a message, one left unsettled by an unexpected error is rejected
+        getattr(self.message, self.outcome or "reject")()
+
+
+def user_worker_index(body: dict, workers: int) -> int:
+    # every Angelia message carries the user it acts on, hashing it keeps each wallet's messages on one worker
+    user_id = body.get("user_id") if isinstance(body, dict) else None
+    return zlib.crc32(str(user_id).encode()) % workers
+
+
+class UserOrderedWorkerPool:
+    """
+    Handles messages on a fixed number of worker threads. Messages for the same user always go to the same worker,
+    so they are handled one at a time in the order they were received, while different users are handled in parallel.
+
+    Handled messages are settled with the broker by calling apply_completed() from the consuming thread.
+    """
+
+    def __init__(self, handler: Callable[[dict, DeferredAckMessage], None], workers: int) -> None:
+        self.handler = handler
+        self.completed: queue.SimpleQueue[DeferredAckMessage] = queue.SimpleQueue()
+        self.queues: list[queue.SimpleQueue] = [queue.SimpleQueue() for _ in range(workers)]
+        self.threads = [
+            threading.Thread(target=self._work, args=(work_queue,), name=f"angelia-worker-{i}", daemon=True)
+            for i, work_queue in enumerate(self.queues)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, body: dict, message: "Message") -> None:
+        self.queues[user_worker_index(body, len(self.queues))].put((body, DeferredAckMessage(message)))
+
+    def _work(self, work_queue: queue.SimpleQueue) -> None:
+        while (item := work_queue.get()) is not None:
+            body, message = item
+            try:
+                self.handler(body, message)
+            except Exception:
+                logger.exception("Unhandled error while processing an Angelia message")
+
+            self.completed.put(message)
+
+    def apply_completed(self) -> int:
+        applied = 0
+        while True:
+            try:
+                message = self.completed.get_nowait()
+            except queue.Empty:
+                return applied
+
+            try:
+                message.apply()
+            except Exception:
+                # the broker redelivers unsettled messages once their channel is gone
+                logger.exception(f"Failed to {message.outcome} Angelia message {message.headers.get('X-http-path')}")
+
+            applied += 1
+
+    def stop(self) -> None:
+        for work_queue in self.queues:
+            work_queue.put(None)
+
+        for thread in self.threads:
+            thread.join()
+
+        self.apply_completed()
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from hermes.redis import r_read, r_write
+from scheme.models import SchemeBundleAssociation
+from user.models import ClientApplication, ClientApplicationBundle
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_CONFIG_VERSION_KEY = "channel_config:version"
+
+
+class SchemeAssociation(NamedTuple):
+    bundle_pk: int
+    status: int
+    test_scheme: bool
+
+
+class ChannelConfigCache:
+    """
+    Process local cache of the channel configuration read by hermes.channels.Permit on every request.
+
+    Entries expire after CHANNEL_CONFIG_CACHE_TTL seconds. Admin changes bump a version number held in redis which
+    every process compares against its own at most once per CHANNEL_CONFIG_CACHE_VERSION_CHECK_SECONDS, dropping all
+    entries when it has moved on. A TTL of 0 disables the cache so every lookup goes to the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict["Hashable", tuple[float, Any]] = {}
+        self._generation = 0
+        self._version = None
+        self._version_checked_at = 0.0
+
+    def get(self, key: "Hashable", loader: "Callable[[], Any]") -> Any:
+        ttl = settings.CHANNEL_CONFIG_CACHE_TTL
+        if ttl <= 0:
+            return loader()
+
+        now = time.monotonic()
+        self._sync_version(now)
+        cached = self._entries.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        generation = self._generation
+        value = loader()
+        with self._lock:
+            # don't store a value loaded while an invalidation was in flight
+            if generation == self._generation:
+                self._entries[key] = (now + ttl, value)
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+            self._generation += 1
+
+    def invalidate(self) -> None:
+        self.clear()
+        try:
+            self._version = r_write.incr(CHANNEL_CONFIG_VERSION_KEY)
+        except RedisError:
+            logger.warning("Failed to bump the channel config version, other processes will wait for the TTL")
+
+    def _sync_version(self, now: float) -> None:
+        if now - self._version_checked_at < settings.CHANNEL_CONFIG_CACHE_VERSION_CHECK_SECONDS:
+            return
+
+        self._version_checked_at = now
+        try:
+            version = r_read.get(CHANNEL_CONFIG_VERSION_KEY)
+        except RedisError:
+            logger.warning("Failed to read the channel config version, relying on the TTL only")
+            return
+
+        version = int(version) if version else 0
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+
+channel_config_cache = ChannelConfigCache()
+
+
+def get_bundle_by_bundle_id_and_org_name(bundle_id: str, organisation_name: str) -> ClientApplicationBundle:
+    return channel_config_cache.get(
+        ("bundle_by_org", bundle_id, str(organisation_name)),
+        lambda: ClientApplicationBundle.get_bundle_by_bundle_id_and_org_name(bundle_id, organisation_name),
+    )
+
+
+def get_bundle_by_bundle_id_and_client(bundle_id: str, client: ClientApplication) -> ClientApplicationBundle:
+    return channel_config_cache.get(
+        ("bundle_by_client", bundle_id, getattr(client, "pk", client)),
+        lambda: ClientApplicationBundle.objects.select_related("client").get(bundle_id=bundle_id, client=client),
+    )
+
+
+def _load_scheme_associations(bundle_id: str) -> dict[int, list[SchemeAssociation]]:
+    associations = defaultdict(list)
+    for scheme_id, bundle_pk, status, test_scheme in SchemeBundleAssociation.objects.filter(
+        bundle__bundle_id=bundle_id
+    ).values_list("scheme_id", "bundle_id", "status", "test_scheme"):
+        associations[scheme_id].append(SchemeAssociation(bundle_pk, status, test_scheme))
+
+    return dict(associations)
+
+
+def get_scheme_associations(bundle_id: str, scheme_id: int) -> list[SchemeAssociation]:
+    """Scheme bundle associations for every bundle using this bundle_id string, loaded in one query per bundle_id."""
+    associations = channel_config_cache.get(
+        ("scheme_associations", bundle_id), lambda: _load_scheme_associations(bundle_id)
+    )
+    return associations.get(scheme_id, [])
+
+
+class BundleIds(NamedTuple):
+    bundle_ids: frozenset[str]
+    first_bundle_id_by_client: dict[str, str]
+
+
+def _load_bundle_ids() -> BundleIds:
+    bundles = ClientApplicationBundle.objects.order_by("pk").values_list("bundle_id", "client_id")
+    first_bundle_id_by_client = {}
+    for bundle_id, client_id in bundles:
+        first_bundle_id_by_client.setdefault(client_id, bundle_id)
+
+    return BundleIds(frozenset(bundle_id for bundle_id, _ in bundles), first_bundle_id_by_client)
+
+
+def get_bundle_ids() -> BundleIds:
+    """Every bundle_id, and the first bundle_id of each client, used to label the request metrics."""
+    return channel_config_cache.get(("bundle_ids",), _load_bundle_ids)
+
+
+def invalidate_channel_config() -> None:
+    channel_config_cache.invalidate()
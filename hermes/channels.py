@@ -6,6 +6,11 @@ from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.db.models import Q
 from rest_framework import exceptions
 
+from hermes.channel_cache import (
+    get_bundle_by_bundle_id_and_client,
+    get_bundle_by_bundle_id_and_org_name,
+    get_scheme_associations,
+)
 from scheme.models import SchemeBundleAssociation
 from user.models import ClientApplicationBundle
 
@@ -85,9 +90,7 @@ class Permit:
         # to permit authentication to continue
         try:
             with sentry_sdk.start_span(op="first db call", description="get bundle"):
-                self.looked_up_bundle = ClientApplicationBundle.get_bundle_by_bundle_id_and_org_name(
-                    self.bundle_id, organisation_name
-                )
+                self.looked_up_bundle = get_bundle_by_bundle_id_and_org_name(self.bundle_id, organisation_name)
             self.client = self.looked_up_bundle.client
         except ObjectDoesNotExist:
             raise KeyError from None
@@ -119,9 +122,7 @@ class Permit:
         # Bundle will only be looked up when required and only once per request
         if not self.looked_up_bundle:
             try:
-                self.looked_up_bundle = ClientApplicationBundle.objects.get(
-                    bundle_id=self.bundle_id, client=self.client
-                )
+                self.looked_up_bundle = get_bundle_by_bundle_id_and_client(self.bundle_id, self.client)
             except ObjectDoesNotExist:
                 logger.error(
                     f"No ClientApplicationBundle found for '{self.bundle_id}' and client '{self.client}'"
@@ -171,9 +172,12 @@ class Permit:
         return query
 
     def permit_test_access(self, scheme):
-        bundle_assoc = scheme.schemebundleassociation_set.get(bundle=self.bundle)
-        not_permitted = not self.user.is_tester and bundle_assoc.test_scheme
-        return not not_permitted
+        bundle_pk = self.bundle.pk
+        for bundle_assoc in get_scheme_associations(self.bundle_id, scheme.id):
+            if bundle_assoc.bundle_pk == bundle_pk:
+                return self.user.is_tester or not bundle_assoc.test_scheme
+
+        raise SchemeBundleAssociation.DoesNotExist
 
     def related_model_query(self, query, relation="", allow=None):
         if self.service_allow_all:
@@ -228,17 +232,16 @@ class Permit:
         if self.service_allow_all:
             return SchemeBundleAssociation.ACTIVE
         # Scheme status will only be looked up when required and only once per request per scheme
+        scheme_id = int(getattr(scheme_id, "pk", scheme_id))
         if scheme_id in self.found_schemes_status:
             return self.found_schemes_status[scheme_id]
-        status_list = SchemeBundleAssociation.get_status_by_bundle_id_and_scheme_id(
-            bundle_id=self.bundle_id, scheme_id=scheme_id
-        )
+        status_list = get_scheme_associations(self.bundle_id, scheme_id)
         if len(status_list) > 1:
             logger.error(f"Channels id ='{self.bundle_id}' has " f"multiple entries for scheme id '{scheme_id}'")
             raise exceptions.AuthenticationFailed("Invalid Token")
 
         if status_list:
-            status = status_list[0]["status"]
+            status = status_list[0].status
         else:
             status = None
 
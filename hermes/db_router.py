@@ -0,0 +1,133 @@
+import logging
+import time
+from threading import local
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from redis.exceptions import RedisError
+from rest_framework.permissions import SAFE_METHODS
+
+from hermes.redis import r_read, r_write
+from prometheus.metrics import replica_lag_gauge
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DB_ALIAS = "replica"
+PINNED_USER_KEY_PREFIX = "db_replica:pinned_user"
+
+
+class RoutingState(local):
+    def __init__(self) -> None:
+        # set by ReplicaReadMixin for the views that opted in
+        self.use_replica = False
+        # set on the first write of the request, reads stay on the primary from then on
+        self.wrote = False
+
+
+routing_state = RoutingState()
+
+
+class ReplicaLagCheck:
+    """
+    Measures the replica lag at most every REPLICA_LAG_CHECK_INTERVAL seconds per process, and reports whether
+    the replica is close enough behind the primary to serve reads.
+    """
+
+    def __init__(self) -> None:
+        self.checked_at: float | None = None
+        self.healthy = False
+
+    def is_healthy(self) -> bool:
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL:
+            self.checked_at = now
+            self.healthy = self._measure()
+
+        return self.healthy
+
+    @staticmethod
+    def _measure() -> bool:
+        try:
+            with connections[REPLICA_DB_ALIAS].cursor() as cursor:
+                # null when the server isn't replaying a primary's WAL, i.e. it is not behind anything
+                cursor.execute("SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)")
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError:
+            logger.exception("Failed to measure the replica lag, reading from the primary database")
+            return False
+
+        replica_lag_gauge.set(lag)
+        return lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+replica_lag_check = ReplicaLagCheck()
+
+
+def pin_user_to_primary(user_id: int) -> None:
+    """Keeps the user's reads on the primary for REPLICA_STICKY_SECONDS, so the replica lag can't hide their writes."""
+    try:
+        r_write.set(f"{PINNED_USER_KEY_PREFIX}:{user_id}", 1, ex=settings.REPLICA_STICKY_SECONDS)
+    except RedisError:
+        logger.warning(f"Failed to pin user {user_id} to the primary database")
+
+
+def is_user_pinned_to_primary(user_id: int) -> bool:
+    try:
+        return bool(r_read.exists(f"{PINNED_USER_KEY_PREFIX}:{user_id}"))
+    except RedisError:
+        return True
+
+
+def can_read_from_replica(user_id: int | None) -> bool:
+    if REPLICA_DB_ALIAS not in settings.DATABASES or routing_state.wrote:
+        return False
+
+    if user_id and is_user_pinned_to_primary(user_id):
+        return False
+
+    return replica_lag_check.is_healthy()
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of views using ReplicaReadMixin to the replica database, and everything else to the primary.
+    Only installed when a replica database is configured.
+    """
+
+    def db_for_read(self, model, **hints) -> str:
+        if routing_state.use_replica and not routing_state.wrote and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA_DB_ALIAS
+
+        # not left to the instance hint, related objects of an instance read from the replica would follow it there
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> str:
+        routing_state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # both databases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    Opts a read-only view into the replica database. Reads fall back to the primary when the replica is lagging,
+    when the user wrote something in the last REPLICA_STICKY_SECONDS, or once the request itself writes.
+    """
+
+    replica_methods = SAFE_METHODS
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in self.replica_methods and can_read_from_replica(getattr(request.user, "id", None)):
+            routing_state.use_replica = True
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            routing_state.use_replica = False
@@ -0,0 +1,91 @@
+"""
+JSON encoding with orjson, used for the API responses, request bodies and cached membership plans when FAST_JSON is
+enabled. orjson is installed by the optional fast-json extra, the standard library json module is used otherwise.
+"""
+
+import datetime
+import decimal
+import json
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# aware datetimes in UTC end with Z like rest_framework's encoder, and dicts may have int keys like json allows
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+# the types orjson doesn't encode, encoded the same way as rest_framework.utils.encoders.JSONEncoder does
+DEFAULT_ENCODERS = (
+    (Promise, force_str),
+    (decimal.Decimal, float),
+    (datetime.timedelta, lambda value: str(value.total_seconds())),
+    (bytes, bytes.decode),
+    (QuerySet, tuple),
+)
+
+
+def _default(obj):
+    for obj_type, encode in DEFAULT_ENCODERS:
+        if isinstance(obj, obj_type):
+            return encode(obj)
+
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "__iter__"):
+        return tuple(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def fast_json_enabled() -> bool:
+    return settings.FAST_JSON and orjson is not None
+
+
+def dumps(data) -> bytes:
+    if fast_json_enabled():
+        return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+
+    return json.dumps(data).encode()
+
+
+def loads(data: bytes | str):
+    if fast_json_enabled():
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Renders the same compact JSON as JSONRenderer, falling back to it when indented output is asked for."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        # escaped by JSONRenderer as they are not valid in javascript strings
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from None
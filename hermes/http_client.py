@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from collections.abc import Collection
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+
+from prometheus.metrics import outbound_request_latency_histogram
+
+
+class ServiceClient:
+    """
+    Keep-alive HTTP client for calls to another Bink service.
+
+    Each client holds one requests.Session per process with a connection pool mounted for the service, so repeated
+    calls reuse open connections instead of doing a new TCP (and TLS) handshake every time. The session is built on
+    first use and rebuilt after a fork, as celery workers must not share sockets with the process they forked from.
+
+    Unless told otherwise requests get the default (connect, read) timeouts and only failed connections are retried,
+    since most of these calls are POSTs that are not safe to send twice. The latency of every call is recorded
+    against the service name.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        read_timeout: float | None = None,
+        pool_maxsize: int | None = None,
+        retry_statuses: Collection[int] = (),
+    ):
+        self.service = service
+        self.read_timeout = read_timeout or settings.OUTBOUND_HTTP_READ_TIMEOUT
+        self.pool_maxsize = max(pool_maxsize or 0, settings.OUTBOUND_HTTP_POOL_MAXSIZE)
+        self.retry_statuses = retry_statuses
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    def _build_session(self) -> requests.Session:
+        retries = settings.OUTBOUND_HTTP_RETRIES
+        if self.retry_statuses:
+            retry = Retry(
+                total=retries,
+                backoff_factor=settings.OUTBOUND_HTTP_BACKOFF_FACTOR,
+                status_forcelist=self.retry_statuses,
+            )
+        else:
+            retry = Retry(
+                total=retries, connect=retries, read=0, status=0, backoff_factor=settings.OUTBOUND_HTTP_BACKOFF_FACTOR
+            )
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._session = self._build_session()
+                    self._pid = pid
+
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", (settings.OUTBOUND_HTTP_CONNECT_TIMEOUT, self.read_timeout))
+        method = method.upper()
+        status = "error"
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            outbound_request_latency_histogram.labels(service=self.service, method=method, status=status).observe(
+                time.perf_counter() - start
+            )
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+midas = ServiceClient(
+    "midas", read_timeout=settings.MIDAS_READ_TIMEOUT, pool_maxsize=settings.BALANCE_REFRESH_MAX_WORKERS
+)
+metis = ServiceClient("metis")
+atlas = ServiceClient("atlas")
+hecate = ServiceClient("hecate")
+# Hades is only ever read from, so server errors are worth retrying as well
+hades = ServiceClient("hades", retry_statuses=(500, 502, 503, 504))
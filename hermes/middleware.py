@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING
 from django.conf import settings
 from django.db import connection
 
+from hermes.db_router import pin_user_to_primary, routing_state
 from hermes.utils import ctx
 
 logger = logging.getLogger(__name__)
@@ -97,3 +98,17 @@ class AzureRef(MiddlewareMixin):
         ctx.x_azure_ref = headers.get("X-azure-ref")
 
         return response
+
+
+class ReplicaStickiness(MiddlewareMixin):
+    """Pins users who wrote to the database in this request to the primary for their next reads."""
+
+    def middleware(self, request: "Request") -> "Response":
+        routing_state.wrote = False
+        response = self.get_response(request)
+
+        user_id = getattr(getattr(request, "user", None), "id", None)
+        if routing_state.wrote and user_id:
+            pin_user_to_primary(user_id)
+
+        return response
@@ -1,15 +1,19 @@
 import functools
 import json
 import logging
+import os
 import pickle
-from collections import namedtuple
-from collections.abc import Callable
-from threading import RLock
+import time
+from collections import OrderedDict, namedtuple
+from collections.abc import Callable, Hashable
+from threading import Lock, RLock, Thread
 from typing import Any
+from weakref import WeakSet
 
 from django.conf import settings
 from redis import Redis
 from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError
 from redis.exceptions import TimeoutError as RedisTimeoutError
 
 logger = logging.getLogger(__name__)
@@ -80,7 +84,102 @@ def _make_key(
 ################################################################################
 ################################################################################
 
-_CacheInfo = namedtuple("CacheInfo", ["json_hits", "pickle_hits", "misses"])
+_CacheInfo = namedtuple("CacheInfo", ["json_hits", "pickle_hits", "misses", "l1_hits"], defaults=(0,))
+
+L1_INVALIDATION_CHANNEL = "fn_cache:invalidate"
+_MISSING = object()
+
+
+class _L1Cache:
+    """
+    Bounded in-process LRU of deserialised results for one cached function, in front of redis. Entries live for at
+    most REDIS_CACHE_L1_TTL seconds, which also bounds how stale they can get if an invalidation message is missed.
+    """
+
+    def __init__(self, user_fn_id: str) -> None:
+        self.user_fn_id = user_fn_id
+        self.lock = Lock()
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        if not settings.REDIS_CACHE_L1_TTL:
+            return _MISSING
+
+        with self.lock:
+            expires_at, result = self.entries.get(key, (0.0, _MISSING))
+            if expires_at < time.monotonic():
+                self.entries.pop(key, None)
+                return _MISSING
+
+            self.entries.move_to_end(key)
+            return result
+
+    def set(self, key: Hashable, result: Any) -> None:
+        if not settings.REDIS_CACHE_L1_TTL:
+            return
+
+        _ensure_invalidation_subscriber()
+        with self.lock:
+            self.entries[key] = (time.monotonic() + settings.REDIS_CACHE_L1_TTL, result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.REDIS_CACHE_L1_MAXSIZE:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+_l1_caches: WeakSet[_L1Cache] = WeakSet()
+_subscriber_lock = Lock()
+_subscriber_pid: int | None = None
+
+
+def _clear_l1_caches(user_fn_id: str | None = None) -> None:
+    for l1_cache in list(_l1_caches):
+        if user_fn_id is None or l1_cache.user_fn_id == user_fn_id:
+            l1_cache.clear()
+
+
+def _listen_for_invalidations() -> None:
+    reconnecting = False
+    while True:
+        try:
+            pubsub = r_write.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(L1_INVALIDATION_CHANNEL)
+            if reconnecting:
+                # invalidations published while disconnected were missed
+                _clear_l1_caches()
+
+            while True:
+                if message := pubsub.get_message(timeout=30):
+                    _clear_l1_caches(message["data"].decode())
+        except RedisError:
+            logger.warning("Lost the redis_cache invalidation subscription, reconnecting")
+            reconnecting = True
+            time.sleep(1)
+
+
+def _ensure_invalidation_subscriber() -> None:
+    """Starts the thread clearing local caches on cache_clear() calls from any process, once per process."""
+    global _subscriber_pid
+
+    if _subscriber_pid == os.getpid():
+        return
+
+    with _subscriber_lock:
+        if _subscriber_pid != os.getpid():
+            Thread(target=_listen_for_invalidations, name="redis-cache-invalidation", daemon=True).start()
+            _subscriber_pid = os.getpid()
+
+
+def _serialise_result(result: Any) -> str:
+    if isinstance(result, (str | int | bool | float)):
+        value = {"is_json_serializable": True, "value": result}
+    else:
+        value = {"is_json_serializable": False, "value": pickle.dumps(result).decode("latin1")}
+
+    return json.dumps(value)
 
 
 def redis_cache(user_function: Any) -> Callable:
@@ -93,19 +192,39 @@ def redis_cache(user_function: Any) -> Callable:
     Using a Redis backend for the cache allows sharing a cache between processes, which can be cleared by
     any process with the cache_clear() method.
 
+    Results are also kept in a small in-process LRU, so repeated calls skip the round trip to Redis and the
+    deserialisation. As with lru_cache these results are shared between callers and must not be mutated.
+    cache_clear() publishes the cleared function over Redis pub/sub so every process drops its local copies.
+    The local cache is disabled when REDIS_CACHE_L1_TTL is 0.
+
     :param user_function: function to be decorated
     """
     lock = RLock()
     user_fn_id = f"{user_function.__module__}.{user_function.__code__.co_qualname}"
-    json_hits = pickle_hits = misses = 0
+    json_hits = pickle_hits = misses = l1_hits = 0
+    l1_cache = _L1Cache(user_fn_id)
+    _l1_caches.add(l1_cache)
 
     @functools.wraps(user_function)
     def wrapper(*args, **kwargs) -> Any:
+        nonlocal l1_hits
+
+        arguments_key = _make_key(args, kwargs, typed=False)
+        result = l1_cache.get(arguments_key)
+        if result is not _MISSING:
+            l1_hits += 1
+            return result
+
+        result = _redis_cached_call(arguments_key, args, kwargs)
+        l1_cache.set(arguments_key, result)
+        return result
+
+    def _redis_cached_call(arguments_key: Hashable, args: tuple, kwargs: dict) -> Any:
         nonlocal json_hits, pickle_hits, misses
 
         # add a prefix to allow easier clearing of the function cache without affecting
         # other items stored in redis
-        key = f"fn_cache:{user_fn_id}:{hash(_make_key(args, kwargs, typed=False))}"
+        key = f"fn_cache:{user_fn_id}:{hash(arguments_key)}"
 
         try:
             raw_result = r_read.get(key)
@@ -123,12 +242,7 @@ def redis_cache(user_function: Any) -> Callable:
                     pickle_hits += 1
             else:
                 result = user_function(*args, **kwargs)
-                if isinstance(result, (str | int | bool | float)):
-                    value = {"is_json_serializable": True, "value": result}
-                else:
-                    value = {"is_json_serializable": False, "value": pickle.dumps(result).decode("latin1")}
-
-                r_write.set(key, json.dumps(value))
+                r_write.set(key, _serialise_result(result))
                 misses += 1
         except (RedisTimeoutError, RedisConnectionError):
             logger.error("Could not connect to Redis when attempting to retrieve cached data")
@@ -141,19 +255,21 @@ def redis_cache(user_function: Any) -> Callable:
 
     def cache_clear() -> None:
         """Clear the cache"""
-        nonlocal json_hits, pickle_hits, misses
+        nonlocal json_hits, pickle_hits, misses, l1_hits
         with lock:
             pipe = r_write.pipeline()
             for keys in r_write.scan_iter(f"fn_cache:{user_fn_id}:*", settings.REDIS_API_CACHE_SCAN_BATCH_SIZE):
                 pipe.delete(keys)
 
+            pipe.publish(L1_INVALIDATION_CHANNEL, user_fn_id)
             pipe.execute()
-            json_hits = pickle_hits = misses = 0
+            _clear_l1_caches(user_fn_id)
+            json_hits = pickle_hits = misses = l1_hits = 0
 
     def cache_info() -> tuple:
-        """Retrieve info on cache hits and misses"""
+        """Retrieve info on cache hits and misses, json and pickle hits are from Redis and l1_hits in-process"""
         with lock:
-            return _CacheInfo(json_hits, pickle_hits, misses)
+            return _CacheInfo(json_hits, pickle_hits, misses, l1_hits)
 
     wrapper.cache_clear = cache_clear
     wrapper.cache_info = cache_info
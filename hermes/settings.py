@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/1.8/ref/settings/
 """
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+import importlib.util
 import logging
 import os
 import sys
@@ -21,6 +22,7 @@ import dj_database_url
 import sentry_sdk
 from bink_logging_utils import init_loguru_root_sink
 from decouple import Choices, config
+from django.core.exceptions import ImproperlyConfigured
 from redis import ConnectionPool as Redis_ConnectionPool
 from sentry_sdk.integrations import celery, django
 from sentry_sdk.integrations.celery import CeleryIntegration
@@ -105,6 +107,7 @@ MIDDLEWARE = (
     "dictfilter.django.middleware.DictFilterMiddleware",
     "hermes.middleware.AcceptVersion",
     "hermes.middleware.AzureRef",
+    "hermes.middleware.ReplicaStickiness",
     "history.middleware.HistoryRequestMiddleware",
     "prometheus.middleware.CustomPrometheusAfterMiddleware",
 )
@@ -176,6 +179,20 @@ REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "ubiquity.exceptions.custom_exception_handler",
 }
 
+# Encodes and decodes API responses, request bodies and cached membership plans with orjson, installed by the
+# fast-json extra
+FAST_JSON = config("FAST_JSON", default=False, cast=bool)
+if FAST_JSON:
+    if importlib.util.find_spec("orjson") is None:
+        raise ImproperlyConfigured("FAST_JSON is enabled but orjson is not installed, install the fast-json extra")
+
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = ("hermes.fast_json.ORJSONRenderer",)
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = (
+        "hermes.fast_json.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    )
+
 WSGI_APPLICATION = "hermes.wsgi.application"
 
 APPEND_SLASH = False
@@ -204,6 +221,22 @@ else:
         }
     }
 
+# Optional read replica, used by the read-only views that opt in with hermes.db_router.ReplicaReadMixin
+if config("HERMES_REPLICA_DATABASE_URL", default=None):
+    DATABASES["replica"] = dj_database_url.config(
+        env="HERMES_REPLICA_DATABASE_URL",
+        conn_max_age=600,
+        engine="hermes.traced_db_wrapper",
+        test_options={"MIRROR": "default"},
+    )
+    DATABASE_ROUTERS = ["hermes.db_router.ReplicaRouter"]
+
+# seconds a user's reads stay on the primary after they write
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=5, cast=int)
+# reads fall back to the primary while the replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = config("REPLICA_MAX_LAG_SECONDS", default=2.0, cast=float)
+REPLICA_LAG_CHECK_INTERVAL = config("REPLICA_LAG_CHECK_INTERVAL", default=5.0, cast=float)
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.8/topics/i18n/
 
@@ -264,6 +297,14 @@ LETHE_URL = config("LETHE_URL", default="http://dev.lethe.loyaltyangels.local")
 HECATE_URL = config("HECATE_URL", default="http://dev.hecate.loyaltyangels.local")
 METIS_URL = config("METIS_URL", default="http://dev.metis.loyaltyangels.local")
 HADES_URL = config("HADES_URL", default="http://dev.hades.loyaltyangels.local")
+# Pooled keep-alive sessions used for calls to the other Bink services, see hermes.http_client
+OUTBOUND_HTTP_POOL_MAXSIZE = config("OUTBOUND_HTTP_POOL_MAXSIZE", default=10, cast=int)
+OUTBOUND_HTTP_CONNECT_TIMEOUT = config("OUTBOUND_HTTP_CONNECT_TIMEOUT", default=3.05, cast=float)
+OUTBOUND_HTTP_READ_TIMEOUT = config("OUTBOUND_HTTP_READ_TIMEOUT", default=30.0, cast=float)
+OUTBOUND_HTTP_RETRIES = config("OUTBOUND_HTTP_RETRIES", default=3, cast=int)
+OUTBOUND_HTTP_BACKOFF_FACTOR = config("OUTBOUND_HTTP_BACKOFF_FACTOR", default=0.3, cast=float)
+# Midas scrapes some merchant sites while the balance request is open, so it gets a longer read timeout
+MIDAS_READ_TIMEOUT = config("MIDAS_READ_TIMEOUT", default=120.0, cast=float)
 MY360_SCHEME_URL = "https://mygravity.co/my360/"
 MY360_SCHEME_API_URL = "https://rewards.api.mygravity.co/v3/reward_scheme/{}/schemes"
 
@@ -271,6 +312,10 @@ MIDAS_QUEUE_NAME = config("MIDAS_QUEUE_NAME", default="loyalty-request")
 
 ANGELIA_QUEUE_NAME = config("ANGELIA_QUEUE_NAME", default="angelia-hermes-bridge")
 ANGELIA_QUEUE_ROUTING_KEY = config("ANGELIA_QUEUE_ROUTING_KEY", default="angelia")
+# Worker threads handling Angelia messages concurrently, messages for the same user are still handled in order.
+# 0 keeps the single threaded consumer.
+ANGELIA_CONSUMER_WORKERS = config("ANGELIA_CONSUMER_WORKERS", default=0, cast=int)
+ANGELIA_CONSUMER_PREFETCH_COUNT = config("ANGELIA_CONSUMER_PREFETCH_COUNT", default=20, cast=int)
 
 APPLE_APP_ID = config("APPLE_APP_ID", default="com.bink.wallet")
 APPLE_CLIENT_SECRET = config("APPLE_CLIENT_SECRET", default="")
@@ -654,7 +699,28 @@ REDIS_MPLANS_CACHE_EXPIRY = config(
     default=60 * 60 * 24,  # 60*60*24 is 24 hrs in seconds
     cast=int,
 )
+# Membership plans older than this are served while being refreshed in the background, 0 disables it
+REDIS_MPLANS_CACHE_SOFT_EXPIRY = config("REDIS_MPLANS_CACHE_SOFT_EXPIRY", default=60 * 60 * 12, cast=int)
 REDIS_MPLANS_CACHE_PREFIX = "m_plans"
+# Only one worker rebuilds a missing membership plan cache entry while the others wait for it or serve stale data
+REDIS_MPLANS_REBUILD_LOCK_SECONDS = config("REDIS_MPLANS_REBUILD_LOCK_SECONDS", default=30, cast=int)
+REDIS_MPLANS_REBUILD_WAIT_SECONDS = config("REDIS_MPLANS_REBUILD_WAIT_SECONDS", default=2.0, cast=float)
+REDIS_MPLANS_REBUILD_POLL_SECONDS = 0.05
+# Time in seconds during which repeated wallet views will not trigger another balance refresh for the same card
+BALANCE_REFRESH_COALESCE_SECONDS = config("BALANCE_REFRESH_COALESCE_SECONDS", default=60, cast=int)
+# Concurrent Midas balance calls made by a single wallet balance refresh, in total and per scheme
+BALANCE_REFRESH_MAX_WORKERS = config("BALANCE_REFRESH_MAX_WORKERS", default=10, cast=int)
+BALANCE_REFRESH_PER_SCHEME_LIMIT = config("BALANCE_REFRESH_PER_SCHEME_LIMIT", default=2, cast=int)
+# scheme account entries cleaned up per task when a scheme is removed from a bundle
+MEMBERSHIP_CARD_CLEANUP_CHUNK_SIZE = config("MEMBERSHIP_CARD_CLEANUP_CHUNK_SIZE", default=500, cast=int)
+# Process local cache of channel bundles and scheme statuses used by hermes.channels.Permit, 0 disables it
+CHANNEL_CONFIG_CACHE_TTL = 0 if TESTING else config("CHANNEL_CONFIG_CACHE_TTL", default=300, cast=int)
+CHANNEL_CONFIG_CACHE_VERSION_CHECK_SECONDS = config("CHANNEL_CONFIG_CACHE_VERSION_CHECK_SECONDS", default=5, cast=int)
+# History events recorded during a request or celery task are sent in batches, flushed at the end of the request or
+# task, when a transaction commits, or earlier once this many events are buffered or the oldest is this many seconds old
+HISTORY_BUFFER_MAX_SIZE = config("HISTORY_BUFFER_MAX_SIZE", default=500, cast=int)
+HISTORY_BUFFER_MAX_DELAY = config("HISTORY_BUFFER_MAX_DELAY", default=5.0, cast=float)
+HISTORY_BULK_CREATE_BATCH_SIZE = config("HISTORY_BULK_CREATE_BATCH_SIZE", default=100, cast=int)
 
 
 REDIS_READ_TIMEOUT = config("REDIS_READ_TIMEOUT", default=0.3, cast=float)
@@ -664,6 +730,9 @@ REDIS_READ_HEALTH_CHECK_INTERVAL = 1
 REDIS_WRITE_HEALTH_CHECK_INTERVAL = 1
 
 REDIS_API_CACHE_SCAN_BATCH_SIZE = config("REDIS_API_CACHE_SCAN_BATCH_SIZE", default=5_000, cast=int)
+# In-process cache in front of redis for functions decorated with hermes.redis.redis_cache, a TTL of 0 disables it
+REDIS_CACHE_L1_TTL = 0 if TESTING else config("REDIS_CACHE_L1_TTL", default=60, cast=int)
+REDIS_CACHE_L1_MAXSIZE = config("REDIS_CACHE_L1_MAXSIZE", default=256, cast=int)
 REDIS_READ_API_CACHE_POOL = Redis_ConnectionPool.from_url(
     url=REDIS_URL,
     socket_timeout=REDIS_READ_TIMEOUT,
@@ -732,6 +801,8 @@ RETAIN_TO_MINUTES = config("RETAIN_TO_MINUTES", default=-5, cast=int)
 
 # Time in seconds for the interval between retry tasks called by celery beats
 RETRY_PERIOD = config("RETRY_PERIOD", default=900, cast=int)
+# number of due retry tasks claimed and saved together on each call
+PERIODIC_RETRY_BATCH_SIZE = config("PERIODIC_RETRY_BATCH_SIZE", default=100, cast=int)
 # Time in seconds for interval of checking if payments have not been updated and require voiding
 PAYMENT_EXPIRY_CHECK_INTERVAL = config("PAYMENT_EXPIRY_CHECK_INTERVAL", default=600, cast=int)
 
@@ -821,6 +892,8 @@ PROMETHEUS_JOB = "hermes"
 ENCRYPTED_VALUES_LENGTH_CONTROL = config("ENCRYPTED_VALUES_LENGTH_CONTROL", default=255, cast=int)
 
 WAREHOUSE_QUEUE_NAME = config("WAREHOUSE_QUEUE_NAME", default="clickhouse_hermes")
+WAREHOUSE_BUFFER_MAX_SIZE = config("WAREHOUSE_BUFFER_MAX_SIZE", default=100, cast=int)
+WAREHOUSE_BUFFER_MAX_DELAY = config("WAREHOUSE_BUFFER_MAX_DELAY", default=2.0, cast=float)
 
 # DJango 3/4 change
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
@@ -829,6 +902,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 API_MESSAGING_RETRY_LIMIT = config("API_MESSAGING_RETRY_LIMIT", default=3, cast=int)
+# seconds before the first redelivery of a failed Angelia message, doubled for each further attempt
+API_MESSAGING_RETRY_DELAY = config("API_MESSAGING_RETRY_DELAY", default=1.0, cast=float)
+API_MESSAGING_REDELIVERY_POLL_SECONDS = config("API_MESSAGING_REDELIVERY_POLL_SECONDS", default=0.5, cast=float)
+API_MESSAGING_REDELIVERY_BATCH_SIZE = config("API_MESSAGING_REDELIVERY_BATCH_SIZE", default=100, cast=int)
 
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 2000
 HERMES_LOCAL = config("HERMES_LOCAL", default=False, cast=bool)
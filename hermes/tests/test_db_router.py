@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, override_settings
+
+from hermes.db_router import (
+    REPLICA_DB_ALIAS,
+    ReplicaLagCheck,
+    ReplicaRouter,
+    can_read_from_replica,
+    is_user_pinned_to_primary,
+    pin_user_to_primary,
+    routing_state,
+)
+from user.models import CustomUser
+
+server = fakeredis.FakeServer()
+mock_redis = fakeredis.FakeStrictRedis(server=server)
+
+
+class TestReplicaRouter(SimpleTestCase):
+    def setUp(self) -> None:
+        self.router = ReplicaRouter()
+        routing_state.use_replica = False
+        routing_state.wrote = False
+
+    def tearDown(self) -> None:
+        routing_state.use_replica = False
+        routing_state.wrote = False
+
+    def test_reads_use_the_primary_unless_the_view_opted_in(self):
+        self.assertEqual(self.router.db_for_read(CustomUser), DEFAULT_DB_ALIAS)
+
+        routing_state.use_replica = True
+        self.assertEqual(self.router.db_for_read(CustomUser), REPLICA_DB_ALIAS)
+
+    def test_reads_stay_on_the_primary_after_a_write(self):
+        routing_state.use_replica = True
+        self.assertEqual(self.router.db_for_write(CustomUser, instance=MagicMock()), DEFAULT_DB_ALIAS)
+
+        self.assertTrue(routing_state.wrote)
+        self.assertEqual(self.router.db_for_read(CustomUser), DEFAULT_DB_ALIAS)
+
+    def test_replica_is_not_used_when_not_configured(self):
+        with patch("hermes.db_router.replica_lag_check") as mock_lag_check:
+            self.assertFalse(can_read_from_replica(1))
+
+        mock_lag_check.is_healthy.assert_not_called()
+
+
+@patch("hermes.db_router.r_read", mock_redis)
+@patch("hermes.db_router.r_write", mock_redis)
+@override_settings(REPLICA_STICKY_SECONDS=5, REPLICA_MAX_LAG_SECONDS=2.0, REPLICA_LAG_CHECK_INTERVAL=60.0)
+class TestReplicaFallback(SimpleTestCase):
+    def setUp(self) -> None:
+        mock_redis.flushall()
+        routing_state.wrote = False
+
+    def test_user_is_pinned_to_the_primary_after_writing(self):
+        pin_user_to_primary(1)
+
+        self.assertTrue(is_user_pinned_to_primary(1))
+        self.assertFalse(is_user_pinned_to_primary(2))
+        self.assertLessEqual(mock_redis.ttl("db_replica:pinned_user:1"), 5)
+
+    def test_pinned_user_reads_from_the_primary(self):
+        pin_user_to_primary(1)
+        with (
+            patch.dict(settings.DATABASES, {REPLICA_DB_ALIAS: {}}),
+            patch("hermes.db_router.replica_lag_check") as mock_lag_check,
+        ):
+            mock_lag_check.is_healthy.return_value = True
+
+            self.assertFalse(can_read_from_replica(1))
+            self.assertTrue(can_read_from_replica(2))
+
+    @patch("hermes.db_router.replica_lag_gauge")
+    @patch("hermes.db_router.connections")
+    def test_lagging_replica_is_not_used(self, mock_connections, mock_gauge):
+        cursor = mock_connections.__getitem__.return_value.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (3.5,)
+        lag_check = ReplicaLagCheck()
+
+        self.assertFalse(lag_check.is_healthy())
+        mock_gauge.set.assert_called_once_with(3.5)
+
+        # the result is kept until the next check is due
+        cursor.fetchone.return_value = (0.1,)
+        self.assertFalse(lag_check.is_healthy())
+        self.assertEqual(cursor.execute.call_count, 1)
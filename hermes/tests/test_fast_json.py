@@ -0,0 +1,48 @@
+import datetime
+import decimal
+import io
+import uuid
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from hermes.fast_json import ORJSONParser, ORJSONRenderer, dumps, loads
+
+
+class TestFastJson(SimpleTestCase):
+    data = {
+        "id": 1,
+        "balance": decimal.Decimal("10.50"),
+        "created": datetime.datetime(2024, 1, 2, 3, 4, 5, 678, tzinfo=datetime.UTC),
+        "date": datetime.date(2024, 1, 2),
+        "naive": datetime.datetime(2024, 1, 2, 3, 4, 5),
+        "duration": datetime.timedelta(minutes=1),
+        "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "name": gettext_lazy("Bink"),
+        "text": "caf\u00e9 \u2028 line \u2029",
+        "tags": {"a"},
+        10: [None, True, 1.5, "", {}],
+    }
+
+    def test_renders_the_same_json_as_the_default_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output_falls_back_to_the_default_renderer(self):
+        media_type = "application/json; indent=4"
+        self.assertEqual(ORJSONRenderer().render(self.data, media_type), JSONRenderer().render(self.data, media_type))
+
+    def test_parses_the_same_as_the_default_parser(self):
+        body = JSONRenderer().render(self.data)
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b"{not json"))
+
+    def test_cache_encoding_round_trips(self):
+        cached = {"generation": "1", "data": [{"id": 1, "name": "plan"}]}
+        for enabled in (True, False):
+            with override_settings(FAST_JSON=enabled):
+                self.assertEqual(loads(dumps(cached)), cached)
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from hermes.http_client import ServiceClient
+from prometheus.metrics import outbound_request_latency_histogram
+
+
+class TestServiceClient(SimpleTestCase):
+    @staticmethod
+    def _request_count(service: str, status: str) -> float:
+        labels = {"service": service, "method": "POST", "status": status}
+        for sample in outbound_request_latency_histogram.collect()[0].samples:
+            if sample.name.endswith("_count") and sample.labels == labels:
+                return sample.value
+
+        return 0
+
+    @override_settings(OUTBOUND_HTTP_CONNECT_TIMEOUT=1.5)
+    def test_request_uses_default_timeout_and_records_latency(self):
+        client = ServiceClient("test-service", read_timeout=7)
+        with patch.object(client.session, "request") as mock_request:
+            mock_request.return_value.status_code = 201
+            client.post("http://test-service/endpoint", json={"a": 1})
+            client.post("http://test-service/endpoint", json={"a": 1}, timeout=2)
+
+        self.assertEqual(mock_request.call_args_list[0][1]["timeout"], (1.5, 7))
+        self.assertEqual(mock_request.call_args_list[1][1]["timeout"], 2)
+        self.assertEqual(self._request_count("test-service", "201"), 2)
+
+    def test_session_is_reused_within_a_process(self):
+        client = ServiceClient("test-reuse")
+        session = client.session
+        self.assertIs(client.session, session)
+
+        with patch("hermes.http_client.os.getpid", return_value=-1):
+            self.assertIsNot(client.session, session)
+
+    def test_only_connection_failures_are_retried_by_default(self):
+        retry = ServiceClient("test-retry").session.get_adapter("http://test-retry").max_retries
+        self.assertEqual(retry.read, 0)
+        self.assertEqual(retry.status, 0)
+        self.assertFalse(retry.status_forcelist)
+
+        retry = ServiceClient("test-retry", retry_statuses=(502,)).session.get_adapter("http://test-retry").max_retries
+        self.assertIn(502, retry.status_forcelist)
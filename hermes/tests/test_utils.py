@@ -5,10 +5,10 @@ from typing import Any
 from unittest.mock import MagicMock, patch
 
 import redis.exceptions
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from redis.client import Redis
 
-from hermes.redis import _CacheInfo, redis_cache
+from hermes.redis import L1_INVALIDATION_CHANNEL, _CacheInfo, r_write, redis_cache
 
 
 class Test:
@@ -185,7 +185,7 @@ class TestCache(TestCase):
         wrapped(arg)
         wrapped(arg)
 
-        json_hits, pickle_hits, misses = wrapped.cache_info()
+        json_hits, pickle_hits, misses, _ = wrapped.cache_info()
         return_dict[os.getpid()] = json_hits, pickle_hits, misses
 
         if cache_clear:
@@ -227,3 +227,70 @@ class TestCache(TestCase):
         # (json_hits, pickle_hits, misses)
         self.assertListEqual([(1, 0, 1), (2, 0, 0)], sorted([cache_info1, cache_info2]))
         self.assertListEqual([(1, 0, 1), (2, 0, 0)], sorted([cache_info3, cache_info4]))
+
+
+@override_settings(REDIS_CACHE_L1_TTL=60, REDIS_CACHE_L1_MAXSIZE=2)
+class TestCacheL1(TestCase):
+    @staticmethod
+    def _test_function(arg) -> Any:
+        return arg
+
+    def setUp(self) -> None:
+        self.wrapped_fn = redis_cache(self._test_function)
+
+    def tearDown(self) -> None:
+        self.wrapped_fn.cache_clear()
+
+    def test_repeated_calls_do_not_reach_redis(self):
+        result = (1, "2", True)
+        self.wrapped_fn(result)
+
+        with patch.object(Redis, "get") as mock_get:
+            self.assertEqual(self.wrapped_fn(result), result)
+            self.assertEqual(self.wrapped_fn(result), result)
+
+        mock_get.assert_not_called()
+        self.assertEqual(_CacheInfo(json_hits=0, pickle_hits=0, misses=1, l1_hits=2), self.wrapped_fn.cache_info())
+
+    def test_least_recently_used_result_is_evicted_to_redis(self):
+        for arg in ("a", "b", "a", "c", "b"):
+            self.wrapped_fn(arg)
+
+        # "b" was evicted when "c" was added, as "a" had been used more recently
+        self.assertEqual(_CacheInfo(json_hits=1, pickle_hits=0, misses=3, l1_hits=1), self.wrapped_fn.cache_info())
+
+    def test_expired_result_is_read_from_redis(self):
+        with patch("hermes.redis.time.monotonic", return_value=1000):
+            self.wrapped_fn("a")
+
+        with patch("hermes.redis.time.monotonic", return_value=1061):
+            self.wrapped_fn("a")
+
+        self.assertEqual(_CacheInfo(json_hits=1, pickle_hits=0, misses=1, l1_hits=0), self.wrapped_fn.cache_info())
+
+    def test_cache_clear_is_published_to_other_processes(self):
+        pubsub = r_write.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(L1_INVALIDATION_CHANNEL)
+        pubsub.get_message(timeout=1)
+
+        self.wrapped_fn.cache_clear()
+
+        message = pubsub.get_message(timeout=1)
+        pubsub.close()
+        self.assertEqual(message["data"].decode(), f"{__name__}.TestCacheL1._test_function")
+
+    def test_invalidation_message_clears_local_results(self):
+        self.wrapped_fn("a")
+        self.wrapped_fn("a")
+        self.assertEqual(self.wrapped_fn.cache_info().l1_hits, 1)
+
+        # as published by cache_clear() in another process, where the redis entries would also be deleted
+        r_write.delete(*r_write.keys(f"fn_cache:{__name__}.TestCacheL1._test_function:*"))
+        for _ in range(20):
+            r_write.publish(L1_INVALIDATION_CHANNEL, f"{__name__}.TestCacheL1._test_function")
+            sleep(0.05)
+            self.wrapped_fn("a")
+            if self.wrapped_fn.cache_info().misses == 2:
+                break
+
+        self.assertEqual(self.wrapped_fn.cache_info().misses, 2)
@@ -4,6 +4,7 @@ import requests
 from celery import shared_task
 from django.conf import settings
 
+from hermes.http_client import metis
 from history.signals import HISTORY_CONTEXT
 from history.utils import clean_history_kwargs, set_history_kwargs
 from payment_card.models import VopMerchantGroup
@@ -72,7 +73,7 @@ def activate(activation: "VopActivation", data: dict) -> tuple[PeriodicRetryStat
         activation.status = activation.ACTIVATING
         activation.save(update_fields=["status"])
 
-    resp = requests.post(
+    resp = metis.post(
         settings.METIS_URL + "/visa/activate/",
         json=data,
         headers={"Authorization": f"Token {settings.SERVICE_API_KEY}"},
@@ -109,7 +110,7 @@ def deactivate(
     activation.status = activation.DEACTIVATING
     activation.save(update_fields=["status"])
 
-    rep = requests.post(
+    rep = metis.post(
         settings.METIS_URL + "/visa/deactivate/",
         json=data,
         headers={
@@ -12,9 +12,13 @@ class HistoryConfig(AppConfig):
 
     def ready(self):
         if settings.INIT_RUNTIME_APPS or settings.TESTING:
+            from celery.signals import task_postrun, task_prerun
+
+            from history.buffer import close_task_history_buffer, open_task_history_buffer
             from history.enums import HistoryModel
             from history.serializers import load_body_serializers
             from history.signals import signal_record_history
+            from history.warehouse_buffer import close_task_warehouse_buffer, open_task_warehouse_buffer
 
             logger.info("Connecting History signals.")
             load_body_serializers()
@@ -25,5 +29,10 @@ class HistoryConfig(AppConfig):
                 signals.pre_delete.connect(
                     signal_record_history, sender=sender.value, dispatch_uid=f"{sender.value}_pre_delete"
                 )
+
+            task_prerun.connect(open_task_history_buffer, dispatch_uid="open_task_history_buffer")
+            task_postrun.connect(close_task_history_buffer, dispatch_uid="close_task_history_buffer")
+            task_prerun.connect(open_task_warehouse_buffer, dispatch_uid="open_task_warehouse_buffer")
+            task_postrun.connect(close_task_warehouse_buffer, dispatch_uid="close_task_warehouse_buffer")
         else:
             logger.info("History signals not connected as this is either a migration or statics collection")
@@ -0,0 +1,76 @@
+import time
+from collections import defaultdict
+from threading import local
+
+from django.conf import settings
+from django.db import transaction
+
+from history.tasks import bulk_record_history
+
+
+class HistoryBuffer(local):
+    """
+    Collects the history events recorded by the model signals while a request or celery task is running, and sends
+    them as one bulk_record_history task per model instead of one record_history task per save.
+
+    The buffer is flushed when the outermost request or task closes it, when the transaction the events were recorded
+    in commits, or once HISTORY_BUFFER_MAX_SIZE events are buffered or the oldest is HISTORY_BUFFER_MAX_DELAY seconds
+    old. Events recorded with no request or task open are sent straight away.
+    """
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.events: defaultdict[str, list[dict]] = defaultdict(list)
+        self.size = 0
+        self.first_event_at = 0.0
+        self.flush_on_commit = False
+
+    def open(self) -> None:
+        if not self.depth:
+            # a commit flush registered in a transaction that was rolled back will never run
+            self.flush_on_commit = False
+
+        self.depth += 1
+
+    def close(self) -> None:
+        self.depth = max(self.depth - 1, 0)
+        if not self.depth:
+            self.flush()
+
+    def add(self, model_name: str, event: dict) -> None:
+        if not self.depth:
+            bulk_record_history.delay(model_name, [event], send_events=True)
+            return
+
+        if not self.size:
+            self.first_event_at = time.monotonic()
+
+        self.events[model_name].append(event)
+        self.size += 1
+        if (
+            self.size >= settings.HISTORY_BUFFER_MAX_SIZE
+            or time.monotonic() - self.first_event_at >= settings.HISTORY_BUFFER_MAX_DELAY
+        ):
+            self.flush()
+        elif transaction.get_connection().in_atomic_block and not self.flush_on_commit:
+            self.flush_on_commit = True
+            transaction.on_commit(self.flush)
+
+    def flush(self) -> None:
+        events = self.events
+        self.events = defaultdict(list)
+        self.size = 0
+        self.flush_on_commit = False
+        for model_name, model_events in events.items():
+            bulk_record_history.delay(model_name, model_events, send_events=True)
+
+
+history_buffer = HistoryBuffer()
+
+
+def open_task_history_buffer(**kwargs) -> None:
+    history_buffer.open()
+
+
+def close_task_history_buffer(**kwargs) -> None:
+    history_buffer.close()
@@ -3,7 +3,7 @@ from datetime import UTC, datetime
 
 import arrow
 
-from api_messaging.message_broker import ProducerQueues, sending_service
+from history.warehouse_buffer import warehouse_buffer
 
 if t.TYPE_CHECKING:
     from collections.abc import Iterable
@@ -35,7 +35,7 @@ def get_user_consents(user: "CustomUser", scheme_account: "SchemeAccount") -> li
 def to_data_warehouse(payload: dict, headers: dict | None = None) -> None:
     headers = {"X-azure-ref": headers.get("X-azure-ref", None) if headers else None}
     if payload:
-        sending_service.queues[ProducerQueues.WAREHOUSE.name].send_message(payload, headers=headers)
+        warehouse_buffer.add(payload, headers)
 
 
 def addauth_request_lc_event(
@@ -409,7 +409,8 @@ event_map = {
 }
 
 
-def history_event(model_name: str, data: dict, headers: dict | None = None):
+def history_event_payloads(model_name: str, data: dict) -> list[dict]:
+    payloads = []
     if model_name in event_map and data.get("change_type") in event_map.get(model_name, {}):
         event_info = event_map[model_name][data["change_type"]]
         origin = "channel"
@@ -433,13 +434,28 @@ def history_event(model_name: str, data: dict, headers: dict | None = None):
                 # i.e. remove next two lines and add extra_data['by_channel'] = by_channel_slug
                 if not extra_data.get("channel"):
                     extra_data["channel"] = by_channel_slug
-                payload = {
-                    "event_type": event_info[0],
-                    "origin": origin,
-                    "event_date_time": arrow.utcnow().isoformat(),
-                    **extra_data,
-                }
-                to_data_warehouse(payload, headers)
+                payloads.append(
+                    {
+                        "event_type": event_info[0],
+                        "origin": origin,
+                        "event_date_time": arrow.utcnow().isoformat(),
+                        **extra_data,
+                    }
+                )
+
+    return payloads
+
+
+def history_event(model_name: str, data: dict, headers: dict | None = None):
+    for payload in history_event_payloads(model_name, data):
+        to_data_warehouse(payload, headers)
+
+
+def history_events(model_name: str, data_list: "Iterable[dict]", headers: dict | None = None) -> None:
+    # payloads are all built before publishing so a failing builder doesn't leave a batch half sent
+    payloads = [payload for data in data_list for payload in history_event_payloads(model_name, data)]
+    for payload in payloads:
+        to_data_warehouse(payload, headers)
 
 
 def user_pll_status_change_event(
@@ -462,6 +478,13 @@ def user_pll_status_change_event(
     to_data_warehouse(payload, headers)
 
 
+def user_pll_status_change_events(
+    user_plls: list[tuple["PllUserAssociation", int | None]], headers: dict | None = None
+) -> None:
+    for user_pll, previous_state in user_plls:
+        user_pll_status_change_event(user_pll, previous_state, headers)
+
+
 def generate_pll_delete_payload(user_plls: list["PllUserAssociation"]):
     event_payloads = []
 
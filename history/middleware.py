@@ -2,7 +2,9 @@ import logging
 
 from django.utils.deprecation import MiddlewareMixin
 
+from history.buffer import history_buffer
 from history.signals import HISTORY_CONTEXT
+from history.warehouse_buffer import warehouse_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,8 @@ class HistoryRequestMiddleware(MiddlewareMixin):
             logger.info("request failed to clear from history context.")
 
         HISTORY_CONTEXT.request = request
+        history_buffer.open()
+        warehouse_buffer.open()
 
     def process_response(self, request, response):
         if hasattr(HISTORY_CONTEXT, "user_info"):
@@ -24,6 +28,10 @@ class HistoryRequestMiddleware(MiddlewareMixin):
         if hasattr(HISTORY_CONTEXT, "request"):
             del HISTORY_CONTEXT.request
 
+        try:
+            history_buffer.close()
+        finally:
+            warehouse_buffer.close()
         return response
 
     def process_exception(self, request, exception):
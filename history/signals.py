@@ -5,10 +5,10 @@ import sentry_sdk
 from django.db.models import signals
 from django.utils import timezone
 
+from history.buffer import history_buffer
 from history.enums import DeleteField, ExcludedField
 from history.models import HistoricalBase, get_required_extra_fields
 from history.serializers import get_body_serializer
-from history.tasks import record_history
 
 HISTORY_CONTEXT = local()
 EXCLUDED_FIELDS = ExcludedField.as_set()
@@ -110,11 +110,13 @@ def signal_record_history(sender, instance, **kwargs) -> None:
             if field not in extra and hasattr(instance, field):
                 extra[field] = getattr(instance, field)
 
-        record_history.delay(
+        history_buffer.add(
             model_name,
-            event_time=event_time,
-            change_type=change_type,
-            change_details=change_details,
-            instance_id=instance_id,
-            **extra,
+            {
+                "event_time": event_time,
+                "change_type": change_type,
+                "change_details": change_details,
+                "instance_id": instance_id,
+                **extra,
+            },
         )
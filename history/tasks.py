@@ -1,9 +1,18 @@
+import logging
 import typing
 from enum import Enum
 
 from celery import shared_task
-
-from history.data_warehouse import add_auth_outcome, auth_outcome, history_event, join_outcome, register_outcome
+from django.conf import settings
+
+from history.data_warehouse import (
+    add_auth_outcome,
+    auth_outcome,
+    history_event,
+    history_events,
+    join_outcome,
+    register_outcome,
+)
 from history.enums import HistoryModel
 from history.models import HistoricalBase, HistoricalCustomUser, get_historical_model
 from history.serializers import get_historical_serializer
@@ -11,16 +20,21 @@ from history.serializers import get_historical_serializer
 if typing.TYPE_CHECKING:
     from ubiquity.models import SchemeAccountEntry
 
+logger = logging.getLogger(__name__)
 
-@shared_task
-def record_history(model_name: str, headers: dict | None = None, **kwargs) -> None:
-    # Django is able to convert enums to the value before saving to the db but the serializer below will
+
+def _enums_to_values(data: dict) -> None:
+    # Django is able to convert enums to the value before saving to the db but the serializers below will
     # raise an error for any enums. This is to convert to the value so no errors are raised, without having
     # to add .value to the enums in the code.
-    for key, val in kwargs.items():
+    for key, val in data.items():
         if isinstance(val, Enum):
-            kwargs[key] = val.value
+            data[key] = val.value
 
+
+@shared_task
+def record_history(model_name: str, headers: dict | None = None, **kwargs) -> None:
+    _enums_to_values(kwargs)
     serializer = get_historical_serializer(model_name)(data=kwargs)
     serializer.is_valid(raise_exception=True)
     # Todo: Angelia is sending the model name without the app name
@@ -68,13 +82,41 @@ def register_outcome_event(
     register_outcome(success, scheme_account_entry, headers=headers)
 
 
+def _validate_each(model_name: str, data_list: list) -> list[dict]:
+    # the records are validated one by one so an invalid one is skipped instead of losing the whole batch
+    serializer_class = get_historical_serializer(model_name)
+    validated_data = []
+    for data in data_list:
+        serializer = serializer_class(data=data)
+        if serializer.is_valid():
+            validated_data.append(serializer.validated_data)
+        else:
+            logger.error(f"Invalid {model_name} history record not saved: {serializer.errors}")
+
+    return validated_data
+
+
 @shared_task
-def bulk_record_history(model_name: str, data_list: list) -> None:
-    serializer = get_historical_serializer(model_name)(data=data_list, many=True)
-    serializer.is_valid(raise_exception=True)
+def bulk_record_history(model_name: str, data_list: list, send_events: bool = False) -> None:
+    """
+    Saves a batch of history records for one model. With send_events, the data warehouse events for the batch are
+    published as record_history would for each record, used for the batches sent by the history signals. Those
+    batches hold the records of unrelated saves, so a record that isn't valid is logged and skipped.
+    """
+    for data in data_list:
+        _enums_to_values(data)
+
+    if send_events:
+        validated_data = _validate_each(model_name, data_list)
+        history_events(model_name, validated_data)
+    else:
+        serializer = get_historical_serializer(model_name)(data=data_list, many=True)
+        serializer.is_valid(raise_exception=True)
+        validated_data = serializer.validated_data
+
     model = get_historical_model(model_name)
     history_entries = []
-    for data in serializer.validated_data:
+    for data in validated_data:
         history_entries.append(model(**data))
 
-    model.objects.bulk_create(history_entries, batch_size=100)
+    model.objects.bulk_create(history_entries, batch_size=settings.HISTORY_BULK_CREATE_BATCH_SIZE)
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from history.buffer import HistoryBuffer
+
+
+@patch("history.buffer.bulk_record_history")
+class TestHistoryBuffer(TestCase):
+    def setUp(self) -> None:
+        self.buffer = HistoryBuffer()
+
+    def test_event_without_request_or_task_is_sent_straight_away(self, mock_bulk_record_history):
+        self.buffer.add("SchemeAccount", {"instance_id": 1})
+
+        mock_bulk_record_history.delay.assert_called_once_with("SchemeAccount", [{"instance_id": 1}], send_events=True)
+
+    def test_events_are_sent_per_model_when_closed(self, mock_bulk_record_history):
+        self.buffer.open()
+        # nested scopes, such as an eager celery task run during a request, don't flush the buffer
+        self.buffer.open()
+        for instance_id in range(2):
+            self.buffer.add("SchemeAccount", {"instance_id": instance_id})
+
+        self.buffer.add("PaymentCardAccount", {"instance_id": 1})
+        self.buffer.close()
+        mock_bulk_record_history.delay.assert_not_called()
+
+        self.buffer.close()
+        self.assertEqual(
+            mock_bulk_record_history.delay.call_args_list,
+            [
+                (("SchemeAccount", [{"instance_id": 0}, {"instance_id": 1}]), {"send_events": True}),
+                (("PaymentCardAccount", [{"instance_id": 1}]), {"send_events": True}),
+            ],
+        )
+
+    @override_settings(HISTORY_BUFFER_MAX_SIZE=2)
+    def test_full_buffer_is_flushed(self, mock_bulk_record_history):
+        self.buffer.open()
+        for instance_id in range(3):
+            self.buffer.add("SchemeAccount", {"instance_id": instance_id})
+
+        mock_bulk_record_history.delay.assert_called_once_with(
+            "SchemeAccount", [{"instance_id": 0}, {"instance_id": 1}], send_events=True
+        )
+
+        self.buffer.close()
+        mock_bulk_record_history.delay.assert_called_with("SchemeAccount", [{"instance_id": 2}], send_events=True)
+
+    @override_settings(HISTORY_BUFFER_MAX_DELAY=5)
+    def test_old_events_are_flushed(self, mock_bulk_record_history):
+        self.buffer.open()
+        with patch("history.buffer.time.monotonic", return_value=100):
+            self.buffer.add("SchemeAccount", {"instance_id": 1})
+
+        with patch("history.buffer.time.monotonic", return_value=105):
+            self.buffer.add("SchemeAccount", {"instance_id": 2})
+
+        mock_bulk_record_history.delay.assert_called_once_with(
+            "SchemeAccount", [{"instance_id": 1}, {"instance_id": 2}], send_events=True
+        )
+
+    def test_events_are_flushed_on_commit(self, mock_bulk_record_history):
+        self.buffer.open()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+            self.buffer.add("SchemeAccount", {"instance_id": 1})
+            self.buffer.add("SchemeAccount", {"instance_id": 2})
+
+        self.assertEqual(len(callbacks), 1)
+        mock_bulk_record_history.delay.assert_called_once_with(
+            "SchemeAccount", [{"instance_id": 1}, {"instance_id": 2}], send_events=True
+        )
@@ -0,0 +1,20 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from history.middleware import HistoryRequestMiddleware
+
+
+class TestHistoryRequestMiddleware(SimpleTestCase):
+    @patch("history.middleware.warehouse_buffer")
+    @patch("history.middleware.history_buffer")
+    def test_warehouse_buffer_is_closed_when_history_buffer_fails(self, mock_history_buffer, mock_warehouse_buffer):
+        mock_history_buffer.close.side_effect = ConnectionError
+        middleware = HistoryRequestMiddleware(MagicMock())
+        request = MagicMock()
+
+        middleware.process_request(request)
+        with self.assertRaises(ConnectionError):
+            middleware.process_response(request, MagicMock())
+
+        mock_warehouse_buffer.close.assert_called_once()
@@ -40,7 +40,7 @@ class TestSignals(APITestCase):
         self.assertEqual(change_type, HistoricalBase.UPDATE)
 
     def test_signal_record_history(self):
-        with patch("history.tasks.record_history.delay") as mock_task:
+        with patch("history.buffer.bulk_record_history.delay") as mock_task:
             signals.signal_record_history(
                 PaymentCardAccount,
                 instance=self.payment_card_account,
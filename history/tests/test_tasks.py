@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.test import override_settings
 from rest_framework.test import APITestCase
 
@@ -55,3 +57,34 @@ class TestTasks(APITestCase):
             payment_card_account_history_last.change_type,
             HistoricalBase.CREATE,
         )
+
+    @patch("history.tasks.history_events")
+    def test_bulk_record_history_sends_events(self, mock_history_events):
+        data = {
+            "body": "some_stuff",
+            "instance_id": self.payment_card_account.id,
+            "change_type": HistoricalBase.CREATE,
+            "channel": "bink",
+        }
+        tasks.bulk_record_history("PaymentCardAccount", [data])
+        mock_history_events.assert_not_called()
+
+        tasks.bulk_record_history("PaymentCardAccount", [data, data], send_events=True)
+        self.assertEqual(mock_history_events.call_args.args[0], "PaymentCardAccount")
+        self.assertEqual(len(mock_history_events.call_args.args[1]), 2)
+
+    @patch("history.tasks.history_events")
+    def test_bulk_record_history_skips_invalid_signal_records(self, mock_history_events):
+        data = {
+            "body": "some_stuff",
+            "instance_id": self.payment_card_account.id,
+            "change_type": HistoricalBase.CREATE,
+            "channel": "bink",
+        }
+        payment_card_account_history_pre = HistoricalPaymentCardAccount.objects.count()
+
+        with self.assertLogs("history.tasks", level="ERROR"):
+            tasks.bulk_record_history("PaymentCardAccount", [data, {**data, "change_type": "bad"}], send_events=True)
+
+        self.assertEqual(HistoricalPaymentCardAccount.objects.count(), payment_card_account_history_pre + 1)
+        self.assertEqual(len(mock_history_events.call_args.args[1]), 1)
@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from kombu import Connection
+
+from history.warehouse_buffer import WAREHOUSE_QUEUE, WarehouseEventBuffer, publish_warehouse_events
+
+HEADERS = {"X-azure-ref": None}
+
+
+@patch("history.warehouse_buffer.sending_service")
+@patch("history.warehouse_buffer.publish_warehouse_events")
+class TestWarehouseEventBuffer(TestCase):
+    def setUp(self) -> None:
+        self.buffer = WarehouseEventBuffer()
+
+    def test_event_without_scope_is_sent_straight_away(self, mock_publish, mock_sending_service):
+        self.buffer.add({"event_type": "user.created"}, HEADERS)
+
+        mock_sending_service.queues.__getitem__.return_value.send_message.assert_called_once_with(
+            {"event_type": "user.created"}, headers=HEADERS
+        )
+        mock_publish.assert_not_called()
+
+    def test_committed_events_are_published_together_when_closed(self, mock_publish, mock_sending_service):
+        self.buffer.open()
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            for user_id in range(3):
+                self.buffer.add({"internal_user_ref": user_id}, HEADERS)
+
+        mock_publish.assert_not_called()
+        self.buffer.close()
+
+        mock_publish.assert_called_once_with([({"internal_user_ref": user_id}, HEADERS) for user_id in range(3)])
+        mock_sending_service.queues.__getitem__.assert_not_called()
+
+    def test_rolled_back_events_are_dropped(self, mock_publish, mock_sending_service):
+        self.buffer.open()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                self.buffer.add({"internal_user_ref": 1}, HEADERS)
+
+            try:
+                with transaction.atomic():
+                    self.buffer.add({"internal_user_ref": 2}, HEADERS)
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.buffer.close()
+
+        self.assertEqual(len(callbacks), 1)
+        mock_publish.assert_called_once_with([({"internal_user_ref": 1}, HEADERS)])
+
+    @override_settings(WAREHOUSE_BUFFER_MAX_SIZE=2)
+    def test_full_buffer_is_published(self, mock_publish, mock_sending_service):
+        self.buffer.open()
+        with self.captureOnCommitCallbacks(execute=True):
+            for user_id in range(3):
+                self.buffer.add({"internal_user_ref": user_id}, HEADERS)
+
+        mock_publish.assert_called_once_with([({"internal_user_ref": 0}, HEADERS), ({"internal_user_ref": 1}, HEADERS)])
+
+        self.buffer.close()
+        mock_publish.assert_called_with([({"internal_user_ref": 2}, HEADERS)])
+
+    def test_publish_failure_does_not_raise(self, mock_publish, mock_sending_service):
+        mock_publish.side_effect = ConnectionError
+        self.buffer.open()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.buffer.add({"internal_user_ref": 1}, HEADERS)
+
+        with self.assertLogs("history.warehouse_buffer", level="ERROR"):
+            self.buffer.close()
+
+    def test_publish_failure_after_scope_closed_does_not_raise(self, mock_publish, mock_sending_service):
+        mock_publish.side_effect = ConnectionError
+        self.buffer.open()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.buffer.add({"internal_user_ref": 1}, HEADERS)
+
+        self.buffer.close()
+        with self.assertLogs("history.warehouse_buffer", level="ERROR"):
+            callbacks[0]()
+
+        mock_publish.assert_called_once_with([({"internal_user_ref": 1}, HEADERS)])
+
+
+class TestPublishWarehouseEvents(SimpleTestCase):
+    def test_events_are_routed_to_the_warehouse_queue(self):
+        with Connection("memory://") as connection:
+            with patch("history.warehouse_buffer.warehouse_connection", connection):
+                publish_warehouse_events([({"event_type": "user.created"}, HEADERS)])
+
+            queue = connection.SimpleQueue(WAREHOUSE_QUEUE)
+            message = queue.get(timeout=1)
+            queue.close()
+
+        self.assertEqual(message.payload, {"event_type": "user.created"})
+        self.assertEqual(message.headers, HEADERS)
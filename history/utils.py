@@ -44,7 +44,7 @@ class HistoryAdmin(admin.ModelAdmin):
 class GlobalMockAPITestCase(APITestCase):
     @classmethod
     def setUpClass(cls):
-        cls.history_patcher = patch("history.signals.record_history", autospec=True)
+        cls.history_patcher = patch("history.buffer.bulk_record_history", autospec=True)
         cls.bulk_history_patcher = patch("history.utils.bulk_record_history", autospec=True)
         cls.aes_patcher = patch("ubiquity.channel_vault._aes_keys", mock_aes_keys)
         cls.history_patcher.start()
@@ -0,0 +1,109 @@
+import logging
+import time
+from functools import partial
+from threading import local
+
+from django.conf import settings
+from django.db import transaction
+from kombu import Connection, Exchange, Queue
+from kombu.pools import producers
+
+from api_messaging.message_broker import WAREHOUSE_QUEUE_PARAMS, ProducerQueues, sending_service
+
+logger = logging.getLogger(__name__)
+
+WAREHOUSE_EXCHANGE = Exchange(WAREHOUSE_QUEUE_PARAMS.exchange_name, type=WAREHOUSE_QUEUE_PARAMS.exchange_type)
+# declared with its binding, as the producer does, so events aren't dropped as unroutable before it exists
+WAREHOUSE_QUEUE = Queue(
+    WAREHOUSE_QUEUE_PARAMS.queue_name, WAREHOUSE_EXCHANGE, routing_key=WAREHOUSE_QUEUE_PARAMS.routing_key
+)
+# connecting is lazy, the pool opens the connection and its channel on first use and keeps them for the process
+warehouse_connection = Connection(settings.RABBIT_DSN)
+
+
+def publish_warehouse_events(events: list[tuple[dict, dict]]) -> None:
+    """Publishes a batch of (payload, headers) events over one pooled connection and channel."""
+    with producers[warehouse_connection].acquire(block=True) as producer:
+        for payload, headers in events:
+            producer.publish(
+                payload,
+                exchange=WAREHOUSE_EXCHANGE,
+                routing_key=WAREHOUSE_QUEUE_PARAMS.routing_key,
+                headers=headers,
+                serializer="json",
+                declare=[WAREHOUSE_QUEUE],
+                retry=True,
+            )
+
+
+class WarehouseEventBuffer(local):
+    """
+    Collects the data warehouse events sent while a request, celery task or Angelia message is being handled, and
+    publishes them in batches instead of one broker round trip per event.
+
+    An event only joins the buffer once the transaction it was sent in commits, events sent in a transaction that
+    is rolled back are dropped. The buffer is published when the outermost scope closes it, or once
+    WAREHOUSE_BUFFER_MAX_SIZE events are waiting or the oldest has waited WAREHOUSE_BUFFER_MAX_DELAY seconds.
+    Events sent with no scope open are published straight away.
+    """
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.events: list[tuple[dict, dict]] = []
+        self.first_event_at = 0.0
+
+    def open(self) -> None:
+        self.depth += 1
+
+    def close(self) -> None:
+        self.depth = max(self.depth - 1, 0)
+        if not self.depth:
+            self.flush()
+
+    def add(self, payload: dict, headers: dict) -> None:
+        if not self.depth:
+            sending_service.queues[ProducerQueues.WAREHOUSE.name].send_message(payload, headers=headers)
+            return
+
+        # runs straight away when not in a transaction
+        transaction.on_commit(partial(self._add_committed, payload, headers))
+
+    def _add_committed(self, payload: dict, headers: dict) -> None:
+        if not self.depth:
+            # the scope was closed before the transaction committed
+            self._publish([(payload, headers)])
+            return
+
+        if not self.events:
+            self.first_event_at = time.monotonic()
+
+        self.events.append((payload, headers))
+        if (
+            len(self.events) >= settings.WAREHOUSE_BUFFER_MAX_SIZE
+            or time.monotonic() - self.first_event_at >= settings.WAREHOUSE_BUFFER_MAX_DELAY
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        events, self.events = self.events, []
+        if events:
+            self._publish(events)
+
+    @staticmethod
+    def _publish(events: list[tuple[dict, dict]]) -> None:
+        try:
+            publish_warehouse_events(events)
+        except Exception:
+            # the work the events describe is already committed, failing the request or task now wouldn't undo it
+            logger.exception(f"Failed to publish {len(events)} data warehouse events")
+
+
+warehouse_buffer = WarehouseEventBuffer()
+
+
+def open_task_warehouse_buffer(**kwargs) -> None:
+    warehouse_buffer.open()
+
+
+def close_task_warehouse_buffer(**kwargs) -> None:
+    warehouse_buffer.close()
@@ -5,8 +5,9 @@ import arrow
 import sentry_sdk
 from celery import shared_task
 from django.conf import settings
-from requests import HTTPError, request
+from requests import HTTPError
 
+from hermes.http_client import metis
 from hermes.tasks import RetryTaskStore
 from payment_card.enums import RequestMethod
 from payment_card.models import PaymentAudit, PaymentStatus
@@ -93,7 +94,7 @@ def metis_request(method: RequestMethod, endpoint: str, payload: dict, headers:
         if "X-Priority" in headers:
             base_headers["X-Priority"] = headers["X-Priority"]
 
-    response = request(
+    response = metis.request(
         method.value,
         settings.METIS_URL + endpoint,
         json=payload,
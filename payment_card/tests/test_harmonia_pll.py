@@ -1,5 +1,8 @@
 import json
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 import ubiquity.tests.factories
 from hermes import settings
 from hermes.fixtures.setupdb import set_up_db
@@ -342,3 +345,21 @@ class TestPaymentCardUserInfo(GlobalMockAPITestCase):
         self.assertEqual(data[self.psp_token_3]["loyalty_id"], None)
         self.assertNotIn("card_information", data[self.psp_token_3])
         self.assertEqual(data[self.psp_token_3]["payment_card_account_id"], self.payment_card_account_3.id)
+
+    def test_query_count_does_not_grow_with_tokens(self):
+        def post_tokens(tokens: list[str]) -> None:
+            response = self.client.post(
+                f"/payment_cards/accounts/payment_card_user_info/{self.scheme.slug}",
+                json.dumps({"payment_cards": tokens}),
+                content_type="application/json",
+                **self.auth_headers,
+            )
+            self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as one_token:
+            post_tokens([self.psp_token_1])
+
+        with CaptureQueriesContext(connection) as all_tokens:
+            post_tokens([self.psp_token_1, self.psp_token_2, self.psp_token_3])
+
+        self.assertEqual(len(one_token), len(all_tokens))
@@ -1,5 +1,8 @@
 import json
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 import ubiquity.tests.factories
 from hermes import settings
 from history.utils import GlobalMockAPITestCase
@@ -116,3 +119,21 @@ class TestRetrieveLoyaltyID(GlobalMockAPITestCase):
                 {"99999": None},
             ],
         )
+
+    def test_query_count_does_not_grow_with_tokens(self):
+        def post_tokens(tokens: list[str]) -> None:
+            response = self.client.post(
+                f"/payment_cards/accounts/loyalty_id/{self.scheme.slug}",
+                json.dumps({"payment_cards": tokens}),
+                content_type="application/json",
+                **self.auth_headers,
+            )
+            self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as one_token:
+            post_tokens([self.psp_token_1])
+
+        with CaptureQueriesContext(connection) as all_tokens:
+            post_tokens([self.psp_token_1, self.psp_token_2, "99999"])
+
+        self.assertEqual(len(one_token), len(all_tokens))
@@ -1,10 +1,10 @@
 import csv
 import json
+from collections import defaultdict
 from io import StringIO
 
 import arrow
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
 from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import redirect, render
 from django.utils import timezone
@@ -15,6 +15,7 @@ from rest_framework.generics import GenericAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from hermes.db_router import ReplicaReadMixin
 from history.data_warehouse import to_data_warehouse
 from history.utils import history_bulk_update
 from payment_card import metis, serializers
@@ -25,8 +26,14 @@ from payment_card.serializers import PaymentCardClientSerializer
 from periodic_retry.models import PeriodicRetryStatus, RetryTaskList
 from periodic_retry.tasks import PeriodicRetryHandler
 from prometheus.metrics import payment_card_processing_seconds_histogram, payment_card_status_change_counter
-from scheme.models import Scheme
-from ubiquity.models import PaymentCardAccountEntry, PaymentCardSchemeEntry, SchemeAccountEntry, VopActivation
+from scheme.models import Scheme, SchemeCredentialQuestion
+from ubiquity.models import (
+    AccountLinkStatus,
+    PaymentCardAccountEntry,
+    PaymentCardSchemeEntry,
+    SchemeAccountEntry,
+    VopActivation,
+)
 from user.authentication import AllowService, JwtAuthentication, ServiceAuthentication
 from user.models import ClientApplication, Organisation
 
@@ -197,43 +204,82 @@ class RetrievePaymentCardSchemeAccounts(generics.ListAPIView):
         return [{"scheme_id": scheme.scheme_id, "scheme_account_id": scheme.id} for scheme in list(scheme_account_set)]
 
 
-class RetrieveLoyaltyID(APIView):
+def _payment_card_entries_by_token(payment_card_tokens: list) -> dict[str, list[PaymentCardAccountEntry]]:
+    entries_by_token = defaultdict(list)
+    for payment_card_entry in (
+        PaymentCardAccountEntry.objects.filter(payment_card_account__token__in=payment_card_tokens)
+        .select_related("payment_card_account")
+        .order_by("id")
+    ):
+        entries_by_token[payment_card_entry.payment_card_account.token].append(payment_card_entry)
+
+    return entries_by_token
+
+
+def _prefetch_entry_credentials(
+    scheme_account_entries: list[SchemeAccountEntry], scheme: Scheme
+) -> list[SchemeAccountEntry]:
+    # every entry is in the requested scheme, sharing its instance prefetches the questions once
+    for scheme_account_entry in scheme_account_entries:
+        scheme_account_entry.scheme_account.scheme = scheme
+
+    SchemeAccountEntry.prefetch_credentials(scheme_account_entries)
+    return scheme_account_entries
+
+
+def _third_party_identifier(scheme_account_entry: SchemeAccountEntry, question: SchemeCredentialQuestion | None):
+    return scheme_account_entry._find_answer(question) if question else None
+
+
+class RetrieveLoyaltyID(ReplicaReadMixin, APIView):
     authentication_classes = (ServiceAuthentication,)
+    # a lookup, posted only to send a list of tokens
+    replica_methods = ("POST",)
 
     def post(self, request, scheme_slug):
-        response_data = []
         body_unicode = request.body.decode("utf-8")
         body = json.loads(body_unicode)
         payment_card_tokens = body["payment_cards"]
         scheme = get_object_or_404(Scheme, slug=scheme_slug)
+
+        entries_by_token = _payment_card_entries_by_token(payment_card_tokens)
+        users = {entries[0].user_id for entries in entries_by_token.values()}
+        scheme_account_entries = _prefetch_entry_credentials(
+            list(
+                SchemeAccountEntry.objects.filter(user_id__in=users, scheme_account__scheme=scheme)
+                .select_related("scheme_account")
+                .order_by("id")
+            ),
+            scheme,
+        )
+        entries_by_user = {}
+        for scheme_account_entry in scheme_account_entries:
+            entries_by_user.setdefault(scheme_account_entry.user_id, scheme_account_entry)
+
+        question = scheme.questions.filter(third_party_identifier=True).first()
+        response_data = []
         for payment_card_token in payment_card_tokens:
-            payment_card_entry = PaymentCardAccountEntry.objects.filter(
-                payment_card_account__token=payment_card_token
-            ).first()
-            if payment_card_entry:
-                payment_card = payment_card_entry.payment_card_account
-                try:
-                    scheme_account_entry = SchemeAccountEntry.objects.get(
-                        user=payment_card_entry.user, scheme_account__scheme=scheme
-                    )
-                except ObjectDoesNotExist:
-                    # the user was matched but is not registered in that scheme
-                    response_data.append({payment_card_token: None})
-                else:
-                    scheme_account = scheme_account_entry.scheme_account
-                    response_data.append(
-                        {
-                            payment_card.token: scheme_account_entry.third_party_identifier,
-                            "scheme_account_id": scheme_account.id,
-                        }
-                    )
+            payment_card_entries = entries_by_token.get(str(payment_card_token))
+            scheme_account_entry = payment_card_entries and entries_by_user.get(payment_card_entries[0].user_id)
+            if scheme_account_entry:
+                response_data.append(
+                    {
+                        payment_card_entries[0].payment_card_account.token: _third_party_identifier(
+                            scheme_account_entry, question
+                        ),
+                        "scheme_account_id": scheme_account_entry.scheme_account_id,
+                    }
+                )
             else:
+                # no payment card for this token, or the user was matched but is not registered in that scheme
                 response_data.append({payment_card_token: None})
+
         return JsonResponse(response_data, safe=False)
 
 
-class RetrievePaymentCardUserInfo(APIView):
+class RetrievePaymentCardUserInfo(ReplicaReadMixin, APIView):
     authentication_classes = (ServiceAuthentication,)
+    replica_methods = ("POST",)
 
     @staticmethod
     def post(request, scheme_slug):
@@ -243,42 +289,80 @@ class RetrievePaymentCardUserInfo(APIView):
         payment_card_tokens = body["payment_cards"]
         scheme = get_object_or_404(Scheme, slug=scheme_slug)
 
+        entries_by_token = _payment_card_entries_by_token(payment_card_tokens)
+        linked_scheme_accounts = RetrievePaymentCardUserInfo._linked_scheme_accounts(entries_by_token, scheme)
+        matching_entries = RetrievePaymentCardUserInfo._transaction_matching_entries(
+            set(linked_scheme_accounts.values()), scheme
+        )
+        question = scheme.questions.filter(third_party_identifier=True).first()
         for payment_card_token in payment_card_tokens:
-            payment_card_entries = PaymentCardAccountEntry.objects.filter(
-                payment_card_account__token=payment_card_token
-            )
-
             # if there's no payment card for this token, leave it out of the returned data.
-            if not payment_card_entries.exists():
-                continue
+            if payment_card_entries := entries_by_token.get(str(payment_card_token)):
+                scheme_account_entry = matching_entries.get(linked_scheme_accounts.get(str(payment_card_token)))
+                RetrievePaymentCardUserInfo._create_user_info_resp(
+                    scheme_account_entry, question, response_data, payment_card_token, payment_card_entries
+                )
+
+        return JsonResponse(response_data, safe=False)
 
-            active_links = PaymentCardSchemeEntry.objects.filter(
+    @staticmethod
+    def _linked_scheme_accounts(
+        entries_by_token: dict[str, list[PaymentCardAccountEntry]], scheme: Scheme
+    ) -> dict[str, int]:
+        """The oldest scheme account in the scheme that each token's payment card accounts are actively linked to."""
+        oldest_link_by_account = {}
+        for payment_card_account_id, created, scheme_account_id in (
+            PaymentCardSchemeEntry.objects.filter(
                 active_link=True,
                 scheme_account__scheme=scheme,
-                payment_card_account__id__in=(p.payment_card_account.id for p in payment_card_entries),
+                payment_card_account_id__in={
+                    entry.payment_card_account_id for entries in entries_by_token.values() for entry in entries
+                },
             )
+            .order_by("-scheme_account__created")
+            .values_list("payment_card_account_id", "scheme_account__created", "scheme_account_id")
+        ):
+            oldest_link_by_account[payment_card_account_id] = (created, scheme_account_id)
+
+        linked_scheme_accounts = {}
+        for payment_card_token, entries in entries_by_token.items():
+            if links := [
+                oldest_link_by_account[entry.payment_card_account_id]
+                for entry in entries
+                if entry.payment_card_account_id in oldest_link_by_account
+            ]:
+                linked_scheme_accounts[payment_card_token] = min(links)[1]
+
+        return linked_scheme_accounts
 
-            RetrievePaymentCardUserInfo._create_user_info_resp(
-                active_links, response_data, payment_card_token, payment_card_entries
+    @staticmethod
+    def _transaction_matching_entries(scheme_account_ids: set[int], scheme: Scheme) -> dict[int, SchemeAccountEntry]:
+        """
+        The active entry of the earliest joined user on each scheme account, the same user as
+        SchemeAccount.get_transaction_matching_user_id() returns.
+        """
+        matching_entries = {}
+        for scheme_account_entry in (
+            SchemeAccountEntry.objects.filter(
+                scheme_account_id__in=scheme_account_ids, link_status=AccountLinkStatus.ACTIVE
             )
+            .select_related("user", "scheme_account")
+            .order_by("-user__date_joined")
+        ):
+            matching_entries[scheme_account_entry.scheme_account_id] = scheme_account_entry
 
-        return JsonResponse(response_data, safe=False)
+        _prefetch_entry_credentials(list(matching_entries.values()), scheme)
+        return matching_entries
 
     @staticmethod
-    def _create_user_info_resp(active_links, response_data, payment_card_token, payment_card_entries) -> None:
-        user_id = None
-        scheme_account = None
-        if active_links.exists():
-            scheme_account = active_links.order_by("scheme_account__created").first().scheme_account
-            user_id = scheme_account.get_transaction_matching_user_id()
-
-        if user_id and scheme_account:
-            scheme_account_entry = SchemeAccountEntry.objects.get(user=user_id, scheme_account=scheme_account)
-
+    def _create_user_info_resp(
+        scheme_account_entry, question, response_data, payment_card_token, payment_card_entries
+    ) -> None:
+        if scheme_account_entry:
             response_data[payment_card_token] = {
-                "loyalty_id": scheme_account_entry.third_party_identifier,
-                "scheme_account_id": scheme_account.id,
-                "user_id": user_id,
+                "loyalty_id": _third_party_identifier(scheme_account_entry, question),
+                "scheme_account_id": scheme_account_entry.scheme_account_id,
+                "user_id": scheme_account_entry.user_id,
                 "credentials": scheme_account_entry.credentials(),
             }
         else:
@@ -286,7 +370,7 @@ class RetrievePaymentCardUserInfo(APIView):
             response_data[payment_card_token] = {
                 "loyalty_id": None,
                 "scheme_account_id": None,
-                "user_id": payment_card_entries.first().user.id,
+                "user_id": payment_card_entries[0].user_id,
                 "credentials": "",
             }
 
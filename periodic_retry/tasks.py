@@ -6,6 +6,7 @@ import arrow
 import sentry_sdk
 from celery import shared_task
 from django.conf import settings
+from django.utils import timezone
 from django_redis import get_redis_connection
 
 from periodic_retry.models import PeriodicRetry, PeriodicRetryStatus, RetryTaskList
@@ -105,6 +106,9 @@ class PeriodicRetryHandler:
         self.warning_attempt_count = 5
         self.default_max_retry_count = 10
         self.storage = get_redis_connection("retry_tasks")
+        # queued task ids scored by when they may next run, with each task's data kept in a hash beside them
+        self.schedule_key = task_list + ":schedule"
+        self.data_key = task_list + ":data"
 
     @staticmethod
     def now_plus_seconds(seconds):
@@ -112,16 +116,19 @@ class PeriodicRetryHandler:
 
     @property
     def length(self):
-        return self.storage.llen(self.task_list)
+        return self.storage.zcard(self.schedule_key)
 
-    def save_to_redis(self, data):
-        self.storage.lpush(self.task_list, json.dumps(data))
+    def save_to_redis(self, data, run_after: float | None = None):
+        pipe = self.storage.pipeline()
+        pipe.hset(self.data_key, data["task_id"], json.dumps(data))
+        pipe.zadd(self.schedule_key, {data["task_id"]: run_after or arrow.utcnow().timestamp()}, nx=True)
+        pipe.execute()
 
-    def _set_task_prechecks(self, periodic_retry_obj: PeriodicRetry) -> None:
-        tasks_in_queue = self.get_tasks_in_queue()
-        ids_in_queue = [task["task_id"] for task in tasks_in_queue]
+    def is_queued(self, retry_id: int) -> bool:
+        return self.storage.zscore(self.schedule_key, retry_id) is not None
 
-        if periodic_retry_obj.id in ids_in_queue:
+    def _set_task_prechecks(self, periodic_retry_obj: PeriodicRetry) -> None:
+        if self.is_queued(periodic_retry_obj.id):
             msg = f"PeriodicRetry object (id={periodic_retry_obj.id}) is already queued for retry"
             logger.debug(msg)
             raise RetryError(msg)
@@ -165,7 +172,8 @@ class PeriodicRetryHandler:
             logger.debug(f"Skipping adding task to retry queue... PeriodicRetry (id={retry_info.id})")
             return
 
-        self.save_to_redis(data)
+        next_retry_after = retry_info.next_retry_after
+        self.save_to_redis(data, next_retry_after.timestamp() if next_retry_after else None)
         retry_info.status = PeriodicRetryStatus.PENDING
         retry_info.save()
 
@@ -209,22 +217,31 @@ class PeriodicRetryHandler:
         """Adds an existing PeriodicRetry object to the retry queue"""
         self._set_task(retry_obj, retry_obj.module, retry_obj.function, retry_obj.data)
 
-    def call_next_task(self):
-        data = json.loads(self.storage.rpop(self.task_list))
-        try:
-            periodic_retry_obj = PeriodicRetry.objects.get(pk=data["task_id"])
-        except KeyError:
-            logger.exception("PeriodicRetry improperly set. Missing 'task_id' in data when calling task.")
-            return
+    def _claim_due_tasks(self, count: int) -> list[dict]:
+        popped = self.storage.zpopmin(self.schedule_key, count)
+        time_now = arrow.utcnow().timestamp()
+        due_ids = [task_id for task_id, run_after in popped if run_after <= time_now]
+        if not_due := {task_id: run_after for task_id, run_after in popped if run_after > time_now}:
+            self.storage.zadd(self.schedule_key, not_due, nx=True)
 
+        if not due_ids:
+            return []
+
+        pipe = self.storage.pipeline()
+        pipe.hmget(self.data_key, due_ids)
+        pipe.hdel(self.data_key, *due_ids)
+        tasks, _ = pipe.execute()
+        return [json.loads(task) for task in tasks if task is not None]
+
+    def _call_task(self, data: dict, periodic_retry_obj: PeriodicRetry) -> bool:
+        """Returns whether periodic_retry_obj should be saved."""
         logger.debug(f"Attempting to retry PeriodicRetry (id={periodic_retry_obj.id})")
         try:
             self._call_task_prechecks(periodic_retry_obj)
         except RetryError:
             logger.debug(f"Skipping task PeriodicRetry (id={periodic_retry_obj.id})...")
             periodic_retry_obj.status = PeriodicRetryStatus.REQUIRED
-            periodic_retry_obj.save(update_fields=["status"])
-            return
+            return True
 
         try:
             data["periodic_retry_obj"] = periodic_retry_obj
@@ -245,23 +262,65 @@ class PeriodicRetryHandler:
                 periodic_retry_obj.status = PeriodicRetryStatus.REQUIRED
 
             periodic_retry_obj.retry_count += 1
-            periodic_retry_obj.save()
             logger.debug(
                 f"Retry attempt completed with PeriodicRetry (id={periodic_retry_obj.id}) "
                 f"in status - {periodic_retry_obj.status.name}"
             )
+            return True
         except Exception as e:
             # All exceptions caught and logged in results since it is impossible to know explicitly which exceptions
             # could be raised by a retried function. This also means execution of tasks will not be blocked if an
             # exception is raised by an earlier one.
             periodic_retry_obj.results += [str(e)]
             logger.exception(f"Error retrying PeriodicRetry (id={periodic_retry_obj.id})")
+            return False
+
+    @staticmethod
+    def _save_called_task(periodic_retry_obj: PeriodicRetry) -> None:
+        """
+        Saves the outcome of a call straight after it, unless the row has left PENDING meanwhile. The Metis callback
+        sets the status and results of the row it is retrying, which can land while the call is still being made, so
+        only the retry count and next retry time are saved over it.
+        """
+        retry_fields = {
+            "retry_count": periodic_retry_obj.retry_count,
+            "next_retry_after": periodic_retry_obj.next_retry_after,
+            "modified_on": timezone.now(),
+        }
+        if not PeriodicRetry.objects.filter(id=periodic_retry_obj.id, status=PeriodicRetryStatus.PENDING).update(
+            status=periodic_retry_obj.status, results=periodic_retry_obj.results, **retry_fields
+        ):
+            PeriodicRetry.objects.filter(id=periodic_retry_obj.id).update(**retry_fields)
+
+    def call_due_tasks(self, count: int) -> int:
+        """Claims up to count due tasks, loading their PeriodicRetry objects together, and calls them."""
+        tasks = self._claim_due_tasks(count)
+        retry_objs = PeriodicRetry.objects.in_bulk([task["task_id"] for task in tasks if "task_id" in task])
+        for data in tasks:
+            try:
+                periodic_retry_obj = retry_objs[data["task_id"]]
+            except KeyError:
+                logger.exception("PeriodicRetry improperly set or deleted when calling task.")
+                continue
+
+            if self._call_task(data, periodic_retry_obj):
+                self._save_called_task(periodic_retry_obj)
+
+        return len(tasks)
+
+    def _move_legacy_queue(self) -> None:
+        # tasks queued in the list used before the sorted set, run as soon as they are moved
+        while (task := self.storage.rpop(self.task_list)) is not None:
+            self.save_to_redis(json.loads(task))
 
     def call_all_tasks(self):
         logger.info(f"Executing tasks on {self.task_list} queue")
-        for _ in range(0, self.length):
-            self.call_next_task()
+        self._move_legacy_queue()
+        batch_size = settings.PERIODIC_RETRY_BATCH_SIZE
+        # tasks queued while these run wait for the next call
+        for _ in range(0, self.length, batch_size):
+            if not self.call_due_tasks(batch_size):
+                break
 
     def get_tasks_in_queue(self) -> list:
-        tasks_in_queue = self.storage.lrange(name=self.task_list, start=0, end=self.length)
-        return [json.loads(task) for task in tasks_in_queue]
+        return [json.loads(task) for task in self.storage.hvals(self.data_key)]
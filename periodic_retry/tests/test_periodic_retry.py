@@ -1,3 +1,4 @@
+import json
 import time
 from unittest.mock import patch
 
@@ -43,6 +44,13 @@ def support_test_retry_func(data):
     retry_obj.save(update_fields=["status", "results"])
 
 
+def support_test_callback_during_call_func(data):
+    # the Metis callback for the request being retried arrives before the call returns
+    PeriodicRetry.objects.filter(id=data["periodic_retry_obj"].id).update(
+        status=PeriodicRetryStatus.SUCCESSFUL, results=["callback results"]
+    )
+
+
 def mock_retry_task(task_list: str) -> None:
     periodic_retry_handler = PeriodicRetryHandler(task_list=task_list)
 
@@ -70,13 +78,11 @@ class TestPeriodicRetry(TestCase):
         self.time_now = arrow.utcnow().datetime
 
         # empty task list
-        for _ in range(self.handler.length):
-            self.handler.storage.rpop(self.test_task_list)
+        mock_redis.flushall()
 
     def tearDown(self) -> None:
         # empty task list
-        for _ in range(self.handler.length):
-            self.handler.storage.rpop(self.test_task_list)
+        mock_redis.flushall()
 
     @patch("periodic_retry.tasks.get_redis_connection")
     def test_retry_generic_function(self, mock_redis_connection):
@@ -247,3 +253,69 @@ class TestPeriodicRetry(TestCase):
 
         retry_metis_request_tasks()
         self.assertEqual(test_generic_func_call_count, 1)
+
+    @patch("periodic_retry.tasks.get_redis_connection")
+    def test_due_tasks_are_called_in_batches(self, mock_redis_connection):
+        mock_redis_connection.return_value = mock_redis
+        not_due = self.handler.new(
+            "periodic_retry.tests.test_periodic_retry",
+            "support_test_generic_func",
+            "some arg",
+            retry_kwargs={"next_retry_after": arrow.utcnow().shift(hours=1).datetime},
+        )
+        due = [
+            self.handler.new("periodic_retry.tests.test_periodic_retry", "support_test_generic_func", "some arg")
+            for _ in range(3)
+        ]
+
+        # one query loads each batch, one saves each task after it is called
+        with self.settings(PERIODIC_RETRY_BATCH_SIZE=2), self.assertNumQueries(5):
+            self.handler.call_all_tasks()
+
+        self.assertEqual(test_generic_func_call_count, 3)
+        self.assertEqual([task["task_id"] for task in self.handler.get_tasks_in_queue()], [not_due.id])
+        for retry_obj in due:
+            retry_obj.refresh_from_db()
+            self.assertEqual(retry_obj.retry_count, 1)
+            self.assertEqual(retry_obj.status, PeriodicRetryStatus.REQUIRED)
+
+    @patch("periodic_retry.tasks.get_redis_connection")
+    def test_status_set_by_callback_during_the_call_is_kept(self, mock_redis_connection):
+        mock_redis_connection.return_value = mock_redis
+        called_back = self.handler.new(
+            "periodic_retry.tests.test_periodic_retry", "support_test_callback_during_call_func"
+        )
+        other = self.handler.new("periodic_retry.tests.test_periodic_retry", "support_test_generic_func", "some arg")
+
+        self.handler.call_all_tasks()
+
+        called_back.refresh_from_db()
+        self.assertEqual(called_back.status, PeriodicRetryStatus.SUCCESSFUL)
+        self.assertEqual(called_back.results, ["callback results"])
+        self.assertEqual(called_back.retry_count, 1)
+        other.refresh_from_db()
+        self.assertEqual(other.status, PeriodicRetryStatus.REQUIRED)
+        self.assertEqual(other.retry_count, 1)
+
+    @patch("periodic_retry.tasks.get_redis_connection")
+    def test_tasks_queued_in_legacy_list_are_moved(self, mock_redis_connection):
+        mock_redis_connection.return_value = mock_redis
+        retry_obj = PeriodicRetry.objects.create(
+            task_group=RetryTaskList.DEFAULT,
+            module="periodic_retry.tests.test_periodic_retry",
+            function="support_test_generic_func",
+            status=PeriodicRetryStatus.PENDING,
+        )
+        task = {
+            "task_id": retry_obj.id,
+            "_module": retry_obj.module,
+            "_function": retry_obj.function,
+            "args": ["some arg"],
+            "kwargs": {},
+        }
+        mock_redis.lpush(self.test_task_list, json.dumps(task))
+
+        self.handler.call_all_tasks()
+
+        self.assertEqual(test_generic_func_call_count, 1)
+        self.assertFalse(mock_redis.exists(self.test_task_list))
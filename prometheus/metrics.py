@@ -2,7 +2,7 @@ from enum import Enum
 
 from django_prometheus.conf import NAMESPACE
 from django_prometheus.middleware import Metrics
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 
 def m(metric_name: str) -> str:
@@ -88,3 +88,39 @@ membership_card_status_change_counter = Counter(
     labelnames=("channel", "scheme", "status_change"),
     namespace=NAMESPACE,
 )
+
+outbound_request_latency_histogram = Histogram(
+    name="outbound_request_latency_seconds",
+    documentation="Latency of requests made to other services.",
+    labelnames=("service", "method", "status"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, float("inf")),
+    namespace=NAMESPACE,
+)
+
+api_cache_requests_counter = Counter(
+    name="api_cache_requests_total",
+    documentation="Total number of requests to cached API endpoints by cache outcome.",
+    labelnames=("key_slug", "outcome"),
+    namespace=NAMESPACE,
+)
+
+api_messaging_retries_counter = Counter(
+    name="api_messaging_retries_total",
+    documentation="Total number of Angelia message retries scheduled, redelivered or given up on.",
+    labelnames=("path", "outcome"),
+    namespace=NAMESPACE,
+)
+
+api_messaging_retry_delay_histogram = Histogram(
+    name="api_messaging_retry_delay_seconds",
+    documentation="Time between an Angelia message failing and it being redelivered.",
+    labelnames=("path",),
+    buckets=(0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 30.0, 60.0, float("inf")),
+    namespace=NAMESPACE,
+)
+
+replica_lag_gauge = Gauge(
+    name="replica_lag_seconds",
+    documentation="Time since the last transaction replayed on the replica database was committed on the primary.",
+    namespace=NAMESPACE,
+)
@@ -2,15 +2,24 @@ from django.conf import settings
 from django_prometheus.middleware import PrometheusAfterMiddleware, PrometheusBeforeMiddleware
 from django_prometheus.utils import TimeSince
 
+from hermes.channel_cache import get_bundle_ids
+from hermes.channels import Permit
 from prometheus.metrics import CustomMetrics
-from user.models import ClientApplicationBundle
+
+
+def _get_user_bundle_id(user):
+    # ubiquity authentication sets the channels_permit as the user
+    if isinstance(user, Permit):
+        return user.bundle_id or "none"
+
+    return get_bundle_ids().first_bundle_id_by_client.get(getattr(user, "client_id", None))
 
 
 def _get_bundle_id(request, response=None):
     if str(request.user) == "AnonymousUser":
         try:
             request_bundle = response.renderer_context["request"].data["bundle_id"]
-            if ClientApplicationBundle.objects.filter(bundle_id=request_bundle).exists():
+            if request_bundle in get_bundle_ids().bundle_ids:
                 # Bink 2.0 register/login.
                 channel_id = request_bundle
             else:
@@ -20,8 +29,8 @@ def _get_bundle_id(request, response=None):
             # service_api_token authentication is used for internal services.
             channel_id = settings.SERVICE_API_METRICS_BUNDLE
     elif not hasattr(response, "renderer_context"):
-        # handling of an exception, no channels_permit has been set, need to get the bundle_id from the db.
-        channel_id = request.user.client.clientapplicationbundle_set.values_list("bundle_id", flat=True).first()
+        # handling of an exception, no channels_permit has been set, the bundle_id is found from the user's client.
+        channel_id = _get_user_bundle_id(request.user)
     else:
         try:
             # collects the bundle_id from channels_permit
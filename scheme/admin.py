@@ -1,6 +1,7 @@
 from django.contrib import admin, messages
 from django.contrib.admin.actions import delete_selected
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Q
 from django.forms import BaseInlineFormSet, ModelForm
 from django.http import HttpResponseRedirect
@@ -35,15 +36,52 @@ from scheme.models import (
     UserConsent,
     VoucherScheme,
 )
-from scheme.tasks import delete_membership_plans_cache
-from ubiquity.models import AccountLinkStatus, SchemeAccountEntry
+from scheme.tasks import delete_membership_plans_cache, invalidate_membership_plans_cache
+from ubiquity.models import AccountLinkStatus, MembershipPlanDocument, SchemeAccountEntry
 from user.models import ClientApplicationBundle
 
 
+def membership_plan_cache_scope(objs) -> tuple[list[int], list[str]] | None:
+    """
+    Schemes and bundles whose cached membership plans are affected by a change to these objects, or None when that
+    can't be narrowed down. This includes every bundle a changed scheme is in, as their plan lists show it, so it
+    must be worked out before a scheme is deleted.
+    """
+    scheme_ids, bundle_ids = [], []
+    for obj in objs:
+        if isinstance(obj, Scheme):
+            scheme_ids.append(obj.pk)
+        elif isinstance(obj, ClientApplicationBundle):
+            bundle_ids.append(obj.bundle_id)
+        elif isinstance(obj, SchemeBundleAssociation):
+            bundle_ids.append(obj.bundle.bundle_id)
+        elif isinstance(obj, SchemeImage | ThirdPartyConsentLink | MembershipPlanDocument):
+            scheme_ids.append(obj.scheme_id)
+        else:
+            return None
+
+    if scheme_ids:
+        bundle_ids += SchemeBundleAssociation.objects.filter(scheme_id__in=scheme_ids).values_list(
+            "bundle__bundle_id", flat=True
+        )
+
+    return scheme_ids, bundle_ids
+
+
+def reset_membership_plans_cache(scope: tuple[list[int], list[str]] | None) -> None:
+    # wait for the change to be committed, or a request in between could cache the old data under the new generation
+    if scope is None:
+        transaction.on_commit(delete_membership_plans_cache.delay)
+    else:
+        scheme_ids, bundle_ids = scope
+        transaction.on_commit(lambda: invalidate_membership_plans_cache.delay(scheme_ids, bundle_ids))
+
+
 def replaced_delete_selected(model_admin, request, queryset):
     if request.POST.get("post") == "yes":
+        scope = membership_plan_cache_scope(queryset)
         ret = delete_selected(model_admin, request, queryset)
-        delete_membership_plans_cache.delay()
+        reset_membership_plans_cache(scope)
         return ret  # (v2.2) returns a overrideable template (delete_selected_confirmation_template) with context
     else:
         return delete_selected(model_admin, request, queryset)
@@ -78,14 +116,18 @@ class CacheResetAdmin(admin.ModelAdmin):
             del actions["delete_selected"]
         return actions
 
+    def get_cache_scope(self, obj, form):
+        return membership_plan_cache_scope([obj])
+
     def save_model(self, request, obj, form, change):
         resp = super().save_model(request, obj, form, change)
-        delete_membership_plans_cache.delay()
+        reset_membership_plans_cache(self.get_cache_scope(obj, form))
         return resp  # currently resp is None but in case it ever changes
 
     def delete_model(self, request, obj):
+        scope = membership_plan_cache_scope([obj])
         resp = super().delete_model(request, obj)
-        delete_membership_plans_cache.delay()
+        reset_membership_plans_cache(scope)
         return resp  # currently resp is None but in case it ever changes
 
 
@@ -692,6 +734,15 @@ class SchemeBundleAssociationAdmin(CacheResetAdmin):
     raw_id_fields = ("scheme",)
     list_filter = ("bundle", "scheme", "status", "test_scheme")
 
+    def get_cache_scope(self, obj, form):
+        scheme_ids, bundle_ids = super().get_cache_scope(obj, form)
+        # the plan lists of a bundle the association was moved away from no longer show its scheme
+        previous_bundle = form.initial.get("bundle")
+        if previous_bundle and previous_bundle != obj.bundle_id:
+            bundle_ids += ClientApplicationBundle.objects.filter(pk=previous_bundle).values_list("bundle_id", flat=True)
+
+        return scheme_ids, bundle_ids
+
     def save_form(self, request, form, change):
         ret = super().save_form(request, form, change)
         clean_item = form.cleaned_data
@@ -0,0 +1,104 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import requests
+from django.conf import settings
+
+from hermes.http_client import midas
+from scheme.models import SchemeAccount
+from ubiquity.models import AccountLinkStatus, SchemeAccountEntry
+
+logger = logging.getLogger(__name__)
+
+
+class BalanceRequest(NamedTuple):
+    scheme_account_entry: SchemeAccountEntry
+    url: str
+    request_kwargs: dict
+
+
+def _prepare_balance_requests(
+    scheme_account_entries: list[SchemeAccountEntry], x_azure_ref: str | None
+) -> list[BalanceRequest]:
+    balance_requests = []
+    SchemeAccountEntry.prefetch_credentials(scheme_account_entries)
+    for entry in scheme_account_entries:
+        if entry.link_status in AccountLinkStatus.join_exclude_balance_statuses() or not (
+            credentials := entry.credentials()
+        ):
+            continue
+
+        scheme_account = entry.scheme_account
+        journey = scheme_account.get_journey_type(entry.authorised)
+        url, request_kwargs = scheme_account.get_balance_request_args(credentials, journey, entry, x_azure_ref)
+        balance_requests.append(BalanceRequest(entry, url, request_kwargs))
+
+    return balance_requests
+
+
+def _send_balance_requests(balance_requests: list[BalanceRequest]) -> list["requests.Response | Exception"]:
+    scheme_limits = {
+        balance_request.scheme_account_entry.scheme_account.scheme_id: threading.BoundedSemaphore(
+            settings.BALANCE_REFRESH_PER_SCHEME_LIMIT
+        )
+        for balance_request in balance_requests
+    }
+
+    def send(balance_request: BalanceRequest) -> "requests.Response | Exception":
+        with scheme_limits[balance_request.scheme_account_entry.scheme_account.scheme_id]:
+            try:
+                return midas.get(balance_request.url, **balance_request.request_kwargs)
+            except requests.exceptions.RequestException as e:
+                return e
+
+    max_workers = min(settings.BALANCE_REFRESH_MAX_WORKERS, len(balance_requests))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="balance-refresh") as executor:
+        return list(executor.map(send, balance_requests))
+
+
+def _apply_balance_response(
+    scheme_account_entry: SchemeAccountEntry, result: "requests.Response | Exception"
+) -> list[str]:
+    scheme_account = scheme_account_entry.scheme_account
+    old_status = scheme_account_entry.link_status
+    if isinstance(result, requests.exceptions.ConnectionError | requests.exceptions.Timeout):
+        balance, account_status = None, AccountLinkStatus.MIDAS_UNREACHABLE
+    elif isinstance(result, Exception):
+        raise result
+    else:
+        balance, account_status, _ = scheme_account.handle_midas_balance_response(result, scheme_account_entry)
+
+    _, update_fields = scheme_account.apply_balance(scheme_account_entry, balance, account_status, old_status)
+    return update_fields
+
+
+def refresh_wallet_balances(scheme_account_entries: list[SchemeAccountEntry], headers: dict | None = None) -> None:
+    """
+    Refreshes the balance of every entry from Midas in one go. Credentials are resolved up front, the Midas calls are
+    made concurrently over a pooled session with at most BALANCE_REFRESH_PER_SCHEME_LIMIT calls in flight per scheme,
+    and the new balances are written with a single bulk update. Entries are expected to come with their scheme account,
+    scheme and user selected.
+    """
+    balance_requests = _prepare_balance_requests(
+        scheme_account_entries, headers.get("X-azure-ref", None) if headers else None
+    )
+    if not balance_requests:
+        return
+
+    updated_scheme_accounts = {}
+    for balance_request, result in zip(balance_requests, _send_balance_requests(balance_requests), strict=True):
+        entry = balance_request.scheme_account_entry
+        try:
+            update_fields = _apply_balance_response(entry, result)
+        except Exception:
+            # A failure for one merchant should not prevent the rest of the wallet from being refreshed
+            logger.exception(f"Failed to refresh balance for SchemeAccountEntry (id={entry.id})")
+            continue
+
+        if update_fields:
+            updated_scheme_accounts[entry.scheme_account_id] = entry.scheme_account
+
+    if updated_scheme_accounts:
+        SchemeAccount.all_objects.bulk_update(list(updated_scheme_accounts.values()), ["balances", "vouchers"])
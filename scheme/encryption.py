@@ -1,5 +1,6 @@
 import base64
 import hashlib
+from functools import lru_cache
 
 from Crypto import Random
 from Crypto.Cipher import AES
@@ -9,11 +10,16 @@ from ubiquity.channel_vault import get_aes_key
 # TODO : this should become its own library
 
 
+@lru_cache(maxsize=8)
+def _derive_key(key: str) -> bytes:
+    # keyed on the key itself rather than its name so a rotated key is derived again
+    return hashlib.sha256(key.encode()).digest()
+
+
 class AESCipher:
     def __init__(self, aes_type):
         self.bs = 32
-        _key = get_aes_key(aes_type).encode()
-        self.key = hashlib.sha256(_key).digest()
+        self.key = _derive_key(get_aes_key(aes_type))
 
     def encrypt(self, raw):
         if raw == "":
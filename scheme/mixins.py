@@ -3,7 +3,6 @@ import logging
 import typing as t
 import uuid
 
-import requests
 import sentry_sdk
 from django.conf import settings
 from django.db import transaction
@@ -13,6 +12,7 @@ from rest_framework.exceptions import ValidationError
 
 from api_messaging.midas_messaging import send_midas_join_request
 from hermes.channels import Permit
+from hermes.http_client import hecate
 from history.tasks import add_auth_outcome_task, auth_outcome_task
 from payment_card.payment import Payment, PaymentError
 from scheme.credentials import (
@@ -117,7 +117,7 @@ class IdentifyCardMixin:
     def _get_scheme(base_64_image: str) -> dict:
         data = {"uuid": str(uuid.uuid4()), "base64img": base_64_image}
         headers = {"Content-Type": "application/json"}
-        resp = requests.post(settings.HECATE_URL + "/classify", json=data, headers=headers)
+        resp = hecate.post(settings.HECATE_URL + "/classify", json=data, headers=headers)
         return resp.json()
 
 
@@ -26,6 +26,7 @@ from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from common.models import Image
+from hermes.http_client import midas
 from prometheus.utils import capture_membership_card_status_change_metric
 from scheme import vouchers
 from scheme.credentials import BARCODE, CARD_NUMBER, CREDENTIAL_TYPES, ENCRYPTED_CREDENTIALS
@@ -602,7 +603,11 @@ class SchemeAccount(models.Model):
     originating_journey = models.IntegerField(choices=JOURNEYS, default=JourneyTypes.UNKNOWN)
 
     def collect_pending_consents(self):
-        user_consents = self.userconsent_set.filter(status=ConsentStatus.PENDING).values()
+        if hasattr(self, "prefetched_pending_consents"):
+            user_consents = [consent.__dict__ for consent in self.prefetched_pending_consents]
+        else:
+            user_consents = self.userconsent_set.filter(status=ConsentStatus.PENDING).values()
+
         return self.format_user_consents(user_consents)
 
     @staticmethod
@@ -690,13 +695,19 @@ class SchemeAccount(models.Model):
             response = self._get_balance_request(
                 credentials, journey, scheme_account_entry, headers.get("X-azure-ref", None) if headers else None
             )
-            points, account_status, dw_event = self._process_midas_response(response, scheme_account_entry)
-            self._received_balance_checks(scheme_account_entry)
-        except requests.exceptions.ConnectionError:
+            points, account_status, dw_event = self.handle_midas_balance_response(response, scheme_account_entry)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
             account_status = AccountLinkStatus.MIDAS_UNREACHABLE
 
         return points, account_status, dw_event
 
+    def handle_midas_balance_response(
+        self, response, scheme_account_entry: SchemeAccountEntry
+    ) -> tuple[dict | None, AccountLinkStatus, tuple[bool, AccountLinkStatus] | None]:
+        points, account_status, dw_event = self._process_midas_response(response, scheme_account_entry)
+        self._received_balance_checks(scheme_account_entry)
+        return points, account_status, dw_event
+
     def _received_balance_checks(self, scheme_account_entry):
         saved = False
         if scheme_account_entry.link_status in AccountLinkStatus.join_action_required():
@@ -710,6 +721,12 @@ class SchemeAccount(models.Model):
         return saved
 
     def _get_balance_request(self, credentials, journey, scheme_account_entry, x_azure_ref: str | None = None):
+        url, request_kwargs = self.get_balance_request_args(credentials, journey, scheme_account_entry, x_azure_ref)
+        return midas.get(url, **request_kwargs)
+
+    def get_balance_request_args(
+        self, credentials, journey, scheme_account_entry, x_azure_ref: str | None = None
+    ) -> tuple[str, dict]:
         # todo: liaise with Midas to work out what we need to see here
         user_set = ",".join([str(u.id) for u in self.user_set.all()])
         parameters = {
@@ -726,8 +743,7 @@ class SchemeAccount(models.Model):
             "User-agent": f"Hermes on {socket.gethostname()}",
             "X-azure-ref": x_azure_ref,
         }
-        response = requests.get(midas_balance_uri, params=parameters, headers=headers)
-        return response
+        return midas_balance_uri, {"params": parameters, "headers": headers}
 
     def get_journey_type(self, is_scheme_account_entry_authorised: bool):
         if is_scheme_account_entry_authorised:
@@ -765,6 +781,23 @@ class SchemeAccount(models.Model):
             headers=headers,
         )
 
+        balance, update_fields = self.apply_balance(scheme_account_entry, balance, account_status, old_status)
+        if update_fields:
+            self.save(update_fields=update_fields)
+
+        return balance, dw_event
+
+    def apply_balance(
+        self,
+        scheme_account_entry: SchemeAccountEntry,
+        balance: dict | None,
+        account_status: AccountLinkStatus,
+        old_status: AccountLinkStatus,
+    ) -> tuple[list[dict] | None, list[str]]:
+        """
+        Sets the balance and vouchers returned by Midas on this instance and saves any link status change. The caller
+        is responsible for saving the returned update fields, which allows them to be saved in bulk.
+        """
         voucher_resp = None
         if balance:
             if "vouchers" in balance:
@@ -790,10 +823,7 @@ class SchemeAccount(models.Model):
                 scheme_account_entry.link_status,
             )
 
-        if update_fields:
-            self.save(update_fields=update_fields)
-
-        return balance, dw_event
+        return balance, update_fields
 
     def make_vouchers_response(self, vouchers: list) -> list:
         """
@@ -0,0 +1,67 @@
+"""
+Generation numbers used to invalidate the membership plan caches.
+
+Rather than deleting cached plans, every cache key embeds the generation numbers of what it was built from: one
+covering all plans, one per bundle and one per scheme. Bumping a generation makes only the entries built from it
+unreachable and they are left to expire.
+"""
+
+import logging
+from collections.abc import Iterable
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from hermes.redis import r_read, r_write
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY_PREFIX = f"{settings.REDIS_MPLANS_CACHE_PREFIX}_generation"
+ALL_PLANS_GENERATION_KEY = f"{GENERATION_KEY_PREFIX}:all"
+
+
+def bundle_generation_key(bundle_id: str) -> str:
+    return f"{GENERATION_KEY_PREFIX}:bundle:{bundle_id}"
+
+
+def scheme_generation_key(scheme_id: int | str) -> str:
+    return f"{GENERATION_KEY_PREFIX}:scheme:{scheme_id}"
+
+
+def get_generations(keys: list[str]) -> list[int]:
+    """Raises RedisError when the generations can't be read, as a cache key can't be trusted without them."""
+    return [int(generation) if generation else 0 for generation in r_read.mget(keys)]
+
+
+def plan_list_generation(bundle_id: str) -> str:
+    return ".".join(map(str, get_generations([ALL_PLANS_GENERATION_KEY, bundle_generation_key(bundle_id)])))
+
+
+def plan_generation(bundle_id: str, scheme_id: int | str) -> str:
+    return ".".join(
+        map(
+            str,
+            get_generations(
+                [ALL_PLANS_GENERATION_KEY, bundle_generation_key(bundle_id), scheme_generation_key(scheme_id)]
+            ),
+        )
+    )
+
+
+def bump_generations(scheme_ids: Iterable[int] = (), bundle_ids: Iterable[str] = (), all_plans: bool = False) -> None:
+    keys = [scheme_generation_key(scheme_id) for scheme_id in set(scheme_ids)]
+    keys += [bundle_generation_key(bundle_id) for bundle_id in set(bundle_ids)]
+    if all_plans:
+        keys.append(ALL_PLANS_GENERATION_KEY)
+
+    if not keys:
+        return
+
+    try:
+        pipe = r_write.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        pipe.execute()
+    except RedisError:
+        logger.exception(f"Failed to bump membership plan cache generations {keys}")
+        raise
@@ -1,8 +1,11 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from scheme.models import SchemeAccountEntry
+from hermes.channel_cache import invalidate_channel_config
+from scheme.models import SchemeAccountEntry, SchemeBundleAssociation
 from ubiquity.models import PllUserAssociation
+from user.models import ClientApplication, ClientApplicationBundle, Organisation
 
 
 @receiver(post_save, sender=SchemeAccountEntry)
@@ -16,3 +19,17 @@ def update_pll_active_link(sender, instance, created, update_fields=None, **kwar
         # todo: PLL stuff - delete next line when happy with solution
         # PaymentCardSchemeEntry.update_active_link_status({"scheme_account": instance})
         PllUserAssociation.update_user_pll_by_scheme_account(scheme_account=instance.scheme_account)
+
+
+@receiver(post_save, sender=Organisation)
+@receiver(post_save, sender=ClientApplication)
+@receiver(post_save, sender=ClientApplicationBundle)
+@receiver(post_save, sender=SchemeBundleAssociation)
+@receiver(post_delete, sender=Organisation)
+@receiver(post_delete, sender=ClientApplication)
+@receiver(post_delete, sender=ClientApplicationBundle)
+@receiver(post_delete, sender=SchemeBundleAssociation)
+def channel_config_changed(sender, **kwargs):
+    # Permit caches bundles and scheme statuses per process, see hermes.channel_cache. Other processes reload them
+    # when the version moves on, which must wait for the change to be committed or they would cache the old rows
+    transaction.on_commit(invalidate_channel_config)
@@ -1,25 +1,16 @@
-import logging
-
 from celery import shared_task
-from django.conf import settings
-
-from hermes import redis
 
-redis_client = redis.r_write
+from scheme.plan_cache import bump_generations
 
-logger = logging.getLogger(__name__)
 
-MPLANS_CACHE_DELETE_BATCH_SIZE = 20
+@shared_task
+def invalidate_membership_plans_cache(scheme_ids: list[int] | None = None, bundle_ids: list[str] | None = None) -> None:
+    # Only entries built from these schemes or bundles are invalidated, the plan lists of the bundles a scheme is in
+    # have to be passed in as bundle_ids
+    bump_generations(scheme_ids=scheme_ids or (), bundle_ids=bundle_ids or ())
 
 
 @shared_task
 def delete_membership_plans_cache() -> None:
-    # Delete all caches for m_plan key slug including all by id ones
-    try:
-        pipe = redis_client.pipeline()
-        for keys in redis_client.scan_iter(f"{settings.REDIS_MPLANS_CACHE_PREFIX}:*", MPLANS_CACHE_DELETE_BATCH_SIZE):
-            pipe.delete(keys)
-        pipe.execute()
-    except Exception as ex:
-        logger.exception("Failed to delete membership plans cache", exc_info=ex)
-        raise ex
+    # Invalidates every cached plan, for changes that can't be narrowed down to some schemes or bundles
+    bump_generations(all_plans=True)
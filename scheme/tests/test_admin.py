@@ -1,12 +1,17 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import arrow
+from django.contrib import admin
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 
-from scheme.admin import CredentialQuestionFormset
+from scheme.admin import CredentialQuestionFormset, SchemeBundleAssociationAdmin
 from scheme.forms import SchemeForm
-from scheme.tests.factories import CategoryFactory, SchemeFactory
+from scheme.models import SchemeBundleAssociation
+from scheme.tests.factories import CategoryFactory, SchemeBundleAssociationFactory, SchemeFactory
+from user.admin import ClientApplicationBundleAdmin
+from user.models import ClientApplicationBundle
+from user.tests.factories import ClientApplicationBundleFactory
 
 
 class MockCredentialQuestionFormset(MagicMock):
@@ -89,3 +94,40 @@ class TestSchemeValidation(TestCase):
             form.errors["point_name"][0],
             "The length of the point name added to the maximum points value " "length must not exceed 10",
         )
+
+
+class TestMembershipPlanCacheScope(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.scheme = SchemeFactory()
+        cls.bundle = ClientApplicationBundleFactory(bundle_id="com.test.bundle")
+        cls.other_bundle = ClientApplicationBundleFactory(bundle_id="com.test.other")
+        cls.association = SchemeBundleAssociationFactory(scheme=cls.scheme, bundle=cls.bundle)
+        SchemeBundleAssociationFactory(scheme=cls.scheme, bundle=cls.other_bundle)
+
+    def test_moving_an_association_resets_both_bundles(self):
+        model_admin = SchemeBundleAssociationAdmin(SchemeBundleAssociation, admin.site)
+        moved_bundle = ClientApplicationBundleFactory(bundle_id="com.test.moved")
+        self.association.bundle = moved_bundle
+        form = MagicMock(initial={"bundle": self.bundle.pk})
+
+        scheme_ids, bundle_ids = model_admin.get_cache_scope(self.association, form)
+
+        self.assertEqual(scheme_ids, [])
+        self.assertCountEqual(bundle_ids, ["com.test.moved", "com.test.bundle"])
+
+    @patch("user.admin.messages")
+    @patch("user.admin.reset_membership_plans_cache")
+    def test_reverted_scheme_status_resets_every_bundle_of_the_scheme(self, mock_reset, _):
+        model_admin = ClientApplicationBundleAdmin(ClientApplicationBundle, admin.site)
+        model_admin.current_bundle_status = {}
+        formset = MagicMock(
+            cleaned_data=[{"scheme": self.scheme, "status": SchemeBundleAssociation.ACTIVE, "DELETE": False}]
+        )
+
+        # the scheme has no manual question so can't be made active
+        model_admin.save_formset(MagicMock(), MagicMock(), formset, True)
+
+        scheme_ids, bundle_ids = mock_reset.call_args.args[0]
+        self.assertEqual(scheme_ids, [self.scheme.id])
+        self.assertCountEqual(bundle_ids, ["com.test.bundle", "com.test.other"])
@@ -0,0 +1,93 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.test import override_settings
+
+from history.utils import GlobalMockAPITestCase
+from scheme.balance import refresh_wallet_balances
+from scheme.tests.factories import SchemeAccountFactory, SchemeBalanceDetailsFactory, SchemeFactory
+from ubiquity.models import AccountLinkStatus, SchemeAccountEntry
+from ubiquity.tests.factories import SchemeAccountEntryFactory
+from user.tests.factories import UserFactory
+
+
+def midas_response(points: int) -> MagicMock:
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"points": points, "value": None, "pending": False}
+    return response
+
+
+@patch.object(SchemeAccountEntry, "credentials", return_value={"card_number": "1234"})
+class TestRefreshWalletBalances(GlobalMockAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory(external_id="balance@testbink.com", email="balance@testbink.com")
+        cls.scheme = SchemeFactory()
+        SchemeBalanceDetailsFactory(scheme_id=cls.scheme, currency="Points")
+        cls.unreachable_scheme = SchemeFactory()
+        cls.entries = [
+            SchemeAccountEntryFactory(
+                user=cls.user,
+                scheme_account=SchemeAccountFactory(scheme=cls.scheme),
+                link_status=AccountLinkStatus.ACTIVE,
+            )
+            for _ in range(3)
+        ]
+        cls.unreachable_entry = SchemeAccountEntryFactory(
+            user=cls.user,
+            scheme_account=SchemeAccountFactory(scheme=cls.unreachable_scheme),
+            link_status=AccountLinkStatus.ACTIVE,
+        )
+
+    def _wallet_entries(self):
+        return list(
+            SchemeAccountEntry.objects.select_related("scheme_account__scheme", "user")
+            .prefetch_related("scheme_account__user_set")
+            .filter(user=self.user)
+        )
+
+    @patch("scheme.balance.midas")
+    def test_refresh_wallet_balances(self, mock_session, _):
+        unreachable_slug = self.unreachable_scheme.slug
+
+        def midas_get(url, **kwargs):
+            if f"/{unreachable_slug}/" in url:
+                raise requests.exceptions.ConnectionError
+            return midas_response(points=kwargs["params"]["scheme_account_id"])
+
+        mock_session.get.side_effect = midas_get
+
+        refresh_wallet_balances(self._wallet_entries())
+
+        self.assertEqual(mock_session.get.call_count, 4)
+        for entry in self.entries:
+            entry.scheme_account.refresh_from_db()
+            self.assertEqual(entry.scheme_account.balances[0]["value"], entry.scheme_account_id)
+
+        self.unreachable_entry.refresh_from_db()
+        self.assertEqual(self.unreachable_entry.link_status, AccountLinkStatus.MIDAS_UNREACHABLE)
+
+    @override_settings(BALANCE_REFRESH_PER_SCHEME_LIMIT=1)
+    @patch("scheme.balance.midas")
+    def test_refresh_wallet_balances_per_scheme_limit(self, mock_session, _):
+        lock = threading.Lock()
+        in_flight = {}
+        max_in_flight = {}
+
+        def midas_get(url, **kwargs):
+            with lock:
+                in_flight[url] = in_flight.get(url, 0) + 1
+                max_in_flight[url] = max(max_in_flight.get(url, 0), in_flight[url])
+            time.sleep(0.05)
+            with lock:
+                in_flight[url] -= 1
+            return midas_response(points=1)
+
+        mock_session.get.side_effect = midas_get
+        refresh_wallet_balances(self._wallet_entries())
+
+        self.assertEqual(mock_session.get.call_count, 4)
+        self.assertEqual(set(max_in_flight.values()), {1})
@@ -1,5 +1,5 @@
 from history.utils import GlobalMockAPITestCase
-from scheme.encryption import AESCipher
+from scheme.encryption import AESCipher, _derive_key
 from ubiquity.channel_vault import AESKeyNames
 
 
@@ -33,3 +33,10 @@ class TestEncryption(GlobalMockAPITestCase):
         encrypted_string = ""
         with self.assertRaises(TypeError):
             cipher.decrypt(encrypted_string)
+
+    def test_key_is_derived_once(self):
+        _derive_key.cache_clear()
+        for _ in range(3):
+            AESCipher(AESKeyNames.LOCAL_AES_KEY)
+
+        self.assertEqual(_derive_key.cache_info().misses, 1)
@@ -5,6 +5,8 @@ from unittest.mock import MagicMock, patch
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from requests.exceptions import ConnectionError as RequestConnectionError
 from rest_framework.utils.serializer_helpers import ReturnDict
@@ -49,6 +51,7 @@ from scheme.tests.factories import (
     SchemeImageFactory,
     UserConsentFactory,
 )
+from scheme.views import Pagination, SchemeAccountIdPagination
 from ubiquity.channel_vault import AESKeyNames
 from ubiquity.models import AccountLinkStatus, PaymentCardSchemeEntry, SchemeAccountEntry
 from ubiquity.tasks import async_join_journey_fetch_balance_and_update_status
@@ -151,7 +154,7 @@ class TestSchemeAccountViews(GlobalMockAPITestCase):
 
         cls.scheme1_balance_details = SchemeBalanceDetailsFactory(scheme_id=cls.scheme1)
 
-    @patch("scheme.models.requests.get")
+    @patch("scheme.models.midas.get")
     def test_analytics_when_balance_returns_configuration_error(self, mock_requests_get):
         class BalanceResponse:
             def __init__(self, status_code):
@@ -626,6 +629,51 @@ class TestSchemeAccountViews(GlobalMockAPITestCase):
         self.assertIn(scheme.id, scheme_ids)
         self.assertNotIn(scheme_2.id, scheme_ids)
 
+    @patch.object(SchemeAccountIdPagination, "page_size", 2)
+    def test_system_retry_scheme_accounts_pages_by_id(self):
+        scheme_accounts = [SchemeAccountFactory() for _ in range(3)]
+        for scheme_account in scheme_accounts:
+            SchemeAccountEntryFactory(link_status=AccountLinkStatus.RETRY_LIMIT_REACHED, scheme_account=scheme_account)
+        # a second wallet holding the same account doesn't list it twice, and deleted accounts are left out
+        SchemeAccountEntryFactory(link_status=AccountLinkStatus.END_SITE_DOWN, scheme_account=scheme_accounts[0])
+        SchemeAccountEntryFactory(
+            link_status=AccountLinkStatus.END_SITE_DOWN, scheme_account=SchemeAccountFactory(is_deleted=True)
+        )
+
+        scheme_ids = []
+        url = "/schemes/accounts/system_retry/cursor"
+        while url:
+            with CaptureQueriesContext(connection) as page_queries:
+                response = self.client.get(url, **self.auth_service_headers)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any("OFFSET" in query["sql"] for query in page_queries))
+            scheme_ids += [result["id"] for result in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(scheme_ids, sorted(scheme_account.id for scheme_account in scheme_accounts))
+
+    @patch.object(Pagination, "page_size", 2)
+    def test_system_retry_scheme_accounts_pages_by_number(self):
+        scheme_accounts = [SchemeAccountFactory() for _ in range(3)]
+        for scheme_account in scheme_accounts:
+            SchemeAccountEntryFactory(link_status=AccountLinkStatus.RETRY_LIMIT_REACHED, scheme_account=scheme_account)
+        # as before the cursor paths were added, an account is listed for each wallet and deleted accounts are kept
+        SchemeAccountEntryFactory(link_status=AccountLinkStatus.END_SITE_DOWN, scheme_account=scheme_accounts[0])
+        deleted_scheme_account = SchemeAccountFactory(is_deleted=True)
+        SchemeAccountEntryFactory(link_status=AccountLinkStatus.END_SITE_DOWN, scheme_account=deleted_scheme_account)
+
+        scheme_ids = []
+        for page in (1, 2, 3):
+            response = self.client.get(f"/schemes/accounts/system_retry?page={page}", **self.auth_service_headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["count"], 5)
+            scheme_ids += [result["id"] for result in response.data["results"]]
+
+        self.assertIsNone(response.data["next"])
+        expected = [*scheme_accounts, scheme_accounts[0], deleted_scheme_account]
+        self.assertEqual(scheme_ids, [scheme_account.id for scheme_account in expected])
+
     def test_get_scheme_accounts_credentials(self):
         response = self.client.get(
             f"/schemes/accounts/{self.scheme_account.id}/credentials?bink_user_id={self.user.id}",
@@ -675,6 +723,19 @@ class TestSchemeAccountViews(GlobalMockAPITestCase):
             },
         )
 
+    def test_scheme_account_collect_prefetched_credentials(self):
+        expected = {
+            entry.id: entry._collect_credential_answers()
+            for entry in (self.scheme_account_entry, self.scheme_account_entry1)
+        }
+
+        entries = list(SchemeAccountEntry.objects.filter(id__in=expected))
+        with self.assertNumQueries(5):
+            SchemeAccountEntry.prefetch_credentials(entries)
+
+        with self.assertNumQueries(0):
+            self.assertEqual({entry.id: entry._collect_credential_answers() for entry in entries}, expected)
+
     def test_scheme_account_collect_pending_consents(self):
         consents = self.scheme_account.collect_pending_consents()
 
@@ -1060,7 +1121,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertIsNone(points)
         self.assertTrue(mock_credentials.called)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance(self, mock_request):
         mock_request.return_value.status_code = 200
         mock_request.return_value.json.return_value = {"points": 500}
@@ -1072,7 +1133,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(points[0]["value"], 500)
         self.assertEqual(entry.link_status, AccountLinkStatus.ACTIVE)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_dw_event(self, mock_request):
         mock_request.return_value.status_code = 200
         mock_request.return_value.json.return_value = {"points": 500}
@@ -1087,7 +1148,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(points[0]["value"], 500)
         self.assertEqual(entry.link_status, AccountLinkStatus.ACTIVE)
 
-    @patch("requests.get", autospec=True, side_effect=RequestConnectionError)
+    @patch("hermes.http_client.midas.get", autospec=True, side_effect=RequestConnectionError)
     def test_get_balance_connection_error(self, mock_request):
         entry = SchemeAccountEntryFactory()
         scheme_account = entry.scheme_account
@@ -1098,7 +1159,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertTrue(mock_request.called)
         self.assertEqual(entry.link_status, AccountLinkStatus.MIDAS_UNREACHABLE)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_invalid_status(self, mock_request):
         invalid_status = 502
         mock_request.return_value.status_code = invalid_status
@@ -1118,7 +1179,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertTrue(mock_request.called)
         self.assertEqual(scheme_account_entry.link_status, AccountLinkStatus.UNKNOWN_ERROR)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_link_limit_exceeded(self, mock_request):
         test_status = AccountLinkStatus.LINK_LIMIT_EXCEEDED
         mock_request.return_value.status_code = test_status
@@ -1134,7 +1195,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(scheme_account_entry.link_status, test_status)
         self.assertEqual(scheme_account_entry.display_status, AccountLinkStatus.WALLET_ONLY)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_card_not_registered(self, mock_request):
         test_status = AccountLinkStatus.CARD_NOT_REGISTERED
         mock_request.return_value.status_code = test_status
@@ -1150,7 +1211,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(scheme_account_entry.link_status, test_status)
         self.assertEqual(scheme_account_entry.display_status, AccountLinkStatus.JOIN)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_card_number_error(self, mock_request):
         test_status = AccountLinkStatus.CARD_NUMBER_ERROR
         mock_request.return_value.status_code = test_status
@@ -1166,7 +1227,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(scheme_account_entry.link_status, test_status)
         self.assertEqual(scheme_account_entry.display_status, AccountLinkStatus.WALLET_ONLY)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_general_error(self, mock_request):
         test_status = AccountLinkStatus.GENERAL_ERROR
         mock_request.return_value.status_code = test_status
@@ -1182,7 +1243,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(scheme_account_entry.link_status, test_status)
         self.assertEqual(scheme_account_entry.display_status, AccountLinkStatus.WALLET_ONLY)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_join_error(self, mock_request):
         test_status = AccountLinkStatus.JOIN_ERROR
         mock_request.return_value.status_code = test_status
@@ -1203,7 +1264,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(scheme_account_entry.link_status, AccountLinkStatus.JOIN_ERROR)
         self.assertEqual(scheme_account_entry.display_status, AccountLinkStatus.WALLET_ONLY)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_join_in_progress(self, mock_request):
         test_status = AccountLinkStatus.JOIN_IN_PROGRESS
         mock_request.return_value.status_code = test_status
@@ -1219,7 +1280,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(scheme_account_entry.link_status, test_status)
         self.assertEqual(scheme_account_entry.display_status, AccountLinkStatus.WALLET_ONLY)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_ignore_get_balance_500_error(self, mock_request):
         test_status = AccountLinkStatus.TRIPPED_CAPTCHA
         mock_request.return_value.status_code = test_status
@@ -1232,7 +1293,7 @@ class TestSchemeAccountModel(GlobalMockAPITestCase):
         self.assertEqual(scheme_account_entry.link_status, AccountLinkStatus.ACTIVE)
         self.assertEqual(scheme_account_entry.display_status, AccountLinkStatus.ACTIVE)
 
-    @patch("requests.get", autospec=True, return_value=MagicMock())
+    @patch("hermes.http_client.midas.get", autospec=True, return_value=MagicMock())
     def test_get_balance_500_error_preserve_scheme_account_error_status(self, mock_request):
         test_status = AccountLinkStatus.RESOURCE_LIMIT_REACHED
         mock_request.return_value.status_code = test_status
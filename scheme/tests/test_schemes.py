@@ -261,7 +261,7 @@ class TestSchemeViews(GlobalMockAPITestCase):
         self.assertIn("file", json[0])
         self.assertIn("scheme_id", json[0])
 
-    @patch("scheme.mixins.requests.post")
+    @patch("scheme.mixins.hecate.post")
     def test_identify_image(self, mock_post):
         scheme = SchemeFactory()
         SchemeImageFactory(scheme=scheme, image_type_code=5)
@@ -1,21 +1,37 @@
 from unittest.mock import patch
 
 import fakeredis
-from django.conf import settings
 from django.test.testcases import TestCase
 
-from scheme.tasks import delete_membership_plans_cache
+from scheme.plan_cache import ALL_PLANS_GENERATION_KEY, bundle_generation_key, plan_generation, plan_list_generation
+from scheme.tasks import delete_membership_plans_cache, invalidate_membership_plans_cache
 
 server = fakeredis.FakeServer()
 mock_redis = fakeredis.FakeStrictRedis(server=server)
 
 
+@patch("scheme.plan_cache.r_read", mock_redis)
+@patch("scheme.plan_cache.r_write", mock_redis)
 class TestCache(TestCase):
-    @patch("scheme.tasks.redis_client", mock_redis)
+    def setUp(self) -> None:
+        mock_redis.flushall()
+
     def test_delete_mplans_cache(self) -> None:
-        for i in range(50):
-            mock_redis.set(f"{settings.REDIS_MPLANS_CACHE_PREFIX}:{i}", "foo")
+        before = plan_generation("test.bundle", 1)
         delete_membership_plans_cache()
 
-        for i in range(50):
-            assert mock_redis.exists(f"m_plans:{i}") == 0
+        self.assertEqual(mock_redis.get(ALL_PLANS_GENERATION_KEY), b"1")
+        self.assertNotEqual(before, plan_generation("test.bundle", 1))
+
+    def test_invalidate_mplans_cache_only_affects_given_schemes_and_bundles(self) -> None:
+        scheme_plan = plan_generation("test.bundle", 1)
+        bundle_list = plan_list_generation("test.bundle")
+        other_bundle_list = plan_list_generation("other.bundle")
+
+        invalidate_membership_plans_cache(scheme_ids=[1], bundle_ids=["test.bundle"])
+
+        self.assertNotEqual(scheme_plan, plan_generation("test.bundle", 1))
+        self.assertNotEqual(bundle_list, plan_list_generation("test.bundle"))
+        self.assertEqual(other_bundle_list, plan_list_generation("other.bundle"))
+        self.assertIsNone(mock_redis.get(bundle_generation_key("other.bundle")))
+        self.assertEqual(plan_generation("other.bundle", 2), "0.0.0")
@@ -6,6 +6,8 @@ urlpatterns = [
     re_path(r"^/accounts/query$", views.SchemeAccountQuery.as_view(), name="query_scheme_accounts"),
     re_path(r"^/accounts/active$", views.ActiveSchemeAccountAccounts.as_view(), name="create_scheme_account"),
     re_path(r"^/accounts/system_retry$", views.SystemActionSchemeAccounts.as_view(), name="create_scheme_account"),
+    re_path(r"^/accounts/active/cursor$", views.ActiveSchemeAccountAccountsByCursor.as_view()),
+    re_path(r"^/accounts/system_retry/cursor$", views.SystemActionSchemeAccountsByCursor.as_view()),
     re_path(
         r"^/accounts/(?P<pk>[0-9]+)/credentials",  # In use by Midas
         views.SchemeAccountsCredentials.as_view(),
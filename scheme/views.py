@@ -10,10 +10,11 @@ from django.utils import timezone
 from rest_framework import serializers, status
 from rest_framework.exceptions import NotFound
 from rest_framework.generics import GenericAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView, get_object_or_404
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from hermes.db_router import ReplicaReadMixin
 from hermes.utils import ctx
 from history.tasks import join_outcome_event, register_outcome_event
 from payment_card.payment import Payment
@@ -362,42 +363,78 @@ class Pagination(PageNumberPagination):
     page_size = 500
 
 
-class ActiveSchemeAccountAccounts(ListAPIView):
+class SchemeAccountIdPagination(CursorPagination):
     """
-    DO NOT USE - NOT FOR APP ACCESS
+    Keyset pagination on the scheme account id, so each page is an index range scan of page_size rows however deep
+    into the table it is.
+    """
+
+    page_size = 500
+    ordering = "id"
+
+
+class SchemeAccountIdsByLinkStatusView(ReplicaReadMixin, ListAPIView):
+    """
+    Ids of the scheme accounts in a wallet with one of the link_statuses, paged by page number with a count. As these
+    lists always have, they hold one row per wallet entry, so an account in several wallets is listed once for each,
+    and include deleted accounts.
     """
 
-    # todo: Do we still use this anywhere? Doesn't really fit into post-TC
     permission_classes = (AllowService,)
     authentication_classes = (ServiceAuthentication,)
+    serializer_class = SchemeAccountIdsSerializer
+    pagination_class = Pagination
+    link_statuses: list[int] = []
 
     def get_queryset(self):
-        return [
-            sae.scheme_account for sae in SchemeAccountEntry.objects.filter(link_status=AccountLinkStatus.ACTIVE).all()
-        ]
+        return (
+            SchemeAccount.all_objects.filter(schemeaccountentry__link_status__in=self.link_statuses)
+            .values("id")
+            .order_by("schemeaccountentry__id")
+        )
 
-    serializer_class = SchemeAccountIdsSerializer
-    pagination_class = Pagination
 
+class SchemeAccountIdsByCursorMixin:
+    """
+    Lists the same ids paged by id cursor, without counting or offsetting into the table. The cursor needs a unique
+    ordering, so each account is listed once however many wallets hold it, and deleted accounts are left out.
+    """
+
+    pagination_class = SchemeAccountIdPagination
 
-class SystemActionSchemeAccounts(ListAPIView):
+    def get_queryset(self):
+        return (
+            SchemeAccount.objects.filter(
+                id__in=SchemeAccountEntry.objects.filter(link_status__in=self.link_statuses).values("scheme_account_id")
+            )
+            .values("id")
+            .order_by("id")
+        )
+
+
+class ActiveSchemeAccountAccounts(SchemeAccountIdsByLinkStatusView):
     """
     DO NOT USE - NOT FOR APP ACCESS
     """
 
-    permission_classes = (AllowService,)
-    authentication_classes = (ServiceAuthentication,)
+    # todo: Do we still use this anywhere? Doesn't really fit into post-TC
+    link_statuses = [AccountLinkStatus.ACTIVE]
 
-    def get_queryset(self):
-        return [
-            sae.scheme_account
-            for sae in SchemeAccountEntry.objects.filter(
-                link_status__in=AccountLinkStatus.system_action_required()
-            ).all()
-        ]
 
-    serializer_class = SchemeAccountIdsSerializer
-    pagination_class = Pagination
+class SystemActionSchemeAccounts(SchemeAccountIdsByLinkStatusView):
+    """
+    DO NOT USE - NOT FOR APP ACCESS
+    """
+
+    link_statuses = AccountLinkStatus.system_action_required()
+
+
+class ActiveSchemeAccountAccountsByCursor(SchemeAccountIdsByCursorMixin, ActiveSchemeAccountAccounts):
+    pass
+
+
+class SystemActionSchemeAccountsByCursor(SchemeAccountIdsByCursorMixin, SystemActionSchemeAccounts):
+    pass
 
 
 class SchemeAccountsCredentials(RetrieveAPIView, UpdateCredentialsMixin):
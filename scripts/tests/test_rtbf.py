@@ -89,7 +89,7 @@ class Wallet:
 
 @pytest.fixture(autouse=True)
 def stop_history_signals() -> Generator[None, None, None]:
-    with patch("history.signals.record_history"):
+    with patch("history.buffer.bulk_record_history"):
         yield
 
 
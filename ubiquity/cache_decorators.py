@@ -1,28 +1,52 @@
+import hashlib
+import json
 import logging
 import uuid
-from json import dumps, loads
-from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep, time
 
 from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError
 from redis.exceptions import TimeoutError as RedisTimeoutError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 from hermes.redis import r_read, r_write
+from prometheus.metrics import api_cache_requests_counter
+from scheme.plan_cache import plan_generation, plan_list_generation
 from ubiquity.versioning import get_api_version
 
 logger = logging.getLogger(__name__)
 
+# Entries past their soft expiry are refreshed here, after the stale response has been served
+background_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="api-cache-refresh")
+
 
 class CacheMissedError(Exception):
     pass
 
 
 class ApiCache:
-    def __init__(self, key, expire):
+    """
+    Cached response body, rendered once when it is saved, stored after a header line holding the generation it was
+    built from and its ETag. A body from an older generation is not available but is kept as stale_body, which can
+    be served while another worker rebuilds the entry.
+    """
+
+    def __init__(self, key, expire, generation=None):
         self.key = key
-        self.data = None
+        self.body = None
+        self.etag = None
+        self.stale_body = None
+        self.stale_etag = None
+        self.created = None
         self.expire = expire
+        self.generation = generation
+        self.lock_key = f"{key}:rebuild"
 
     @staticmethod
     def time_it_log(start_time, subject, high=450, low=150):
@@ -57,25 +81,62 @@ class ApiCache:
         start_time = monotonic()
         try:
             response_json = self.get()
-            if response_json:
-                self.data = loads(response_json)
-                self.time_it_log(start_time, "Success; Got plan cache from Redis but")
-                return True
-            else:
+            if not response_json:
                 raise CacheMissedError
+
+            header, separator, body = response_json.partition(b"\n")
+            if not separator:
+                # saved by an older release, before the body was stored rendered
+                raise CacheMissedError
+
+            cached = json.loads(header)
+            if cached.get("generation") != self.generation:
+                self.stale_body, self.stale_etag = body, cached.get("etag")
+                raise CacheMissedError
+
+            self.body, self.etag = body, cached.get("etag")
+            self.created = cached.get("created")
+            self.time_it_log(start_time, "Success; Got plan cache from Redis but")
+            return True
         except (RedisConnectionError, RedisTimeoutError, CacheMissedError):
-            self.data = None
+            self.body = None
             self.time_it_log(start_time, "Failure; Did not Get plan cache from Redis and")
             return False
 
     def save(self, data):
+        """Renders the response data as the default renderer would and caches it, returning the ETag of the body."""
         save_time = monotonic()
+        body = api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data)
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        header = json.dumps({"generation": self.generation, "created": time(), "etag": etag}).encode()
         try:
-            r_write.set(self.key, dumps(data), ex=self.expire)
+            r_write.set(self.key, header + b"\n" + body, ex=self.expire)
             self.time_it_log(save_time, "Success; wrote plan cache to Redis but")
         except RedisConnectionError:
             self.time_it_log(save_time, "Failure; did not write plan cache to Redis and", low=0)
-            pass
+        return etag
+
+    def acquire_rebuild(self) -> bool:
+        """Only one worker at a time gets to rebuild a missing entry. Without redis everyone rebuilds as before."""
+        try:
+            return bool(r_write.set(self.lock_key, "1", nx=True, ex=settings.REDIS_MPLANS_REBUILD_LOCK_SECONDS))
+        except RedisError:
+            return True
+
+    def release_rebuild(self) -> None:
+        try:
+            r_write.delete(self.lock_key)
+        except RedisError:
+            logger.warning(f"ApiCache: failed to release rebuild lock {self.lock_key}")
+
+    def wait_for_rebuild(self) -> bool:
+        deadline = monotonic() + settings.REDIS_MPLANS_REBUILD_WAIT_SECONDS
+        while monotonic() < deadline:
+            sleep(settings.REDIS_MPLANS_REBUILD_POLL_SECONDS)
+            if self.available:
+                return True
+
+        return False
 
 
 def membership_plan_key(req, kwargs=None):
@@ -95,19 +156,107 @@ def membership_plan_key(req, kwargs=None):
     return f"{pk_part}:{req.channels_permit.bundle_id}:{user_tester}"
 
 
+def membership_plan_generation(req, kwargs=None):
+    """
+    Generation of the cached membership plan response. A single plan depends on its scheme and bundle, the plan list
+    on the bundle alone.
+    """
+    bundle_id = req.channels_permit.bundle_id
+    pk = kwargs.get("pk")
+    if pk:
+        return plan_generation(bundle_id, pk)
+    return plan_list_generation(bundle_id)
+
+
 class CacheApiRequest:
-    def __init__(self, key_slug, expiry, key_func):
+    # the outcome each Cache result is counted as in api_cache_requests_counter
+    OUTCOMES = {"HIT": "hit", "STALE": "stale", "MISS": "miss", "WAIT": "miss"}
+
+    def __init__(self, key_slug, expiry, key_func, generation_func=None, soft_expiry=None):
         """
         This decorator can be used to cache a get a versioned request which always returns 200 on success -
         request must be first parameter in function decorated. The key used will have key_slug and api version
         plus any additional string made by the key_func.
+        Only one request rebuilds a missing key at a time, the others serve the stale data from an older generation
+        if there is some, or wait for the rebuild to finish.
+        Entries older than soft_expiry are still served straight away while one request refreshes them in the
+        background, so that only entries nobody asked for until their hard expiry are rebuilt synchronously.
         :param key_slug: name part of cache key unique for requested to be cached
         :param expiry: expiry time of key
         :param key_func: Function name to generate additional key parameters from request and/or cache decorator
+        :param generation_func: Function returning the generation the cached data must match to be used
+        :param soft_expiry: age in seconds after which an entry is refreshed in the background, None to disable
         """
         self.key_slug = key_slug
         self.expiry = expiry
         self.key_func = key_func
+        self.generation_func = generation_func
+        self.soft_expiry = soft_expiry
+
+    @staticmethod
+    def _cached_response(req, body, etag, version):
+        """The cached body as it was rendered, or not modified if the client already has it."""
+        if req.GET.get("fields", "*") != "*":
+            # DictFilterMiddleware filters response.data and renders it again, so the body is served as a Response
+            # which the view finalizes with its renderer context, with no ETag as the filtered body doesn't match it
+            response = Response(json.loads(body))
+            response["X-API-Version"] = version
+            return response
+
+        if_none_match = parse_etags(req.META.get("HTTP_IF_NONE_MATCH", ""))
+        client_etags = [client_etag.removeprefix("W/") for client_etag in if_none_match]
+        if etag and (etag in client_etags or "*" in client_etags):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+
+        response["X-API-Version"] = version
+        if etag:
+            response["ETag"] = etag
+        return response
+
+    @staticmethod
+    def _refresh(cache, func, request, *args, **kwargs):
+        response = func(request, *args, **kwargs)
+        if response.status_code == 200:
+            if etag := cache.save(response.data):
+                response["ETag"] = etag
+        else:
+            logger.error(f"ApiCache: could not regenerate cache due to request error {response.status_code}")
+        return response
+
+    def _is_soft_expired(self, cache):
+        return bool(self.soft_expiry and cache.created and time() - cache.created > self.soft_expiry)
+
+    @classmethod
+    def _background_refresh(cls, cache, func, request, *args, **kwargs):
+        try:
+            cls._refresh(cache, func, request, *args, **kwargs)
+        except Exception:
+            logger.exception(f"ApiCache: background refresh of key:{cache.key} failed")
+        finally:
+            cache.release_rebuild()
+            # database connections are per thread and this one's would otherwise be left open
+            connections.close_all()
+
+    def _refresh_in_background(self, cache, func, request, *args, **kwargs):
+        if cache.acquire_rebuild():
+            background_refresh_executor.submit(self._background_refresh, cache, func, request, *args, **kwargs)
+
+    def _rebuild(self, cache, req, version, func, request, *args, **kwargs):
+        if cache.acquire_rebuild():
+            try:
+                return self._refresh(cache, func, request, *args, **kwargs), "MISS"
+            finally:
+                cache.release_rebuild()
+
+        if cache.stale_body is not None:
+            return self._cached_response(req, cache.stale_body, cache.stale_etag, version), "STALE"
+
+        if cache.wait_for_rebuild():
+            return self._cached_response(req, cache.body, cache.etag, version), "WAIT"
+
+        return self._refresh(cache, func, request, *args, **kwargs), "MISS"
 
     def __call__(self, func):
         def wrapped_f(request, *args, **kwargs):
@@ -116,17 +265,23 @@ class CacheApiRequest:
             req = request.request
             version = get_api_version(req)
             key = f"{self.key_slug}{self.key_func(req, kwargs)}:{version}"
-            cache = ApiCache(key, self.expiry)
+            try:
+                generation = self.generation_func(req, kwargs) if self.generation_func else None
+            except RedisError:
+                logger.warning(f"ApiCache: could not read the generation for key:{key}, not using the cache")
+                api_cache_requests_counter.labels(key_slug=self.key_slug, outcome="miss").inc()
+                return func(request, *args, **kwargs)
+
+            cache = ApiCache(key, self.expiry, generation)
             if cache.available:
-                response = Response(cache.data)
-                response["X-API-Version"] = version
+                response = self._cached_response(req, cache.body, cache.etag, version)
+                if self._is_soft_expired(cache):
+                    cache_hit = "STALE"
+                    self._refresh_in_background(cache, func, request, *args, **kwargs)
             else:
-                cache_hit = "MISS"
-                response = func(request, *args, **kwargs)
-                if response.status_code == 200:
-                    cache.save(response.data)
-                else:
-                    logger.error(f"ApiCache: could not regenerate cache due to request error {response.status_code}")
+                response, cache_hit = self._rebuild(cache, req, version, func, request, *args, **kwargs)
+
+            api_cache_requests_counter.labels(key_slug=self.key_slug, outcome=self.OUTCOMES[cache_hit]).inc()
 
             cache.time_it_log(
                 request_start_time,
@@ -1,3 +1,26 @@
+from threading import local
+
+
+class CensoringState(local):
+    def __init__(self) -> None:
+        self.active = False
+
+
+censoring = CensoringState()
+
+
+class CensoredDict(dict):
+    """A dict that has been through remove_empty, remembering whether it had any items before."""
+
+    __slots__ = ("had_items",)
+
+
+class CensoredList(list):
+    """A list that has been through remove_empty."""
+
+    __slots__ = ()
+
+
 def is_not_empty(value):
     if value or isinstance(value, bool | int | float | list):
         return True
@@ -5,14 +28,24 @@ def is_not_empty(value):
     return False
 
 
+def was_not_empty(value):
+    # a dict value is kept, possibly emptied, if it had anything in it before being censored
+    if isinstance(value, CensoredDict):
+        return value.had_items
+
+    return is_not_empty(value)
+
+
 def remove_empty(d):
-    if not isinstance(d, dict | list):
+    # censored parts, built by a serializer using censored_representation, are not walked again
+    if not isinstance(d, dict | list) or isinstance(d, CensoredDict | CensoredList):
         return d
 
     if isinstance(d, list):
-        return [v for v in (remove_empty(v) for v in d) if is_not_empty(v)]
+        return CensoredList(v for v in (remove_empty(v) for v in d) if is_not_empty(v))
 
-    data = {}
+    data = CensoredDict()
+    data.had_items = bool(d)
 
     # Excluding code. We still want to return the code fields and not remove it.
     # This is for cancelled, redeemed and expired vouchers.
@@ -20,14 +53,34 @@ def remove_empty(d):
     for k, v in d.items():
         if k in ("code", "cta_url"):
             data[k] = v
-        elif is_not_empty(v):
+        elif was_not_empty(v):
             data[k] = remove_empty(v)
     return data
 
 
+def censored_representation(to_representation):
+    """
+    Removes the empty values from a serializer's representation as it is built, when it is serialized for a view
+    using censor_and_decorate, so the view's response isn't walked and copied a second time.
+    """
+
+    def wrapper(self, instance):
+        representation = to_representation(self, instance)
+        if censoring.active:
+            return remove_empty(representation)
+
+        return representation
+
+    return wrapper
+
+
 def censor_and_decorate(func):
     def func_wrapper(*args, **kwargs):
-        response = func(*args, **kwargs)
+        previous, censoring.active = censoring.active, True
+        try:
+            response = func(*args, **kwargs)
+        finally:
+            censoring.active = previous
 
         if response.status_code in (200, 201):
             response.data = remove_empty(response.data)
@@ -42,9 +95,10 @@ def censor_empty_values_middleware(get_response):
     def middleware(request):
         response = get_response(request)
         data_dict = remove_empty(response.data)
-        response.data = data_dict
-        response._is_rendered = False
-        response.render()
+        if data_dict is not response.data:
+            response.data = data_dict
+            response._is_rendered = False
+            response.render()
         return response
 
     return middleware
@@ -2,12 +2,9 @@ import json
 import logging
 from enum import Enum
 
-import requests
 from azure.identity import DefaultAzureCredential
 from azure.keyvault.secrets import SecretClient
-from requests.adapters import HTTPAdapter
 from rest_framework import exceptions
-from urllib3 import Retry
 
 logger = logging.getLogger(__name__)
 loaded = False
@@ -26,15 +23,6 @@ class VaultError(Exception):
         return f"Vault Error: {self.message}"
 
 
-def retry_session(backoff_factor: float = 0.3) -> requests.Session:
-    session = requests.Session()
-    retry = Retry(total=3, backoff_factor=backoff_factor, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    return session
-
-
 class AESKeyNames(str, Enum):
     AES_KEY = "AES_KEY"
     LOCAL_AES_KEY = "LOCAL_AES_KEY"
@@ -0,0 +1,83 @@
+import io
+import json
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from hermes.fast_json import ORJSONParser, ORJSONRenderer, orjson
+from hermes.redis import r_read
+
+
+def time_per_call(func, rounds):
+    start = perf_counter()
+    for _ in range(rounds):
+        func()
+    return (perf_counter() - start) / rounds * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the default JSON renderer and parser with the orjson ones on the cached membership plan responses, "
+        "and on any captured response bodies given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=50, help="Times each payload is rendered and parsed.")
+        parser.add_argument(
+            "--file", action="append", default=[], help="A captured JSON response body to include, can be repeated."
+        )
+        parser.add_argument("--max-plans", type=int, default=5, help="Most cached plan responses to include.")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed, install the fast-json extra")
+
+        payloads = self.cached_plan_responses(options["max_plans"])
+        for path in options["file"]:
+            with open(path, "rb") as f:
+                payloads.append((path, json.load(f)))
+
+        if not payloads:
+            raise CommandError("No cached membership plans found, request /ubiquity/membership_plans or pass --file.")
+
+        for name, data in payloads:
+            self.benchmark(name, data, options["rounds"])
+
+    @staticmethod
+    def cached_plan_responses(max_plans):
+        payloads = []
+        for key in r_read.scan_iter(f"{settings.REDIS_MPLANS_CACHE_PREFIX}:*", count=500):
+            if len(payloads) >= max_plans:
+                break
+            if r_read.type(key) != b"string" or key.endswith(b":rebuild"):
+                continue
+
+            # saved by ApiCache as a header line followed by the rendered response body
+            _, separator, body = (r_read.get(key) or b"").partition(b"\n")
+            if separator:
+                payloads.append((key.decode(), json.loads(body)))
+
+        return payloads
+
+    def benchmark(self, name, data, rounds):
+        body = JSONRenderer().render(data)
+        results = {
+            "render": (
+                time_per_call(lambda: JSONRenderer().render(data), rounds),
+                time_per_call(lambda: ORJSONRenderer().render(data), rounds),
+            ),
+            "parse": (
+                time_per_call(lambda: JSONParser().parse(io.BytesIO(body)), rounds),
+                time_per_call(lambda: ORJSONParser().parse(io.BytesIO(body)), rounds),
+            ),
+        }
+
+        self.stdout.write(self.style.MIGRATE_LABEL(f"{name} ({len(body) / 1024:.1f} KiB)"))
+        for operation, (default_ms, orjson_ms) in results.items():
+            self.stdout.write(
+                f"  {operation}: json {default_ms:.3f} ms, orjson {orjson_ms:.3f} ms, "
+                f"{default_ms / orjson_ms:.1f}x faster"
+            )
@@ -10,14 +10,15 @@ from typing import TYPE_CHECKING
 from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import IntegrityError, models, transaction
-from django.db.models import F, Q, signals
+from django.db.models import Count, Prefetch, Q, prefetch_related_objects, signals
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.functional import cached_property
 
 from api_messaging.midas_messaging import send_midas_last_pll_per_channel_group_event
 from hermes import settings
 from hermes.vop_tasks import send_deactivation, vop_activate_request
-from history.data_warehouse import user_pll_status_change_event
+from history.data_warehouse import user_pll_status_change_event, user_pll_status_change_events
 from history.signals import HISTORY_CONTEXT
 from scheme.credentials import BARCODE, CARD_NUMBER, ENCRYPTED_CREDENTIALS, MERCHANT_IDENTIFIER, PASSWORD, PASSWORD_2
 from scheme.encryption import AESCipher
@@ -269,6 +270,45 @@ class SchemeAccountEntry(models.Model):
             question__scheme_id=self.scheme_account.scheme_id
         ).select_related("question")
 
+    @staticmethod
+    def prefetch_credentials(scheme_account_entries: Iterable["SchemeAccountEntry"]) -> None:
+        """
+        Loads the credential answers and scheme questions of all the given entries up front, so that credentials()
+        runs no queries of its own for them. The answers are not refreshed if they change afterwards.
+        """
+        from scheme.models import ConsentStatus, SchemeAccountCredentialAnswer, UserConsent
+
+        prefetch_related_objects(
+            list(scheme_account_entries),
+            "scheme_account__scheme__questions",
+            Prefetch(
+                "schemeaccountcredentialanswer_set",
+                queryset=SchemeAccountCredentialAnswer.objects.select_related("question").order_by("id"),
+                to_attr="prefetched_credential_answers",
+            ),
+            Prefetch(
+                "scheme_account__userconsent_set",
+                queryset=UserConsent.objects.filter(status=ConsentStatus.PENDING),
+                to_attr="prefetched_pending_consents",
+            ),
+        )
+
+    def _answers_by_type(self) -> dict[str, str]:
+        if hasattr(self, "prefetched_credential_answers"):
+            answers = [
+                (answer.question.type if answer.question else None, answer.answer)
+                for answer in self.prefetched_credential_answers
+            ]
+        else:
+            answers = self.schemeaccountcredentialanswer_set.order_by("id").values_list("question__type", "answer")
+
+        answers_by_type = {}
+        for question_type, answer in answers:
+            # keep the first answer of a type, as looking them up one by one did
+            answers_by_type.setdefault(question_type, answer)
+
+        return answers_by_type
+
     @staticmethod
     def create_or_retrieve_link(
         user: "CustomUser", scheme_account: "SchemeAccount"
@@ -443,19 +483,23 @@ class SchemeAccountEntry(models.Model):
         if commit_change:
             self.save(update_fields=update_fields)
 
+    def _link_question_types(self) -> set[str]:
+        from scheme.models import SchemeCredentialQuestion
+
+        # filtered here rather than in the database so that prefetched questions are used
+        return {
+            question.type
+            for question in self.scheme_account.scheme.questions.all()
+            if question.options & SchemeCredentialQuestion.LINK or question.options == SchemeCredentialQuestion.NONE
+        }
+
     def missing_credentials(self, credential_types):
         """
         Given a list of credential_types return credentials if they are required by the scheme
 
         A scan or manual question is an optional if one of the other exists
         """
-        from scheme.models import SchemeCredentialQuestion
-
-        questions = self.scheme_account.scheme.questions.filter(
-            options__in=[F("options").bitor(SchemeCredentialQuestion.LINK), SchemeCredentialQuestion.NONE]
-        )
-
-        required_credentials = {question.type for question in questions}
+        required_credentials = self._link_question_types()
         manual_question = self.scheme_account.scheme.manual_question
         scan_question = self.scheme_account.scheme.scan_question
 
@@ -504,15 +548,17 @@ class SchemeAccountEntry(models.Model):
 
     def _collect_credential_answers(self):
         credentials = {}
+        answers_by_type = self._answers_by_type()
+        cipher = AESCipher(AESKeyNames.LOCAL_AES_KEY)
         for question in self.scheme_account.scheme.questions.all():
             # attempt to get the answer from the database.
-            answer = self._find_answer(question)
+            answer = self._find_answer(question, answers_by_type)
 
             if not answer:
                 continue
 
             if question.type in ENCRYPTED_CREDENTIALS:
-                credentials[question.type] = AESCipher(AESKeyNames.LOCAL_AES_KEY).decrypt(answer)
+                credentials[question.type] = cipher.decrypt(answer)
             else:
                 credentials[question.type] = answer
         return credentials
@@ -529,11 +575,13 @@ class SchemeAccountEntry(models.Model):
 
         return None
 
-    def _find_answer(self, question):
+    def _find_answer(self, question, answers_by_type: dict[str, str] | None = None):
+        if answers_by_type is None:
+            answers_by_type = self._answers_by_type()
+
         answer = None
-        answer_instance = self.schemeaccountcredentialanswer_set.filter(question__type=question.type).first()
-        if answer_instance:
-            answer = answer_instance.answer
+        if question.type in answers_by_type:
+            answer = answers_by_type[question.type]
         else:
             # see if we have a property that will give us the answer.
             # and if we can't get an answer to this question, so skip it.
@@ -718,31 +766,31 @@ class WalletPLLSlug(Enum):
 class WalletPLLData:
     def __init__(self, payment_card_account=None, scheme_account=None):
         """
-        It is expected that the links passed will be
-        :param links: query result or list of PllUserAssociations (wallet based PLL links)
+        Collects the wallet PLL links (PllUserAssociations) of every user which refer to either or both accounts
+        together with the data needed to recalculate their state, using a fixed number of queries however many
+        wallets share the accounts.
         """
         self.to_query = True
         self.pll_user_associations = []
+        query = None
         if payment_card_account is not None and scheme_account is not None:
             # Finds all associations which refer to either the payment card account or scheme account for any user
             # Typical use is when a link is removed the status of any link using either the payment account or
             # scheme account might cause a change status or explanation for other links
-            self.pll_user_associations = PllUserAssociation.objects.select_related(
-                "pll__scheme_account", "pll__payment_card_account"
-            ).filter(Q(pll__payment_card_account=payment_card_account) | Q(pll__scheme_account=scheme_account))
+            query = Q(pll__payment_card_account=payment_card_account) | Q(pll__scheme_account=scheme_account)
         elif payment_card_account is not None:
-            self.pll_user_associations = PllUserAssociation.objects.select_related(
-                "pll__scheme_account", "pll__payment_card_account"
-            ).filter(pll__payment_card_account=payment_card_account)
+            query = Q(pll__payment_card_account=payment_card_account)
         elif scheme_account is not None:
-            self.pll_user_associations = PllUserAssociation.objects.select_related(
-                "pll__scheme_account", "pll__payment_card_account"
-            ).filter(pll__scheme_account=scheme_account)
-        self.scheme_account_data = {}
-        self.pll_data = {}
+            query = Q(pll__scheme_account=scheme_account)
+
+        if query is not None:
+            self.pll_user_associations = list(
+                PllUserAssociation.objects.select_related(
+                    "user", "pll__scheme_account__scheme", "pll__payment_card_account__payment_card"
+                ).filter(query)
+            )
         self.scheme_count = {}
-        self.link_users = {}
-        self.included_payment_cards = {}
+        self.entry_link_statuses = {}
 
     def all(self) -> list["PllUserAssociation"]:
         yield from self.pll_user_associations
@@ -752,92 +800,51 @@ class WalletPLLData:
             if not self.collision(link):
                 yield link
 
-    def analyse_pll_user_associations(self):
+    def process_links(self):
         """
-        Looks at user pll links to:
-           1) creates a dict of links by link owner ie user id - used for finding scheme entries for related users and
-              parsing the relevant links by wallet
-           2) creates a dict of scheme counts by payment account and scheme id - used to detect ubiquity collision
-              assuming the user links include all links related to either a payment card account or scheme account
-              or both  (see __init__ queries ie this class requires either or both accounts)
-
+        Only reads the db when first called, using 2 queries:
+           1) counts of user links by payment account and scheme id for every payment account included - used to
+              detect ubiquity collision
+           2) the link status of the scheme account entries behind each user link
         """
-        self.link_users = {}
-        self.scheme_account_data = {}
-        self.scheme_count = {}
-        self.included_payment_cards = {}
-        for link in self.pll_user_associations:
-            if self.included_payment_cards.get(link.pll.payment_card_account_id):
-                self.included_payment_cards[link.pll.payment_card_account_id].append(link)
-            else:
-                self.included_payment_cards[link.pll.payment_card_account_id] = [link]
+        if not self.to_query:
+            return
 
-        included_pll_user_associations = PllUserAssociation.objects.select_related(
-            "pll__scheme_account", "pll__payment_card_account"
-        ).filter(pll__payment_card_account__in=list(self.included_payment_cards.keys()))
+        self.to_query = False
+        if not self.pll_user_associations:
+            return
 
-        for link in included_pll_user_associations:
-            if self.link_users.get(link.user_id):
-                self.link_users[link.user_id].append(link)
-            else:
-                self.link_users[link.user_id] = [link]
-            scheme_id = link.pll.scheme_account.scheme_id
-            pay_id = link.pll.payment_card_account_id
-            if not self.scheme_count.get(pay_id):
-                self.scheme_count[pay_id] = {}
-            if self.scheme_count[pay_id].get(scheme_id):
-                self.scheme_count[pay_id][scheme_id] += 1
-            else:
-                self.scheme_count[pay_id][scheme_id] = 1
+        payment_card_account_ids = {link.pll.payment_card_account_id for link in self.pll_user_associations}
+        self.scheme_count = {
+            (row["pll__payment_card_account_id"], row["pll__scheme_account__scheme_id"]): row["count"]
+            for row in PllUserAssociation.objects.filter(pll__payment_card_account_id__in=payment_card_account_ids)
+            .values("pll__payment_card_account_id", "pll__scheme_account__scheme_id")
+            .annotate(count=Count("id"))
+        }
 
-    def process_links(self):
-        if self.to_query:
-            # Only reads db when first called and prepares a dict of the pll relationships and status using
-            # results of 2 queries merged assuming that an account is unique in a wallet.
-            # The object is to avoid multiple calls to the database and all class methods to be called repeatedly
-            #
-            self.to_query = False
-            self.analyse_pll_user_associations()
-
-            scheme_entries = SchemeAccountEntry.objects.filter(user_id__in=list(self.link_users.keys()))
-            for entry in scheme_entries:
-                for lk in self.link_users[entry.user_id]:
-                    if lk.pll.scheme_account_id == entry.scheme_account_id:
-                        matched_link = lk
-
-                        pay_id = matched_link.pll.payment_card_account_id
-                        scheme_id = matched_link.pll.scheme_account.scheme_id
-                        if not self.scheme_account_data.get(entry.scheme_account_id):
-                            self.scheme_account_data[entry.scheme_account_id] = {}
-                        self.scheme_account_data[entry.scheme_account_id][entry.user_id] = {
-                            "status": entry.link_status,
-                            "link": matched_link,
-                            "scheme_count": self.scheme_count[pay_id][scheme_id],
-                        }
-
-    def get_link_data(self, link: "PllUserAssociation") -> dict[str, "str | int | PllUserAssociation | None"]:
-        default_link_data = {"status": None, "link": None, "scheme_count": 0}
-        self.process_links()
-        sas = self.scheme_account_data.get(link.pll.scheme_account.id)
-        if sas:
-            sa = sas.get(link.user_id, default_link_data)
-            return sa
-        return default_link_data
+        scheme_entries = SchemeAccountEntry.objects.filter(
+            user_id__in={link.user_id for link in self.pll_user_associations},
+            scheme_account_id__in={link.pll.scheme_account_id for link in self.pll_user_associations},
+        ).values_list("user_id", "scheme_account_id", "link_status")
+        self.entry_link_statuses = {
+            (user_id, scheme_account_id): link_status for user_id, scheme_account_id, link_status in scheme_entries
+        }
 
     def scheme_account_status(self, link: "PllUserAssociation"):
-        data = self.get_link_data(link)
-        return data.get("status")
+        self.process_links()
+        return self.entry_link_statuses.get((link.user_id, link.pll.scheme_account_id))
 
     def collision(self, link: "PllUserAssociation"):
-        data = self.get_link_data(link)
-        scheme_more_than_once = data.get("scheme_count", 0) > 1
+        self.process_links()
+        if (link.user_id, link.pll.scheme_account_id) not in self.entry_link_statuses:
+            return False
 
+        pll = link.pll
+        scheme_more_than_once = (
+            self.scheme_count.get((pll.payment_card_account_id, pll.scheme_account.scheme_id), 0) > 1
+        )
         # if the link slug is not marked as collision it must be the link before the collision occurred so false
-        if data.get("link") and data["link"].slug != WalletPLLSlug.UBIQUITY_COLLISION.value and scheme_more_than_once:
-            return False
-        # returns true for other scheme linked more than once to a payment card and false otherwise even if slug
-        # says it was a collision
-        return scheme_more_than_once
+        return scheme_more_than_once and link.slug == WalletPLLSlug.UBIQUITY_COLLISION.value
 
 
 class PllUserAssociation(models.Model):
@@ -912,43 +919,50 @@ class PllUserAssociation(models.Model):
             raise ValueError(f'Invalid slug value: "{slug}" sent to PllUserAssociation.get_slug_description') from None
 
     @staticmethod
-    def update_link(link: "PllUserAssociation", wallet_pll_records: list["PllUserAssociation"]):
-        link.save()
-        if link.state == WalletPLLStatus.ACTIVE:
-            # Set the generic pll link to active if not already set
-            if not link.pll.active_link:
-                link.pll.activate()
+    def update_base_links(links: list["PllUserAssociation"]):
+        """A base link is active while any of its user links is active, only changes are saved"""
+        base_links = {}
+        active_base_link_ids = set()
+        for link in links:
+            base_links.setdefault(link.pll_id, link.pll)
+            if link.state == WalletPLLStatus.ACTIVE:
+                active_base_link_ids.add(link.pll_id)
 
-        else:
-            update_base_link = True
-            for pll in wallet_pll_records:
-                if pll.state == WalletPLLStatus.ACTIVE:
-                    update_base_link = False
-                    break
+        for base_link_id, base_link in base_links.items():
+            if base_link_id in active_base_link_ids:
+                # Set the generic pll link to active if not already set
+                if not base_link.active_link:
+                    base_link.activate()
 
-            if update_base_link:
-                link.pll.active_link = False
-                link.pll.save()
+            elif base_link.active_link:
+                base_link.active_link = False
+                base_link.save()
 
     @classmethod
     def _update_user_pll(cls, wallet_pll_data: WalletPLLData, headers: dict | None = None):
-        wallet_pll_records = wallet_pll_data.all_except_collision()
-        for link in wallet_pll_data.all_except_collision():
+        links = list(wallet_pll_data.all_except_collision())
+        changed_links = []
+        for link in links:
             previous_state = link.state
             previous_slug = link.slug
 
             link.state, link.slug = cls.get_state_and_slug(
                 link.pll.payment_card_account, wallet_pll_data.scheme_account_status(link)
             )
-            cls.update_link(link, wallet_pll_records)
-
-            # Only trigger events when there's a state change or slug change
             if previous_state != link.state or previous_slug != link.slug:
-                user_pll_status_change_event(link, previous_state, headers)
+                link.updated = timezone.now()
+                changed_links.append((link, previous_state))
 
-                # Only do last man standing check if link was deactivated
-                if previous_state == WalletPLLStatus.ACTIVE:
-                    channel_last_man_standing_user_pll_check(user_pll=link)
+        cls.objects.bulk_update([link for link, _ in changed_links], ["state", "slug", "updated"])
+        cls.update_base_links(links)
+
+        # Only trigger events when there's a state change or slug change
+        user_pll_status_change_events(changed_links, headers)
+
+        # Only do last man standing check if link was deactivated
+        channel_last_man_standing_user_pll_bulk_check(
+            [link for link, previous_state in changed_links if previous_state == WalletPLLStatus.ACTIVE]
+        )
 
     @classmethod
     def update_user_pll_by_both(
@@ -1184,6 +1198,41 @@ def channel_last_man_standing_loyalty_card_check(
     )
 
 
+def channel_last_man_standing_loyalty_card_bulk_check(
+    scheme_account_entries: list["SchemeAccountEntry"],
+    channel_slug: str,
+) -> None:
+    """
+    channel_last_man_standing_loyalty_card_check for many entries removed from the same channel at once. The event is
+    sent once per loyalty card, for the last of its entries, when no wallet in the channel group still has active PLL.
+
+    This must be called after the user PLL has been deleted for all the entries.
+    """
+    if not scheme_account_entries:
+        return
+
+    current_user_channel = (
+        ClientApplicationBundle.objects.only("is_trusted", "bundle_id")
+        .filter(client_id=scheme_account_entries[0].user.client_id, bundle_id=channel_slug)
+        .first()
+    )
+    last_entries = {entry.scheme_account_id: entry for entry in scheme_account_entries}
+    still_active = set(
+        PllUserAssociation.objects.filter(
+            pll__scheme_account_id__in=last_entries,
+            state=WalletPLLStatus.ACTIVE,
+            user__client__clientapplicationbundle__is_trusted=current_user_channel.is_trusted,
+        ).values_list("pll__scheme_account_id", flat=True)
+    )
+    for scheme_account_id, entry in last_entries.items():
+        if scheme_account_id not in still_active:
+            send_midas_last_pll_per_channel_group_event(
+                channel_slug=current_user_channel.bundle_id,
+                user_id=entry.user_id,
+                scheme_account=entry.scheme_account,
+            )
+
+
 def channel_last_man_standing_user_pll_check(
     user_pll: "PllUserAssociation",
 ) -> None:
@@ -1212,6 +1261,49 @@ def channel_last_man_standing_user_pll_check(
     )
 
 
+def channel_last_man_standing_user_pll_bulk_check(user_plls: list["PllUserAssociation"]) -> None:
+    """
+    Same check as channel_last_man_standing_user_pll_check for user plls deactivated together, looking up their
+    channels and the remaining active user plls in one query each. Only one event is sent per loyalty card and
+    channel group.
+    """
+    if not user_plls:
+        return
+
+    channels = {}
+    for channel in (
+        ClientApplicationBundle.objects.only("client_id", "is_trusted", "bundle_id")
+        .filter(client_id__in={user_pll.user.client_id for user_pll in user_plls})
+        .order_by("pk")
+    ):
+        # first channel of a client is the fallback when the user has no bundle_id
+        channels.setdefault((channel.client_id, None), channel)
+        channels.setdefault((channel.client_id, channel.bundle_id), channel)
+
+    active_channel_groups = set(
+        PllUserAssociation.objects.filter(
+            pll__scheme_account_id__in={user_pll.pll.scheme_account_id for user_pll in user_plls},
+            state=WalletPLLStatus.ACTIVE,
+        )
+        .values_list("pll__scheme_account_id", "user__client__clientapplicationbundle__is_trusted")
+        .distinct()
+    )
+
+    last_user_plls = {}
+    for user_pll in user_plls:
+        user_channel = channels[(user_pll.user.client_id, user_pll.user.bundle_id or None)]
+        channel_group = (user_pll.pll.scheme_account_id, user_channel.is_trusted)
+        if channel_group not in active_channel_groups:
+            last_user_plls[channel_group] = (user_pll, user_channel)
+
+    for user_pll, user_channel in last_user_plls.values():
+        send_midas_last_pll_per_channel_group_event(
+            channel_slug=user_channel.bundle_id,
+            user_id=user_pll.user_id,
+            scheme_account=user_pll.pll.scheme_account,
+        )
+
+
 class PaymentCardSchemeEntry(models.Model):
     payment_card_account = models.ForeignKey(
         "payment_card.PaymentCardAccount", on_delete=models.CASCADE, verbose_name="Associated Payment Card Account"
@@ -0,0 +1,108 @@
+import logging
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db.models import Prefetch
+from redis.exceptions import RedisError
+
+from hermes.fast_json import dumps, loads
+from hermes.redis import r_read, r_write
+from scheme.models import Scheme, ThirdPartyConsentLink
+from scheme.plan_cache import ALL_PLANS_GENERATION_KEY, get_generations, scheme_generation_key
+from ubiquity.versioning import SelectSerializer, versioned_serializer_class
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+    from hermes.settings import Version
+
+logger = logging.getLogger(__name__)
+
+PLAN_DOCUMENTS_KEY_PREFIX = f"{settings.REDIS_MPLANS_CACHE_PREFIX}:documents"
+
+
+def plan_documents_key(version: "Version", client_id: str, all_plans_generation: int) -> str:
+    return f"{PLAN_DOCUMENTS_KEY_PREFIX}:{version}:{client_id}:{all_plans_generation}"
+
+
+def _document_fields(scheme_ids: list[int]) -> tuple[int, dict[int, str]]:
+    # documents are stored under their scheme's generation, so editing a scheme only invalidates its own documents
+    all_plans_generation, *scheme_generations = get_generations(
+        [ALL_PLANS_GENERATION_KEY, *(scheme_generation_key(scheme_id) for scheme_id in scheme_ids)]
+    )
+    return all_plans_generation, {
+        scheme_id: f"{scheme_id}:{generation}"
+        for scheme_id, generation in zip(scheme_ids, scheme_generations, strict=True)
+    }
+
+
+def plan_compile_queryset(client_id: str) -> "QuerySet[Scheme]":
+    """Schemes with everything MembershipPlanSerializer reads loaded up front, for a fixed number of queries."""
+    return Scheme.objects.select_related("category").prefetch_related(
+        "images",
+        "schemebalancedetails_set",
+        "schemedetail_set",
+        "questions",
+        "documents",
+        "voucherscheme_set",
+        "schemefee_set",
+        "schemecontent_set",
+        Prefetch(
+            "scheme",
+            queryset=ThirdPartyConsentLink.objects.filter(client_app_id=client_id).select_related("consent"),
+            to_attr="client_consents",
+        ),
+    )
+
+
+def compile_plan_documents(scheme_ids: list[int], version: "Version", context: dict) -> dict[int, bytes]:
+    client_id = context["request"].user.client_id
+    serializer_class = versioned_serializer_class(version, SelectSerializer.MEMBERSHIP_PLAN)
+    return {
+        scheme.id: dumps(serializer_class(scheme, context=context).data)
+        for scheme in plan_compile_queryset(client_id).filter(id__in=scheme_ids)
+    }
+
+
+def _save_plan_documents(key: str, documents: dict[str, bytes]) -> None:
+    try:
+        pipe = r_write.pipeline()
+        pipe.hset(key, mapping=documents)
+        # the expiry is only set when the hash is created, so documents left behind by edited schemes go with it
+        pipe.expire(key, settings.REDIS_MPLANS_CACHE_EXPIRY, nx=True)
+        pipe.execute()
+    except RedisError:
+        logger.warning(f"Failed to save compiled membership plan documents to {key}")
+
+
+def _read_plan_documents(
+    scheme_ids: list[int], version: "Version", client_id: str
+) -> tuple[str | None, dict[int, str], dict[int, bytes | None]]:
+    try:
+        all_plans_generation, fields = _document_fields(scheme_ids)
+        key = plan_documents_key(version, client_id, all_plans_generation)
+        return key, fields, dict(zip(scheme_ids, r_read.hmget(key, list(fields.values())), strict=True))
+    except RedisError:
+        logger.warning("Failed to read compiled membership plan documents")
+        return None, {}, dict.fromkeys(scheme_ids)
+
+
+def get_plan_documents(scheme_ids: list[int], version: "Version", context: dict) -> list[dict]:
+    """
+    Membership plans for the given scheme ids, in the same order, as the versioned MembershipPlanSerializer would
+    render them for the client in the request context.
+
+    Plans are compiled once per (api version, client) and kept in a redis hash keyed by scheme id and generation, so
+    a request only assembles documents already built. Any plans missing from the hash are compiled together in one go.
+    """
+    if not scheme_ids:
+        return []
+
+    key, fields, documents = _read_plan_documents(scheme_ids, version, context["request"].user.client_id)
+    if missing := [scheme_id for scheme_id, document in documents.items() if document is None]:
+        compiled = compile_plan_documents(missing, version, context)
+        if compiled and key:
+            _save_plan_documents(key, {fields[scheme_id]: document for scheme_id, document in compiled.items()})
+        documents.update(compiled)
+
+    return [loads(documents[scheme_id]) for scheme_id in scheme_ids if documents[scheme_id] is not None]
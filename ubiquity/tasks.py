@@ -1,15 +1,19 @@
 import logging
-import math
 import typing as t
+from collections import defaultdict
 from enum import Enum
 
 import arrow
-import requests
 import sentry_sdk
 from celery import shared_task
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
 
+from hermes.http_client import atlas
+from hermes.redis import r_write
 from hermes.vop_tasks import activate, deactivate
 from history.data_warehouse import (
     generate_pll_delete_payload,
@@ -21,15 +25,18 @@ from history.tasks import auth_outcome_task
 from history.utils import clean_history_kwargs, history_bulk_update, set_history_kwargs, user_info
 from payment_card import metis
 from payment_card.models import PaymentCardAccount
+from scheme.balance import refresh_wallet_balances
 from scheme.credentials import CredentialAnswers
 from scheme.mixins import BaseLinkMixin, SchemeAccountJoinMixin
 from scheme.models import SchemeAccount
 from ubiquity.models import (
     AccountLinkStatus,
+    PaymentCardAccountEntry,
     PaymentCardSchemeEntry,
     PllUserAssociation,
     SchemeAccountEntry,
     VopActivation,
+    channel_last_man_standing_loyalty_card_bulk_check,
     channel_last_man_standing_loyalty_card_check,
     channel_last_man_standing_payment_card_check,
 )
@@ -40,6 +47,10 @@ if t.TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+BALANCE_REFRESH_KEY_PREFIX = "balance_refresh"
+MEMBERSHIP_CARD_CLEANUP_KEY_PREFIX = "membership_card_cleanup"
+MEMBERSHIP_CARD_CLEANUP_CHECKPOINT_EXPIRY = 7 * 24 * 60 * 60
+
 
 class UpdateCardType(Enum):
     PAYMENT_CARD = PaymentCardAccount
@@ -69,7 +80,7 @@ def _send_metrics_to_atlas(method: str, slug: str, payload: dict, x_azure_ref: s
         "Content-Type": "application/json",
         "X-azure-ref": x_azure_ref,
     }
-    requests.request(method, f"{settings.ATLAS_URL}/audit/metrics/{slug}", data=payload, headers=headers)
+    atlas.request(method, f"{settings.ATLAS_URL}/audit/metrics/{slug}", data=payload, headers=headers)
 
 
 @shared_task
@@ -115,6 +126,51 @@ def async_balance(
     scheme_account_entry.scheme_account.get_balance(scheme_account_entry, headers=headers)
 
 
+def claim_balance_refreshes(scheme_account_entries: list[SchemeAccountEntry]) -> list[SchemeAccountEntry]:
+    """
+    Sets a per SchemeAccount marker in Redis which expires after BALANCE_REFRESH_COALESCE_SECONDS and returns
+    only the entries which were not already marked, i.e. without a balance refresh in flight or completed
+    within that window. If Redis is unavailable all entries are returned so balances are still refreshed.
+    """
+    if not scheme_account_entries:
+        return []
+
+    try:
+        pipe = r_write.pipeline(transaction=False)
+        for entry in scheme_account_entries:
+            pipe.set(
+                f"{BALANCE_REFRESH_KEY_PREFIX}:{entry.scheme_account_id}",
+                1,
+                nx=True,
+                ex=settings.BALANCE_REFRESH_COALESCE_SECONDS,
+            )
+        claimed = pipe.execute()
+    except (RedisConnectionError, RedisTimeoutError):
+        logger.warning("Could not connect to Redis to coalesce balance refreshes, refreshing all requested balances")
+        return list(scheme_account_entries)
+
+    return [entry for entry, is_claimed in zip(scheme_account_entries, claimed, strict=True) if is_claimed]
+
+
+def request_wallet_balance_refresh(
+    scheme_account_entries: list[SchemeAccountEntry], headers: dict | None = None
+) -> None:
+    """Queues a single balance refresh task for all the given entries which have not been refreshed recently."""
+    entries_to_refresh = claim_balance_refreshes(scheme_account_entries)
+    if entries_to_refresh:
+        async_wallet_balance.delay([entry.id for entry in entries_to_refresh], headers=headers)
+
+
+@shared_task
+def async_wallet_balance(scheme_account_entry_ids: list[int], headers: dict | None = None) -> None:
+    entries = (
+        SchemeAccountEntry.objects.select_related("scheme_account__scheme", "user")
+        .prefetch_related("scheme_account__user_set")
+        .filter(id__in=scheme_account_entry_ids, scheme_account__is_deleted=False)
+    )
+    refresh_wallet_balances(list(entries), headers=headers)
+
+
 @shared_task
 def async_balance_with_updated_credentials(
     instance_id: int,
@@ -167,10 +223,12 @@ def async_all_balance(user_id: int, channels_permit, headers: dict | None = None
         bundle_id=channels_permit.bundle_id
     )
     if not is_trusted_channel:
-        entries = entries.exclude(**exclude_query)
-
-        for entry in entries.all():
-            async_balance.delay(entry, headers=headers)
+        entries = (
+            entries.exclude(**exclude_query)
+            .select_related("scheme_account__scheme", "user")
+            .prefetch_related("scheme_account__user_set")
+        )
+        refresh_wallet_balances(list(entries), headers=headers)
 
 
 @shared_task
@@ -381,42 +439,147 @@ def deleted_membership_card_cleanup(
     clean_history_kwargs(history_kwargs)
 
 
+def _delete_chunk_user_plls(scheme_account_entries: list[SchemeAccountEntry]) -> None:
+    entry_pairs = {(entry.user_id, entry.scheme_account_id) for entry in scheme_account_entries}
+    user_plls = [
+        user_pll
+        for user_pll in PllUserAssociation.objects.filter(
+            user_id__in={user_id for user_id, _ in entry_pairs},
+            pll__scheme_account_id__in={scheme_account_id for _, scheme_account_id in entry_pairs},
+        ).select_related("user", "pll")
+        if (user_pll.user_id, user_pll.pll.scheme_account_id) in entry_pairs
+    ]
+
+    # Generate payload for event pll_link.statuschange
+    delete_user_pll_payloads = generate_pll_delete_payload(user_plls)
+    PllUserAssociation.objects.filter(id__in=[user_pll.id for user_pll in user_plls]).delete()
+    user_pll_delete_event(delete_user_pll_payloads)
+
+
+def _unsupported_pll_links(scheme_account_ids: set[int], holders: dict[int, set[int]]) -> list[PaymentCardSchemeEntry]:
+    """Links of the scheme accounts to payment cards that no one still holding the scheme account has."""
+    pll_links = list(
+        PaymentCardSchemeEntry.objects.filter(scheme_account_id__in=scheme_account_ids).select_related("scheme_account")
+    )
+    card_users = defaultdict(set)
+    for payment_card_account_id, user_id in PaymentCardAccountEntry.objects.filter(
+        payment_card_account_id__in={link.payment_card_account_id for link in pll_links}
+    ).values_list("payment_card_account_id", "user_id"):
+        card_users[payment_card_account_id].add(user_id)
+
+    return [
+        link
+        for link in pll_links
+        if not card_users[link.payment_card_account_id] & holders.get(link.scheme_account_id, set())
+    ]
+
+
+def _mark_orphaned_scheme_accounts(scheme_accounts: dict[int, SchemeAccount]) -> dict[int, set[int]]:
+    """Marks the scheme accounts no one holds anymore as deleted, and returns the remaining holders of the others."""
+    holders = defaultdict(set)
+    for scheme_account_id, user_id in SchemeAccountEntry.objects.filter(
+        scheme_account_id__in=scheme_accounts
+    ).values_list("scheme_account_id", "user_id"):
+        holders[scheme_account_id].add(user_id)
+
+    # Last man standing
+    if orphaned := [account for account_id, account in scheme_accounts.items() if account_id not in holders]:
+        for scheme_account in orphaned:
+            scheme_account.is_deleted = True
+
+        history_bulk_update(SchemeAccount, orphaned, ["is_deleted"])
+
+    return holders
+
+
+def _cleanup_deleted_membership_cards(
+    scheme_account_entries: list[SchemeAccountEntry], delete_date: str, channel_slug: str
+) -> None:
+    """deleted_membership_card_cleanup for a chunk of entries in the same scheme, with bulk queries."""
+    scheme = scheme_account_entries[0].scheme_account.scheme
+    scheme_accounts = {entry.scheme_account_id: entry.scheme_account for entry in scheme_account_entries}
+
+    _delete_chunk_user_plls(scheme_account_entries)
+    for scheme_account_entry in scheme_account_entries:
+        remove_loyalty_card_event(scheme_account_entry, date_time=delete_date)
+
+    # This must be called after deleting the user PLL
+    channel_last_man_standing_loyalty_card_bulk_check(scheme_account_entries, channel_slug)
+
+    # Delete the entries (credentials and PLLUserAssociations by cascade)
+    SchemeAccountEntry.objects.filter(id__in=[entry.id for entry in scheme_account_entries]).delete()
+
+    holders = _mark_orphaned_scheme_accounts(scheme_accounts)
+    pll_links = _unsupported_pll_links(set(scheme_accounts), holders)
+    activations = VopActivation.objects.filter(
+        payment_card_account_id__in={link.payment_card_account_id for link in pll_links},
+        scheme_id=scheme.id,
+        status=VopActivation.ACTIVATED,
+    ).in_bulk()
+
+    # Pll links delete triggers the delete signal on the base link which also removes PllUserAssociations and
+    # recomputes the user link status and slug.
+    PaymentCardSchemeEntry.objects.filter(id__in=[link.id for link in pll_links]).delete()
+
+    if scheme.slug in settings.SCHEMES_COLLECTING_METRICS:
+        for scheme_account_entry in scheme_account_entries:
+            send_merchant_metrics_for_link_delete.delay(
+                scheme_account_entry.scheme_account_id, scheme.slug, delete_date, "delete"
+            )
+
+    PaymentCardSchemeEntry.deactivate_activations(activations)
+
+
+def _read_cleanup_checkpoint(checkpoint_key: str) -> tuple[int, int]:
+    last_entry_id, processed = r_write.hmget(checkpoint_key, ["last_entry_id", "processed"])
+    return int(last_entry_id or 0), int(processed or 0)
+
+
 @shared_task
 def bulk_deleted_membership_card_cleanup(
     channel: str,
     bundle_id: int,
     scheme_id: int,
 ) -> None:
-    logger.info("Starting cleanup for scheme account deletions")
+    """
+    Cleans up the scheme's membership cards in a bundle's wallets, MEMBERSHIP_CARD_CLEANUP_CHUNK_SIZE entries at a
+    time. Each chunk is committed together and checkpointed in redis before the next chunk is queued as a new task,
+    so a run that is interrupted resumes after the last completed chunk when the task is sent again.
+    """
+    checkpoint_key = f"{MEMBERSHIP_CARD_CLEANUP_KEY_PREFIX}:{bundle_id}:{scheme_id}"
+    last_entry_id, processed = _read_cleanup_checkpoint(checkpoint_key)
 
     # could use user__client=bundle.client since users are shared across bundles for a single client
     # but this is more explicit
-    scheme_acc_entries = SchemeAccountEntry.objects.filter(
-        user__client__clientapplicationbundle=bundle_id, scheme_account__scheme=scheme_id
+    scheme_acc_entries = list(
+        SchemeAccountEntry.objects.filter(
+            user__client__clientapplicationbundle=bundle_id, scheme_account__scheme=scheme_id, id__gt=last_entry_id
+        )
+        .select_related("user__client", "scheme_account__scheme")
+        .prefetch_related("user__client__clientapplicationbundle_set")
+        .order_by("id")[: settings.MEMBERSHIP_CARD_CLEANUP_CHUNK_SIZE]
     )
-    entry_count = scheme_acc_entries.count()
-
-    set_history_kwargs({"table_user_id_column": "user_id"})
-
-    logger.debug(f"Deleted {entry_count} SchemeAccountEntrys as part of delete " "SchemeBundleAssociation cleanup...")
+    if not scheme_acc_entries:
+        r_write.delete(checkpoint_key)
+        logger.info(f"Scheme account deletion cleanup finished - total scheme account entries cleaned up: {processed}")
+        return
 
-    for index, scheme_account_entry in enumerate(scheme_acc_entries):
-        # Log at percentage-based intervals, so we don't spam logs for larger cleanups (minimum of 10)
-        log_interval = max([10, math.ceil(entry_count / 100) * 20])
-        if index > 0 and index % log_interval == 0:
-            logger.debug(f"Triggered cleanup tasks for {index} scheme account deletions")
+    history_kwargs = {"table_user_id_column": "user_id", "user_info": user_info(user_id=None, channel=channel)}
+    set_history_kwargs(history_kwargs)
+    try:
+        with transaction.atomic():
+            _cleanup_deleted_membership_cards(scheme_acc_entries, arrow.utcnow().format(), channel)
+    finally:
+        clean_history_kwargs(history_kwargs)
 
-        deleted_membership_card_cleanup.delay(
-            scheme_account_entry,
-            arrow.utcnow().format(),
-            channel_slug=channel,
-            history_kwargs={"user_info": user_info(user_id=scheme_account_entry.user_id, channel=channel)},
-        )
+    processed += len(scheme_acc_entries)
+    pipe = r_write.pipeline()
+    pipe.hset(checkpoint_key, mapping={"last_entry_id": scheme_acc_entries[-1].id, "processed": processed})
+    pipe.expire(checkpoint_key, MEMBERSHIP_CARD_CLEANUP_CHECKPOINT_EXPIRY)
+    pipe.execute()
+    logger.debug(f"Cleaned up {processed} scheme account entries for bundle {bundle_id} and scheme {scheme_id}")
 
-    logger.debug(
-        "Scheme account deletion cleanup process executed - "
-        f"Total scheme account cleanup tasks executed: {entry_count}"
-    )
+    bulk_deleted_membership_card_cleanup.delay(channel, bundle_id, scheme_id)
 
 
 def _send_data_to_atlas(consent: dict, x_azure_ref: str | None = None) -> None:
@@ -430,7 +593,7 @@ def _send_data_to_atlas(consent: dict, x_azure_ref: str | None = None) -> None:
         "email": consent["email"],
         "ubiquity_join_date": arrow.get(consent["timestamp"]).format("YYYY-MM-DD hh:mm:ss"),
     }
-    requests.post(url=url, headers=headers, json=data)
+    atlas.post(url, headers=headers, json=data)
 
 
 def _delete_user_membership_cards(
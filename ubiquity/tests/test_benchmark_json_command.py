@@ -0,0 +1,30 @@
+from io import StringIO
+from unittest.mock import patch
+
+import fakeredis
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ubiquity.cache_decorators import ApiCache
+
+server = fakeredis.FakeServer()
+mock_redis = fakeredis.FakeStrictRedis(server=server)
+
+
+@patch("ubiquity.management.commands.benchmark_json.r_read", mock_redis)
+@patch("ubiquity.cache_decorators.r_write", mock_redis)
+class TestBenchmarkJsonCommand(SimpleTestCase):
+    def setUp(self):
+        mock_redis.flushall()
+
+    def test_benchmarks_plans_cached_by_api_cache(self):
+        key = f"{settings.REDIS_MPLANS_CACHE_PREFIX}:com.test.bundle:0:1.3"
+        ApiCache(key, 600, "0.0").save([{"id": 1, "status": {"state": "active"}}])
+        mock_redis.set(f"{key}:rebuild", "1")
+
+        out = StringIO()
+        call_command("benchmark_json", rounds=1, stdout=out)
+
+        self.assertIn(key, out.getvalue())
+        self.assertNotIn(f"{key}:rebuild", out.getvalue())
@@ -0,0 +1,145 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from django.test import SimpleTestCase, override_settings
+from rest_framework.response import Response
+
+from prometheus.metrics import api_cache_requests_counter
+from ubiquity.cache_decorators import ApiCache, CacheApiRequest
+
+server = fakeredis.FakeServer()
+mock_redis = fakeredis.FakeStrictRedis(server=server)
+
+CACHE_KEY = "test_plans:key:1.3"
+
+
+class View:
+    def __init__(self):
+        self.request = MagicMock(api_version="1.3", META={}, GET={})
+        self.calls = 0
+
+    @CacheApiRequest("test_plans", 600, lambda req, kwargs: ":key", lambda req, kwargs: "0.1", soft_expiry=60)
+    def list(self, request, *args, **kwargs):
+        self.calls += 1
+        return Response(["fresh"])
+
+
+def content(response) -> list:
+    # cache hits are served as the body that was rendered when the entry was saved
+    if isinstance(response, Response):
+        return response.data
+
+    return json.loads(response.content)
+
+
+def save_entry(generation: str, data: list, age: float = 0) -> str:
+    with patch("ubiquity.cache_decorators.time", return_value=time.time() - age):
+        return ApiCache(CACHE_KEY, 600, generation).save(data)
+
+
+def requests_counted(outcome: str) -> float:
+    labels = {"key_slug": "test_plans", "outcome": outcome}
+    for sample in api_cache_requests_counter.collect()[0].samples:
+        if sample.name.endswith("_total") and sample.labels == labels:
+            return sample.value
+
+    return 0
+
+
+@patch("ubiquity.cache_decorators.r_read", mock_redis)
+@patch("ubiquity.cache_decorators.r_write", mock_redis)
+class TestCacheApiRequest(SimpleTestCase):
+    def setUp(self):
+        mock_redis.flushall()
+        self.view = View()
+
+    def test_rebuilds_entry_from_an_older_generation(self):
+        save_entry("0.0", ["stale"])
+
+        self.assertEqual(content(self.view.list(self.view.request)), ["fresh"])
+        self.assertEqual(content(self.view.list(self.view.request)), ["fresh"])
+        self.assertEqual(self.view.calls, 1)
+        self.assertFalse(mock_redis.exists(f"{CACHE_KEY}:rebuild"))
+
+    def test_serves_stale_data_while_another_worker_rebuilds(self):
+        save_entry("0.0", ["stale"])
+        mock_redis.set(f"{CACHE_KEY}:rebuild", "1")
+
+        self.assertEqual(content(self.view.list(self.view.request)), ["stale"])
+        self.assertEqual(self.view.calls, 0)
+
+    @override_settings(REDIS_MPLANS_REBUILD_WAIT_SECONDS=0.2)
+    def test_waits_for_another_worker_to_rebuild(self):
+        mock_redis.set(f"{CACHE_KEY}:rebuild", "1")
+
+        def rebuild(_):
+            ApiCache(CACHE_KEY, 60, "0.1").save(["rebuilt"])
+
+        with patch("ubiquity.cache_decorators.sleep", side_effect=rebuild):
+            self.assertEqual(content(self.view.list(self.view.request)), ["rebuilt"])
+
+        self.assertEqual(self.view.calls, 0)
+
+    def test_serves_soft_expired_entry_and_refreshes_it_in_the_background(self):
+        save_entry("0.1", ["old"], age=120)
+        hits, stale = requests_counted("hit"), requests_counted("stale")
+
+        with patch("ubiquity.cache_decorators.background_refresh_executor") as mock_executor:
+            mock_executor.submit.side_effect = lambda fn, *args, **kwargs: fn(*args, **kwargs)
+            self.assertEqual(content(self.view.list(self.view.request)), ["old"])
+
+        self.assertEqual(self.view.calls, 1)
+        self.assertFalse(mock_redis.exists(f"{CACHE_KEY}:rebuild"))
+        self.assertEqual(content(self.view.list(self.view.request)), ["fresh"])
+        self.assertEqual(requests_counted("stale"), stale + 1)
+        self.assertEqual(requests_counted("hit"), hits + 1)
+
+    def test_soft_expired_entry_is_refreshed_once(self):
+        save_entry("0.1", ["old"], age=120)
+        mock_redis.set(f"{CACHE_KEY}:rebuild", "1")
+
+        with patch("ubiquity.cache_decorators.background_refresh_executor") as mock_executor:
+            self.assertEqual(content(self.view.list(self.view.request)), ["old"])
+
+        mock_executor.submit.assert_not_called()
+
+    def test_hit_is_served_as_the_saved_body(self):
+        etag = save_entry("0.1", ["cached"])
+
+        response = self.view.list(self.view.request)
+
+        self.assertEqual(response.content, b'["cached"]')
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response["X-API-Version"], "1.3")
+        self.assertEqual(self.view.calls, 0)
+
+    def test_hit_is_not_modified_when_the_client_has_the_etag(self):
+        etag = save_entry("0.1", ["cached"])
+        self.view.request.META["HTTP_IF_NONE_MATCH"] = f"W/{etag}"
+
+        response = self.view.list(self.view.request)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_hit_is_served_as_data_when_fields_are_filtered(self):
+        save_entry("0.1", [{"id": 1, "name": "plan"}])
+        self.view.request.GET = {"fields": "id"}
+
+        response = self.view.list(self.view.request)
+
+        self.assertEqual(response.data, [{"id": 1, "name": "plan"}])
+        self.assertEqual(response["X-API-Version"], "1.3")
+        self.assertEqual(self.view.calls, 0)
+
+    def test_entry_saved_in_the_old_format_is_rebuilt(self):
+        mock_redis.set(CACHE_KEY, json.dumps({"generation": "0.1", "created": time.time(), "data": ["old"]}))
+
+        response = self.view.list(self.view.request)
+
+        self.assertEqual(content(response), ["fresh"])
+        self.assertEqual(response["ETag"], ApiCache(CACHE_KEY, 600, "0.1").save(["fresh"]))
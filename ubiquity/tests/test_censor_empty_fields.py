@@ -0,0 +1,92 @@
+import json
+import random
+
+from django.test import SimpleTestCase
+
+from ubiquity.censor_empty_fields import censor_and_decorate, censored_representation, censoring, remove_empty
+
+KEYS = ("id", "balances", "card", "status", "vouchers", "code", "cta_url")
+LEAVES = ("", None, 0, 0.0, False, True, 1, 2.5, "value", [], {})
+
+
+def uncensored_is_not_empty(value):
+    return bool(value) or isinstance(value, bool | int | float | list)
+
+
+def uncensored_remove_empty(d):
+    """remove_empty as it was before serializers could censor their own representation."""
+    if not isinstance(d, dict | list):
+        return d
+
+    if isinstance(d, list):
+        return [v for v in (uncensored_remove_empty(v) for v in d) if uncensored_is_not_empty(v)]
+
+    data = {}
+    for k, v in d.items():
+        if k in ("code", "cta_url"):
+            data[k] = v
+        elif uncensored_is_not_empty(v):
+            data[k] = uncensored_remove_empty(v)
+    return data
+
+
+def random_tree(rng: random.Random, depth: int = 0):
+    kind = rng.random()
+    if depth >= 4 or kind < 0.4:
+        return rng.choice(LEAVES)
+
+    if kind < 0.7:
+        return [random_tree(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+
+    return {key: random_tree(rng, depth + 1) for key in rng.sample(KEYS, rng.randint(0, len(KEYS)))}
+
+
+def censor_some_subtrees(rng: random.Random, tree):
+    """Censors random parts of the tree bottom up, as nested serializers using censored_representation would."""
+    if isinstance(tree, list):
+        tree = [censor_some_subtrees(rng, v) for v in tree]
+    elif isinstance(tree, dict):
+        # serializers are never nested under the keys that are kept as they are
+        tree = {k: v if k in ("code", "cta_url") else censor_some_subtrees(rng, v) for k, v in tree.items()}
+    else:
+        return tree
+
+    return remove_empty(tree) if rng.random() < 0.5 else tree
+
+
+class TestCensorEmptyFields(SimpleTestCase):
+    def test_censoring_while_serializing_matches_censoring_the_response(self):
+        rng = random.Random(1234)
+        for _ in range(2000):
+            tree = random_tree(rng)
+            expected = json.dumps(uncensored_remove_empty(tree))
+
+            self.assertEqual(json.dumps(remove_empty(tree)), expected)
+            self.assertEqual(json.dumps(remove_empty(censor_some_subtrees(rng, tree))), expected, tree)
+
+    def test_censored_data_is_not_copied_again(self):
+        censored = remove_empty({"card": {"barcode": "", "membership_id": "123"}, "vouchers": [{"code": ""}]})
+
+        self.assertIs(remove_empty(censored), censored)
+        self.assertIs(remove_empty({"id": 1, "card": censored})["card"], censored)
+
+    def test_representation_is_only_censored_for_censored_views(self):
+        class Serializer:
+            @censored_representation
+            def to_representation(self, instance):
+                self.censoring = censoring.active
+                return {"id": instance, "barcode": ""}
+
+        class Response:
+            status_code = 200
+
+            def __init__(self, data):
+                self.data = data
+
+        serializer = Serializer()
+        self.assertEqual(serializer.to_representation(1), {"id": 1, "barcode": ""})
+
+        view = censor_and_decorate(lambda instance: Response(serializer.to_representation(instance)))
+        self.assertEqual(view(1).data, {"id": 1})
+        self.assertTrue(serializer.censoring)
+        self.assertFalse(censoring.active)
@@ -1,12 +1,17 @@
 import time
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+import fakeredis
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings
 from django.urls import reverse
 
+from hermes.channel_cache import CHANNEL_CONFIG_VERSION_KEY, channel_config_cache
 from hermes.channels import Permit
 from history.utils import GlobalMockAPITestCase
 from payment_card.tests.factories import PaymentCardAccountFactory
+from prometheus.middleware import _get_bundle_id
 from scheme.models import Scheme, SchemeBundleAssociation
 from scheme.tests.factories import SchemeAccountFactory, SchemeBundleAssociationFactory, SchemeFactory
 from ubiquity.tests.factories import PaymentCardAccountEntryFactory, SchemeAccountEntryFactory
@@ -348,6 +353,85 @@ class TestPermitSharedScheme(GlobalMockAPITestCase):
         self.assertEqual(self.scheme.id, ubiquity_query[0].id)
 
 
+server = fakeredis.FakeServer()
+mock_redis = fakeredis.FakeStrictRedis(server=server)
+
+
+@patch("hermes.channel_cache.r_read", mock_redis)
+@patch("hermes.channel_cache.r_write", mock_redis)
+@override_settings(CHANNEL_CONFIG_CACHE_TTL=300, CHANNEL_CONFIG_CACHE_VERSION_CHECK_SECONDS=300)
+class TestPermitChannelConfigCache(GlobalMockAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organisation = OrganisationFactory(name="cache test organisation")
+        cls.client_app = ClientApplicationFactory(organisation=cls.organisation, name="cache test client")
+        cls.bundle = ClientApplicationBundleFactory(client=cls.client_app, bundle_id="com.cache.test")
+        cls.scheme = SchemeFactory()
+        cls.scheme_bundle_association = SchemeBundleAssociationFactory(
+            scheme=cls.scheme, bundle=cls.bundle, status=SchemeBundleAssociation.ACTIVE
+        )
+
+    def setUp(self):
+        mock_redis.flushall()
+        channel_config_cache.clear()
+
+    def _permit(self):
+        return Permit(self.bundle.bundle_id, organisation_name=self.organisation.name, ubiquity=True)
+
+    def test_repeat_permits_do_not_query_the_database(self):
+        permit = self._permit()
+        self.assertTrue(permit.is_scheme_active(self.scheme.id))
+
+        with self.assertNumQueries(0):
+            permit = self._permit()
+            self.assertEqual(permit.bundle.client.secret, self.client_app.secret)
+            self.assertTrue(permit.is_scheme_active(self.scheme.id))
+
+    def test_saving_association_invalidates_cache(self):
+        self.assertTrue(self._permit().is_scheme_active(self.scheme.id))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.scheme_bundle_association.status = SchemeBundleAssociation.INACTIVE
+            self.scheme_bundle_association.save(update_fields=["status"])
+
+        # nothing is invalidated until the change is committed
+        self.assertIsNone(mock_redis.get(CHANNEL_CONFIG_VERSION_KEY))
+        self.assertTrue(self._permit().is_scheme_active(self.scheme.id))
+
+        for callback in callbacks:
+            callback()
+
+        self.assertFalse(self._permit().is_scheme_active(self.scheme.id))
+        self.assertEqual(int(mock_redis.get(CHANNEL_CONFIG_VERSION_KEY)), 1)
+
+    def test_metrics_bundle_label_does_not_query_the_database(self):
+        user = UserFactory(client=self.client_app)
+        permit = self._permit()
+        login = MagicMock(user=AnonymousUser())
+        login_response = MagicMock(renderer_context={"request": MagicMock(data={"bundle_id": self.bundle.bundle_id})})
+        self.assertEqual(_get_bundle_id(login, login_response), self.bundle.bundle_id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(_get_bundle_id(login, login_response), self.bundle.bundle_id)
+            login_response.renderer_context["request"].data["bundle_id"] = "com.misspelled.bundle"
+            self.assertEqual(_get_bundle_id(login, login_response), settings.BINK_BUNDLE_ID)
+            self.assertEqual(_get_bundle_id(MagicMock(user=user)), self.bundle.bundle_id)
+            self.assertEqual(_get_bundle_id(MagicMock(user=permit)), self.bundle.bundle_id)
+
+    @override_settings(CHANNEL_CONFIG_CACHE_VERSION_CHECK_SECONDS=0)
+    def test_version_bump_from_another_process_invalidates_cache(self):
+        self.assertTrue(self._permit().is_scheme_active(self.scheme.id))
+
+        # simulate a change made by another process which only bumps the shared version
+        SchemeBundleAssociation.objects.filter(pk=self.scheme_bundle_association.pk).update(
+            status=SchemeBundleAssociation.INACTIVE
+        )
+        self.assertTrue(self._permit().is_scheme_active(self.scheme.id))
+
+        mock_redis.incr(CHANNEL_CONFIG_VERSION_KEY)
+        self.assertFalse(self._permit().is_scheme_active(self.scheme.id))
+
+
 class TestInternalService(GlobalMockAPITestCase):
     """
     It thought that Internal Service on these end points was part of Daedalus and should be removed as a feature
@@ -403,7 +487,7 @@ class TestInternalService(GlobalMockAPITestCase):
         ).get_token()
         cls.auth_headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     def test_get_single_membership_card(self, mock_get_balance):
         """
         Membership account by id can only return a response for a known user.  If accessed by an unknow/admin user
@@ -452,7 +536,7 @@ class TestInternalService(GlobalMockAPITestCase):
         resp = self.client.get(reverse("payment-card", args=[self.payment_card_account_2.id]), **self.auth_headers)
         self.assertEqual(resp.status_code, 200)
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     def test_service_get_all_scheme_accounts(self, mock_get_balance):
         mock_get_balance.return_value = self.scheme_account_1.balances
         resp = self.client.get(reverse("membership-cards"), **self.internal_service_auth_headers)
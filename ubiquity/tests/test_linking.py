@@ -4,7 +4,9 @@ from copy import deepcopy
 from unittest.mock import patch
 
 from django.conf import settings
+from django.db import connection
 from django.test import override_settings, testcases
+from django.test.utils import CaptureQueriesContext
 from factory.fuzzy import FuzzyAttribute
 from rest_framework.reverse import reverse
 
@@ -628,6 +630,46 @@ class TestUserPLL(testcases.TestCase):
         self.assertEqual(user_pll_2.slug, "")
         self.assertEqual(activate_check.call_count, 1)
 
+    @patch("ubiquity.models.send_midas_last_pll_per_channel_group_event")
+    @patch("ubiquity.models.PaymentCardSchemeEntry.vop_activate_check")
+    def test_update_user_pll_queries_do_not_grow_with_shared_wallets(self, activate_check, mock_last_pll_event):
+        payment_card_account = self.payment_card_account_1
+        scheme_account = SchemeAccountFactory(scheme=self.scheme1)
+        wallet_count = 0
+
+        def share_cards_with_new_wallets(count):
+            nonlocal wallet_count
+            for _ in range(count):
+                wallet_count += 1
+                external_id = f"shared{wallet_count}@user.com"
+                user = UserFactory(external_id=external_id, client=self.client_app, email=external_id)
+                SchemeAccountEntryFactory(
+                    scheme_account=scheme_account, user=user, link_status=AccountLinkStatus.ACTIVE
+                )
+                add_payment_card_account_to_wallet(payment_card_account, user)
+                PllUserAssociation.link_user_scheme_account_to_payment_cards(
+                    scheme_account, [payment_card_account], user
+                )
+
+        def update_payment_card_status(status):
+            PaymentCardAccount.objects.filter(pk=payment_card_account.pk).update(status=status)
+            with CaptureQueriesContext(connection) as queries:
+                PllUserAssociation.update_user_pll_by_pay_account(payment_card_account)
+            return len(queries)
+
+        share_cards_with_new_wallets(2)
+        two_wallet_queries = update_payment_card_status(PaymentCardAccount.INVALID_CARD_DETAILS)
+        self.assertEqual(mock_last_pll_event.call_count, 1, "Only one event per loyalty card and channel group")
+
+        update_payment_card_status(PaymentCardAccount.ACTIVE)
+        share_cards_with_new_wallets(3)
+        self.assertEqual(PllUserAssociation.objects.filter(state=WalletPLLStatus.ACTIVE).count(), 5)
+
+        five_wallet_queries = update_payment_card_status(PaymentCardAccount.INVALID_CARD_DETAILS)
+        self.assertEqual(two_wallet_queries, five_wallet_queries)
+        self.assertFalse(PllUserAssociation.objects.filter(state=WalletPLLStatus.ACTIVE).exists())
+        self.assertFalse(PaymentCardSchemeEntry.objects.get(scheme_account=scheme_account).active_link)
+
 
 class TestSoftLinking(GlobalMockAPITestCase):
     def _get_auth_token(self, user):
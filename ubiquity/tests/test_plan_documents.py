@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from history.utils import GlobalMockAPITestCase
+from scheme.credentials import BARCODE, CARD_NUMBER
+from scheme.plan_cache import bump_generations
+from scheme.tests.factories import (
+    SchemeBalanceDetailsFactory,
+    SchemeCredentialQuestionFactory,
+    SchemeFactory,
+    SchemeImageFactory,
+)
+from ubiquity.plan_documents import compile_plan_documents, get_plan_documents, plan_documents_key
+from ubiquity.versioning.v1_3.serializers import MembershipPlanSerializer
+from user.tests.factories import UserFactory
+
+server = fakeredis.FakeServer()
+mock_redis = fakeredis.FakeStrictRedis(server=server)
+
+
+@patch("scheme.plan_cache.r_read", mock_redis)
+@patch("scheme.plan_cache.r_write", mock_redis)
+@patch("ubiquity.plan_documents.r_read", mock_redis)
+@patch("ubiquity.plan_documents.r_write", mock_redis)
+class TestPlanDocuments(GlobalMockAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.context = {"request": MagicMock(user=cls.user)}
+        cls.schemes = [SchemeFactory() for _ in range(3)]
+        for scheme in cls.schemes:
+            SchemeImageFactory(scheme=scheme)
+            SchemeBalanceDetailsFactory(scheme_id=scheme)
+            SchemeCredentialQuestionFactory(scheme=scheme, type=CARD_NUMBER, label=CARD_NUMBER, manual_question=True)
+            SchemeCredentialQuestionFactory(scheme=scheme, type=BARCODE, label=BARCODE, add_field=True)
+
+    def setUp(self):
+        mock_redis.flushall()
+
+    def test_plan_documents_match_serializer(self):
+        scheme_ids = [scheme.id for scheme in self.schemes]
+        expected = [MembershipPlanSerializer(scheme, context=self.context).data for scheme in self.schemes]
+
+        self.assertEqual(get_plan_documents(scheme_ids, "1.3", self.context), expected)
+        self.assertEqual(mock_redis.hlen(plan_documents_key("1.3", self.user.client_id, 0)), len(scheme_ids))
+
+        # precompiled documents are assembled without touching the database
+        with self.assertNumQueries(0):
+            self.assertEqual(get_plan_documents(list(reversed(scheme_ids)), "1.3", self.context), expected[::-1])
+
+    def test_compile_queries_do_not_grow_with_schemes(self):
+        with CaptureQueriesContext(connection) as single_plan:
+            get_plan_documents([self.schemes[0].id], "1.3", self.context)
+
+        mock_redis.flushall()
+        with CaptureQueriesContext(connection) as all_plans:
+            get_plan_documents([scheme.id for scheme in self.schemes], "1.3", self.context)
+
+        self.assertEqual(len(single_plan), len(all_plans))
+
+    def test_scheme_generation_only_recompiles_that_scheme(self):
+        scheme_ids = [scheme.id for scheme in self.schemes]
+        get_plan_documents(scheme_ids, "1.3", self.context)
+
+        edited_scheme = self.schemes[0]
+        edited_scheme.plan_description = "Edited in the admin"
+        edited_scheme.save(update_fields=["plan_description"])
+        bump_generations(scheme_ids=[edited_scheme.id])
+
+        with patch("ubiquity.plan_documents.compile_plan_documents", wraps=compile_plan_documents) as mock_compile:
+            plans = get_plan_documents(scheme_ids, "1.3", self.context)
+
+        self.assertEqual(mock_compile.call_args.args[0], [edited_scheme.id])
+        self.assertEqual(plans[0]["account"]["plan_description"], "Edited in the admin")
+
+    def test_recompiling_an_edited_scheme_does_not_extend_the_expiry(self):
+        scheme_ids = [scheme.id for scheme in self.schemes]
+        get_plan_documents(scheme_ids, "1.3", self.context)
+        key = plan_documents_key("1.3", self.user.client_id, 0)
+        mock_redis.expire(key, 5)
+
+        bump_generations(scheme_ids=[self.schemes[0].id])
+        get_plan_documents(scheme_ids, "1.3", self.context)
+
+        # the hash still holds the edited scheme's old document, which goes when the hash expires
+        self.assertEqual(mock_redis.hlen(key), len(scheme_ids) + 1)
+        self.assertLessEqual(mock_redis.ttl(key), 5)
@@ -4,6 +4,7 @@ import uuid
 from unittest.mock import patch
 
 import arrow
+import fakeredis
 from django.core.exceptions import ValidationError
 
 from hermes.channels import Permit
@@ -32,9 +33,12 @@ from ubiquity.tasks import (
     async_balance,
     async_link,
     async_registration,
+    async_wallet_balance,
+    bulk_deleted_membership_card_cleanup,
     deleted_membership_card_cleanup,
     deleted_payment_card_cleanup,
     deleted_service_cleanup,
+    request_wallet_balance_refresh,
 )
 from ubiquity.tests.factories import PaymentCardAccountEntryFactory, SchemeAccountEntryFactory, ServiceConsentFactory
 from user.tests.factories import (
@@ -47,6 +51,9 @@ from user.tests.factories import (
 if typing.TYPE_CHECKING:
     from user.models import CustomUser
 
+server = fakeredis.FakeServer()
+mock_redis = fakeredis.FakeStrictRedis(server=server)
+
 
 class TestTasks(GlobalMockAPITestCase):
     @classmethod
@@ -85,7 +92,7 @@ class TestTasks(GlobalMockAPITestCase):
         external_id = "trusted_channel_user"
         return UserFactory(external_id=external_id, email=external_id, client=bundle.client)
 
-    @patch("requests.get")
+    @patch("hermes.http_client.midas.get")
     def test_async_balance(self, mock_midas_balance):
         mock_midas_balance.return_value.status_code = AccountLinkStatus.TRIPPED_CAPTCHA
         scheme_account_id = self.entry.scheme_account.id
@@ -96,8 +103,31 @@ class TestTasks(GlobalMockAPITestCase):
         self.assertTrue(scheme_slug in mock_midas_balance.call_args[0][0])
         self.assertTrue(scheme_account_id in mock_midas_balance.call_args[1]["params"].values())
 
-    @patch("ubiquity.tasks.async_balance.delay")
-    def test_async_all_balance(self, mock_async_balance):
+    @patch("ubiquity.tasks.r_write", mock_redis)
+    @patch("ubiquity.tasks.async_wallet_balance.delay")
+    def test_request_wallet_balance_refresh_coalesces_repeated_requests(self, mock_async_wallet_balance):
+        mock_redis.flushall()
+        request_wallet_balance_refresh([self.entry, self.entry2])
+        request_wallet_balance_refresh([self.entry, self.entry2])
+
+        self.assertEqual(mock_async_wallet_balance.call_count, 1)
+        self.assertEqual(mock_async_wallet_balance.call_args[0][0], [self.entry.id, self.entry2.id])
+
+        mock_redis.delete(f"balance_refresh:{self.entry2.scheme_account_id}")
+        request_wallet_balance_refresh([self.entry, self.entry2])
+
+        self.assertEqual(mock_async_wallet_balance.call_count, 2)
+        self.assertEqual(mock_async_wallet_balance.call_args[0][0], [self.entry2.id])
+
+    @patch("ubiquity.tasks.refresh_wallet_balances")
+    def test_async_wallet_balance(self, mock_refresh_wallet_balances):
+        async_wallet_balance([self.entry.id, self.entry2.id])
+
+        self.assertEqual(mock_refresh_wallet_balances.call_count, 1)
+        self.assertCountEqual(mock_refresh_wallet_balances.call_args[0][0], [self.entry, self.entry2])
+
+    @patch("ubiquity.tasks.refresh_wallet_balances")
+    def test_async_all_balance(self, mock_refresh_wallet_balances):
         user_id = self.user.id
         SchemeBundleAssociation.objects.create(bundle=self.bundle, scheme=self.entry.scheme_account.scheme)
         SchemeBundleAssociation.objects.create(bundle=self.bundle, scheme=self.entry2.scheme_account.scheme)
@@ -108,14 +138,14 @@ class TestTasks(GlobalMockAPITestCase):
         scheme_account = SchemeAccountFactory(is_deleted=True)
         deleted_entry = SchemeAccountEntryFactory(user=self.user, scheme_account=scheme_account)
 
-        self.assertTrue(mock_async_balance.called)
-        async_balance_call_args = [call_args[0][0] for call_args in mock_async_balance.call_args_list]
-        self.assertTrue(self.entry in async_balance_call_args)
-        self.assertTrue(self.entry2 in async_balance_call_args)
-        self.assertFalse(deleted_entry in async_balance_call_args)
+        self.assertEqual(mock_refresh_wallet_balances.call_count, 1)
+        refreshed_entries = mock_refresh_wallet_balances.call_args[0][0]
+        self.assertTrue(self.entry in refreshed_entries)
+        self.assertTrue(self.entry2 in refreshed_entries)
+        self.assertFalse(deleted_entry in refreshed_entries)
 
-    @patch("ubiquity.tasks.async_balance.delay")
-    def test_async_all_balance_filtering(self, mock_async_balance):
+    @patch("ubiquity.tasks.refresh_wallet_balances")
+    def test_async_all_balance_filtering(self, mock_refresh_wallet_balances):
         scheme_account_1 = SchemeAccountFactory()
         scheme_account_2 = SchemeAccountFactory(scheme=scheme_account_1.scheme)
         scheme_account_3 = SchemeAccountFactory(scheme=scheme_account_1.scheme)
@@ -140,24 +170,24 @@ class TestTasks(GlobalMockAPITestCase):
 
         async_all_balance(user.id, channels_permit=channels_permit)
 
-        refreshed_scheme_accounts = [x[0][0] for x in mock_async_balance.call_args_list]
+        refreshed_scheme_accounts = mock_refresh_wallet_balances.call_args[0][0]
         self.assertIn(entry_active, refreshed_scheme_accounts)
         self.assertIn(entry_end_site_down, refreshed_scheme_accounts)
         self.assertNotIn(entry_invalid_credentials, refreshed_scheme_accounts)
         self.assertNotIn(entry_pending, refreshed_scheme_accounts)
 
-    @patch("ubiquity.tasks.async_balance.delay")
-    def test_async_all_balance_with_allowed_schemes(self, mock_async_balance):
+    @patch("ubiquity.tasks.refresh_wallet_balances")
+    def test_async_all_balance_with_allowed_schemes(self, mock_refresh_wallet_balances):
         user_id = self.user.id
         SchemeBundleAssociation.objects.create(bundle=self.bundle, scheme=self.entry2.scheme_account.scheme)
         channels_permit = Permit(self.bundle.bundle_id, client=self.bundle.client)
         async_all_balance(user_id, channels_permit=channels_permit)
-        self.assertTrue(mock_async_balance.called)
-        async_balance_call_args = [call_args[0][0] for call_args in mock_async_balance.call_args_list]
-        self.assertFalse(self.entry in async_balance_call_args)
-        self.assertTrue(self.entry2 in async_balance_call_args)
+        self.assertTrue(mock_refresh_wallet_balances.called)
+        refreshed_entries = mock_refresh_wallet_balances.call_args[0][0]
+        self.assertFalse(self.entry in refreshed_entries)
+        self.assertTrue(self.entry2 in refreshed_entries)
 
-    @patch("requests.get")
+    @patch("hermes.http_client.midas.get")
     def test_async_link_add_and_auth_journey_success(self, mock_midas_balance):
         # Setup db tables
         scheme_account = SchemeAccountFactory()
@@ -240,7 +270,7 @@ class TestTasks(GlobalMockAPITestCase):
             mock_request_params["headers"],
         )
 
-    @patch("requests.get")
+    @patch("hermes.http_client.midas.get")
     def test_async_link_success_multi_user_wallet(self, mock_midas_balance):
         # Setup db tables
         scheme_account = SchemeAccountFactory()
@@ -340,7 +370,7 @@ class TestTasks(GlobalMockAPITestCase):
             JourneyTypes.LINK,
         )
 
-    @patch("requests.get")
+    @patch("hermes.http_client.midas.get")
     def test_async_link_auth_journey_success(self, mock_midas_balance):
         """
         For AUTH request journey, we should always send LINK JourneyType to Midas.
@@ -428,7 +458,7 @@ class TestTasks(GlobalMockAPITestCase):
             mock_request_params["headers"],
         )
 
-    @patch("requests.get")
+    @patch("hermes.http_client.midas.get")
     def test_async_link_auth_journey_invalid_creds(self, mock_midas_balance):
         """
         For AUTH request journey, we should always send LINK JourneyType to Midas.
@@ -601,6 +631,38 @@ class TestTasks(GlobalMockAPITestCase):
         with self.assertRaises(SchemeAccountEntry.DoesNotExist):
             SchemeAccountEntry.objects.get(scheme_account=scheme_account, user=user2)
 
+    @patch("ubiquity.tasks.r_write", mock_redis)
+    @patch("ubiquity.tasks.bulk_deleted_membership_card_cleanup.delay")
+    @patch("ubiquity.tasks.remove_loyalty_card_event")
+    @patch("ubiquity.tasks.send_merchant_metrics_for_link_delete.delay")
+    def test_bulk_deleted_membership_card_cleanup_in_chunks(self, mock_metrics, mock_to_warehouse, mock_delay):
+        mock_redis.flushall()
+        client = ClientApplicationFactory(organisation=self.org, name="Bulk cleanup client")
+        bundle = ClientApplicationBundleFactory(client=client, bundle_id="com.bulk.cleanup")
+        scheme_account = SchemeAccountFactory()
+        shared_scheme_account = SchemeAccountFactory(scheme=scheme_account.scheme)
+        entries = [
+            SchemeAccountEntryFactory(scheme_account=scheme_account, user=UserFactory(client=client)),
+            SchemeAccountEntryFactory(scheme_account=shared_scheme_account, user=UserFactory(client=client)),
+        ]
+        other_client_entry = SchemeAccountEntryFactory(scheme_account=shared_scheme_account)
+
+        with self.settings(MEMBERSHIP_CARD_CLEANUP_CHUNK_SIZE=1):
+            # one task per chunk, and a last one that finds nothing left to clean up
+            for _ in range(len(entries) + 1):
+                bulk_deleted_membership_card_cleanup(bundle.bundle_id, bundle.id, scheme_account.scheme_id)
+
+        self.assertEqual(mock_delay.call_count, len(entries))
+        self.assertEqual(mock_to_warehouse.call_count, len(entries))
+        self.assertFalse(SchemeAccountEntry.objects.filter(id__in=[entry.id for entry in entries]).exists())
+        self.assertTrue(SchemeAccountEntry.objects.filter(id=other_client_entry.id).exists())
+
+        scheme_account.refresh_from_db()
+        shared_scheme_account.refresh_from_db()
+        self.assertTrue(scheme_account.is_deleted)
+        self.assertFalse(shared_scheme_account.is_deleted)
+        self.assertFalse(mock_redis.exists(f"membership_card_cleanup:{bundle.id}:{scheme_account.scheme_id}"))
+
     @patch("ubiquity.tasks.send_merchant_metrics_for_link_delete.delay")
     def test_deleted_payment_card_cleanup_ubiquity_collision(self, mock_metrics):
         external_id_1 = "testuser@testbink.com"
@@ -5,9 +5,12 @@ from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 import arrow
+import fakeredis
 import httpretty
 from django.conf import settings
+from django.db import connection
 from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from olympus_messaging import JoinApplication
 from rest_framework.reverse import reverse
 from shared_config_storage.credentials.encryption import BLAKE2sHash, RSACipher
@@ -113,10 +116,12 @@ class MockApiCache:
     expire = None
     available_called = None
 
-    def __init__(self, key, expire):
+    def __init__(self, key, expire, generation=None):
         MockApiCache.key = key
         MockApiCache.data = None
         MockApiCache.expire = expire
+        MockApiCache.generation = generation
+        self.stale_data = None
         MockApiCache.available_called = False
         MockApiCache.start_time = 0
         MockApiCache.subject = ""
@@ -138,6 +143,14 @@ class MockApiCache:
     def save(self, data):
         MockApiCache.data = data
 
+    @staticmethod
+    def acquire_rebuild():
+        return True
+
+    @staticmethod
+    def release_rebuild():
+        pass
+
 
 class TestResources(GlobalMockAPITestCase):
     @classmethod
@@ -340,7 +353,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(expected_result, resp.json())
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_get_single_membership_card(self, mock_get_balance, *_):
         mock_get_balance.return_value = self.scheme_account.balances
@@ -363,7 +376,7 @@ class TestResources(GlobalMockAPITestCase):
         self.scheme_bundle_association.test_scheme = False
         self.scheme_bundle_association.save()
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_get_all_membership_cards(self, *_):
         scheme_account_2 = SchemeAccountFactory(balances=self.scheme_account.balances)
@@ -395,6 +408,32 @@ class TestResources(GlobalMockAPITestCase):
         bundle_assoc.test_scheme = False
         bundle_assoc.save()
 
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
+    @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
+    def test_list_membership_cards_query_count_does_not_grow_with_wallet(self, *_):
+        def add_card():
+            scheme_account = SchemeAccountFactory(balances=self.scheme_account.balances)
+            SchemeBundleAssociationFactory(
+                scheme=scheme_account.scheme, bundle=self.bundle, status=SchemeBundleAssociation.ACTIVE
+            )
+            SchemeAccountEntryFactory(scheme_account=scheme_account, user=self.user)
+
+        add_card()
+        with CaptureQueriesContext(connection) as small_wallet:
+            resp = self.client.get(reverse("membership-cards"), **self.auth_headers)
+
+        self.assertEqual(resp.status_code, 200)
+        small_wallet_size = len(resp.json())
+
+        for _ in range(3):
+            add_card()
+
+        with CaptureQueriesContext(connection) as large_wallet:
+            resp = self.client.get(reverse("membership-cards"), **self.auth_headers)
+
+        self.assertEqual(len(resp.json()), small_wallet_size + 3)
+        self.assertEqual(len(small_wallet), len(large_wallet))
+
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_portal_users_lookup(self, *_):
         @dataclass
@@ -549,7 +588,7 @@ class TestResources(GlobalMockAPITestCase):
         self.user.save()
         user_2.delete()
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_get_single_membership_vouchers(self, mock_get_balance, *_):
         mock_get_balance.return_value = self.scheme_account.balances
@@ -578,7 +617,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertFalse(vouchers[4].get("body_text"))
         self.assertFalse(vouchers[4].get("headline"))
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_list_membership_cards_hides_join_cards(self, *_):
         join_scheme_account = SchemeAccountFactory()
@@ -798,7 +837,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(resp.status_code, 400)
         self.assertEqual(resp.json()["detail"], "cannot override fingerprint.")
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_status_mapping_active(self, *_):
@@ -811,7 +850,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(data["status"]["state"], "authorised")
         self.assertEqual(data["status"]["reason_codes"], ["X300"])
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_status_mapping_user_error(self, *_):
@@ -838,7 +877,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(data["status"]["state"], "failed")
         self.assertEqual(data["status"]["reason_codes"], ["X303"])
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_headline_percent_replace(self, *_):
@@ -878,7 +917,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(self.scheme_account.vouchers[0]["headline"], "Get 10% off for some reason!")
         self.assertEqual(data["vouchers"][0]["headline"], "Get 10 percent off for some reason!")
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_handle_pending_vouchers(self, *_):
@@ -919,7 +958,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertIsNone(data["vouchers"][0]["conversion_date"])
         self.assertIsNone(data["vouchers"][0]["headline"])
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_status_mapping_system_error(self, *_):
@@ -947,7 +986,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual("authorised", data["status"]["state"])
         self.assertEqual(["X300"], data["status"]["reason_codes"])
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_status_mapping_user_error_V1_3(self, *_):
@@ -1019,7 +1058,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual({}, data["vouchers"])
         self.assertEqual([], data["payment_cards"])
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_status_mapping_system_error_V1_3(self, *_):
@@ -1160,8 +1199,8 @@ class TestResources(GlobalMockAPITestCase):
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
-    def test_membership_card_creation(self, mock_async_balance, mock_async_link, *_):
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
+    def test_membership_card_creation(self, mock_balance_refresh, mock_async_link, *_):
         payload = {
             "membership_plan": self.scheme.id,
             "account": {
@@ -1193,13 +1232,13 @@ class TestResources(GlobalMockAPITestCase):
         del create_data["status"]
         self.assertDictEqual(resp.data, create_data)
         self.assertTrue(mock_async_link.delay.called)
-        self.assertFalse(mock_async_balance.delay.called)
+        self.assertFalse(mock_balance_refresh.called)
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.addauth_request_lc_event", autospec=True)
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
-    def test_auth_not_required_add_only_mcard_creation(self, mock_async_balance, mock_async_link, mock_event, *_):
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
+    def test_auth_not_required_add_only_mcard_creation(self, mock_balance_refresh, mock_async_link, mock_event, *_):
         # auth_required=False calls async_link when only providing an add field
         self.scheme.authorisation_required = False
         self.scheme.save(update_fields=["authorisation_required"])
@@ -1228,8 +1267,8 @@ class TestResources(GlobalMockAPITestCase):
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
-    def test_wallet_only_mcard_creation(self, mock_async_balance, mock_async_link, *_):
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
+    def test_wallet_only_mcard_creation(self, mock_balance_refresh, mock_async_link, *_):
         payload = {
             "membership_plan": self.scheme.id,
             "account": {"add_fields": [{"column": self.scheme.manual_question.label, "value": "3038401022657083"}]},
@@ -1254,11 +1293,11 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(resp.status_code, 400)
         self.assertEqual({"detail": "Card already exists in your wallet"}, resp.json())
         self.assertFalse(mock_async_link.delay.called)
-        self.assertFalse(mock_async_balance.delay.called)
+        self.assertFalse(mock_balance_refresh.called)
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     def test_link_user_to_existing_wallet_only_card(self, mock_analytics, *_):
         test_schemes = (
             (self.wallet_only_scheme, self.wallet_only_question),
@@ -1302,7 +1341,7 @@ class TestResources(GlobalMockAPITestCase):
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     def test_wallet_only_mcard_authorisation(self, *_):
         existing_answer_value = "34567876345678765"
         existing_scheme_account = SchemeAccountFactory(scheme=self.scheme, barcode=existing_answer_value)
@@ -1549,10 +1588,10 @@ class TestResources(GlobalMockAPITestCase):
 
         self.assertEqual(consents, {"consents": [{"id": consent.id, "value": "true"}]})
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_join", autospec=True)
     @patch("payment_card.payment.get_secret_key", autospec=True)
-    def test_membership_card_enrol_with_main_answer(self, mock_secret, mock_async_join, mock_async_balance):
+    def test_membership_card_enrol_with_main_answer(self, mock_secret, mock_async_join, mock_balance_refresh):
         mock_secret.return_value = "test_secret"
         external_id = "anothertest@user.com"
         user = UserFactory(external_id=external_id, client=self.client_app, email=external_id)
@@ -1596,10 +1635,10 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(scheme_account.originating_journey, JourneyTypes.JOIN)
 
     @override_settings(CELERY_EAGER_PROPAGATES_EXCEPTIONS=True, CELERY_TASK_ALWAYS_EAGER=True, BROKER_BACKEND="memory")
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("api_messaging.midas_messaging.to_midas", autospec=True, return_value=MagicMock())
     @patch("payment_card.payment.get_secret_key", autospec=True)
-    def test_membership_card_enrol_midas_message(self, mock_secret, mock_message, mock_async_balance):
+    def test_membership_card_enrol_midas_message(self, mock_secret, mock_message, mock_balance_refresh):
         mock_secret.return_value = "test_secret"
         external_id = "anothertest@user.com"
         user = UserFactory(external_id=external_id, client=self.client_app, email=external_id)
@@ -1654,7 +1693,7 @@ class TestResources(GlobalMockAPITestCase):
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_join", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     @patch("payment_card.payment.get_secret_key", autospec=True)
     def test_membership_card_jwp_fails_with_bad_payment_card(self, mock_get_hash_secret, *_):
@@ -1678,7 +1717,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(error_message, "Provided payment card could not be found or is not related to this user")
 
     @patch("ubiquity.views.async_balance_with_updated_credentials.delay", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_update(self, *_):
         payload = json.dumps(
@@ -1729,7 +1768,7 @@ class TestResources(GlobalMockAPITestCase):
         self.user.save()
 
     @patch("ubiquity.views.async_balance_with_updated_credentials.delay", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_update_key_cred_to_existing(self, *_):
         scheme_account2 = SchemeAccountFactory(scheme=self.scheme)
@@ -1771,7 +1810,7 @@ class TestResources(GlobalMockAPITestCase):
 
     @override_settings(CELERY_EAGER_PROPAGATES_EXCEPTIONS=True, CELERY_TASK_ALWAYS_EAGER=True, BROKER_BACKEND="memory")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.tasks.remove_loyalty_card_event")
     def test_membership_card_delete(self, mock_to_warehouse, *_):
         payload = {
@@ -1831,7 +1870,7 @@ class TestResources(GlobalMockAPITestCase):
             resp.json(), {"join_pending": "Membership card cannot be deleted until the " "Join process has completed."}
         )
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_cards_linking(self, *_):
         payment_card_account = self.payment_card_account_entry.payment_card_account
@@ -1960,7 +1999,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertTrue(pca.is_deleted)
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_card_rule_filtering(self, *_):
         resp_payment = self.client.get(
@@ -1985,7 +2024,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(resp_payment.status_code, 404)
         self.assertEqual(resp_membership.status_code, 404)
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_card_rule_filtering_suspended(self, *_):
         """
@@ -2015,7 +2054,7 @@ class TestResources(GlobalMockAPITestCase):
 
     @patch("payment_card.metis.enrol_new_payment_card")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     def test_card_creation_filter(self, *_):
         self.bundle.issuer.add(IssuerFactory())
         self.scheme_bundle_association.status = SchemeBundleAssociation.INACTIVE
@@ -2141,7 +2180,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(expected_resp, resp.json())
 
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_put_missing_membership_plan_error(self, *_):
@@ -2163,7 +2202,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(resp.json(), {"detail": "required field membership_plan is missing"})
 
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_put_manual_question_single_link(self, *_):
@@ -2221,7 +2260,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(new_scheme_acc_entry.link_status, AccountLinkStatus.PENDING)
 
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_put_different_nonexisting_manual_question_multiple_links(self, *_):
@@ -2285,7 +2324,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(new_scheme_acc.card_number, "12345")
 
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_put_scan_question_single_link(self, *_):
@@ -2341,7 +2380,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(new_scan_answer, "67890")
 
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_put_with_previous_balance(self, *_):
@@ -2390,7 +2429,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertFalse(new_scheme_acc.balances)
 
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_balance_with_updated_credentials", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_membership_card_put_on_pending_card_error(self, *_):
@@ -2567,6 +2606,20 @@ class TestResources(GlobalMockAPITestCase):
         self.user.is_tester = False
         self.user.save()
 
+    def test_cached_membership_plans_can_be_filtered_by_fields(self):
+        mock_redis = fakeredis.FakeStrictRedis()
+        with (
+            patch("scheme.plan_cache.r_read", mock_redis),
+            patch("ubiquity.cache_decorators.r_read", mock_redis),
+            patch("ubiquity.cache_decorators.r_write", mock_redis),
+        ):
+            plans = self.client.get(reverse("membership-plans"), **self.auth_headers).json()
+            resp = self.client.get(f"{reverse('membership-plans')}?fields=id", **self.auth_headers)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), [{"id": plan["id"]} for plan in plans])
+        self.assertNotIn("ETag", resp)
+
     @patch("ubiquity.cache_decorators.ApiCache", new=MockApiCache)
     def test_membership_plan(self):
         mock_request_context = MagicMock()
@@ -2607,6 +2660,17 @@ class TestResources(GlobalMockAPITestCase):
         self.user.is_tester = False
         self.user.save()
 
+    @patch("ubiquity.cache_decorators.ApiCache", new=MockApiCache)
+    @patch("ubiquity.plan_documents.compile_plan_documents", return_value={})
+    @patch("ubiquity.plan_documents._read_plan_documents")
+    def test_membership_plan_not_found_when_nothing_is_compiled(self, mock_read, mock_compile):
+        mock_read.return_value = (None, {}, {self.scheme.id: None})
+
+        resp = self.client.get(reverse("membership-plan", args=[self.scheme.id]), **self.auth_headers)
+
+        self.assertEqual(resp.status_code, 404)
+        mock_compile.assert_called_once()
+
     def test_composite_membership_plan(self):
         mock_request_context = MagicMock()
         mock_request_context.user = self.user
@@ -2622,7 +2686,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(expected_result, resp.json())
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     @patch.object(SchemeAccount, "_get_midas_balance")
     def test_membership_card_balance(self, mock_get_midas_balance, *_):
@@ -2647,7 +2711,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(resp.json()["balances"][0]["value"], 100)
         self.assertTrue(expected_keys.issubset(set(resp.json()["balances"][0].keys())))
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     @patch.object(SchemeAccount, "_get_midas_balance")
     def test_get_balance_link(self, mock_get_midas_balance, *_):
@@ -2678,7 +2742,7 @@ class TestResources(GlobalMockAPITestCase):
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_existing_membership_card_creation_success(self, *_):
         new_external_id = "Test User mcard creation success"
@@ -2725,7 +2789,7 @@ class TestResources(GlobalMockAPITestCase):
     @override_settings(CELERY_EAGER_PROPAGATES_EXCEPTIONS=True, CELERY_TASK_ALWAYS_EAGER=True, BROKER_BACKEND="memory")
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch.object(SchemeAccount, "_get_midas_balance")
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     @patch("api_messaging.midas_messaging.to_midas", autospec=True, return_value=MagicMock())
     def test_credential_emails_are_stored_as_lowercase_register_route(self, mock_join_msg, *_):
@@ -2769,7 +2833,7 @@ class TestResources(GlobalMockAPITestCase):
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_existing_membership_card_creation_postcode_space_handling(self, *_):
         # Setup new scheme with all question types as auth fields and create existing scheme account
@@ -2846,7 +2910,7 @@ class TestResources(GlobalMockAPITestCase):
 
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_existing_membership_card_creation_non_matching_question_type(self, mock_analytics, *_):
         mock_analytics._get_today_datetime.return_value = datetime.datetime(year=2000, month=5, day=19)
@@ -2933,10 +2997,10 @@ class TestResources(GlobalMockAPITestCase):
         self.assertTrue(mock_to_warehouse.called)
         self.assertEqual(mock_to_warehouse.call_count, 2)
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_join", autospec=True)
     @patch("payment_card.payment.get_secret_key", autospec=True)
-    def test_replace_mcard_with_enrol_fields(self, mock_secret, mock_async_join, mock_async_balance):
+    def test_replace_mcard_with_enrol_fields(self, mock_secret, mock_async_join, mock_balance_refresh):
         mock_secret.return_value = "test_secret"
         self.scheme_account_entry.link_status = AccountLinkStatus.ENROL_FAILED
         self.scheme_account_entry.save(update_fields=["link_status"])
@@ -2981,13 +3045,13 @@ class TestResources(GlobalMockAPITestCase):
         self.assertIn(self.scheme_account_entry.link_status, AccountLinkStatus.join_pending())
         self.assertTrue(not self.scheme_account_entry.schemeaccountcredentialanswer_set.all())
         self.assertTrue(mock_async_join.delay.called)
-        self.assertTrue(mock_async_balance.delay.called)
+        self.assertTrue(mock_balance_refresh.called)
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch("ubiquity.views.async_join", autospec=True)
     @patch("payment_card.payment.get_secret_key", autospec=True)
     def test_replace_mcard_with_enrol_fields_including_main_answer(
-        self, mock_secret, mock_async_join, mock_async_balance
+        self, mock_secret, mock_async_join, mock_balance_refresh
     ):
         mock_secret.return_value = "test_secret"
         self.scheme_account_entry.status = AccountLinkStatus.ENROL_FAILED
@@ -3036,7 +3100,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertEqual(self.scheme_account_entry.link_status, AccountLinkStatus.JOIN_ASYNC_IN_PROGRESS)
         self.assertTrue(not self.scheme_account_entry.schemeaccountcredentialanswer_set.all())
         self.assertTrue(mock_async_join.delay.called)
-        self.assertTrue(mock_async_balance.delay.called)
+        self.assertTrue(mock_balance_refresh.called)
 
 
 class TestAgainWithWeb2(TestResources):
@@ -3089,7 +3153,7 @@ class TestMembershipCardCredentials(GlobalMockAPITestCase):
         cls.auth_headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
 
     @patch("ubiquity.views.async_balance_with_updated_credentials.delay", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     @patch.object(SchemeAccount, "_get_midas_balance")
     def test_update_new_and_existing_credentials(self, *_):
@@ -3164,8 +3228,8 @@ class TestResourcesV1_2(GlobalMockAPITestCase):
     @patch("ubiquity.channel_vault._bundle_secrets", mock_secrets["bundle_secrets"])
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
-    def test_sensitive_field_decryption(self, mock_async_balance, mock_async_link, *_):
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
+    def test_sensitive_field_decryption(self, mock_balance_refresh, mock_async_link, *_):
         password = "Password1"
         question_answer2 = "some other answer"
         payload = {
@@ -3202,7 +3266,7 @@ class TestResourcesV1_2(GlobalMockAPITestCase):
         self.assertEqual(password, mock_async_link.delay.call_args[0][0][PASSWORD])
 
         self.assertTrue(mock_async_link.delay.called)
-        self.assertFalse(mock_async_balance.delay.called)
+        self.assertFalse(mock_balance_refresh.called)
 
     def test_detect_and_handle_escaped_unicode(self):
         passwords = {
@@ -3224,8 +3288,8 @@ class TestResourcesV1_2(GlobalMockAPITestCase):
     @patch("ubiquity.channel_vault._bundle_secrets", mock_secrets["bundle_secrets"])
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
-    def test_double_escaped_sensitive_field_value(self, mock_async_balance, mock_async_link, *_):
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
+    def test_double_escaped_sensitive_field_value(self, mock_balance_refresh, mock_async_link, *_):
         password = "pa\\u0024\\u0024w\\u0026rd01\\u0021"
         expected_password = "pa$$w&rd01!"
         question_answer2 = "some other answer"
@@ -3263,13 +3327,13 @@ class TestResourcesV1_2(GlobalMockAPITestCase):
         self.assertEqual(expected_password, mock_async_link.delay.call_args[0][0][PASSWORD])
 
         self.assertTrue(mock_async_link.delay.called)
-        self.assertFalse(mock_async_balance.delay.called)
+        self.assertFalse(mock_balance_refresh.called)
 
     @patch("ubiquity.channel_vault._secret_keys", mock_secrets["secret_keys"])
     @patch("ubiquity.channel_vault._bundle_secrets", mock_secrets["bundle_secrets"])
     @patch("ubiquity.influx_audit.InfluxDBClient")
     @patch("ubiquity.views.async_link", autospec=True)
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     def test_allow_sensitive_field_not_encrypted(self, *_):
         password = "Password1"
@@ -3611,7 +3675,7 @@ class TestHistoryResources(GlobalMockAPIHistoryTestCase):
         self.assertTrue(mock_get_midas_response.called)
         self.assertTrue(mock_to_data_warehouse.called)
         # The sequence is a bit weird with 2 status updates as it calls get balance twice - once in main background
-        # process and once triggering another async_balance.delay to get balance from the serializer to_representation.
+        # process and once via a wallet balance refresh requested from the serializer to_representation.
         request_event = {}
         response_success = {}
         response_fail = {}
@@ -3651,7 +3715,7 @@ class TestHistoryResources(GlobalMockAPIHistoryTestCase):
         self.assertTrue(mock_get_midas_response.called)
         self.assertTrue(mock_to_data_warehouse.called)
         # The sequence is a bit weird with 2 status updates as it calls get balance twice - once in main background
-        # process and once triggering another async_balance.delay to get balance from the serializer to_representation.
+        # process and once via a wallet balance refresh requested from the serializer to_representation.
         request_event = {}
         response_success = {}
         response_fail = {}
@@ -77,7 +77,7 @@ class TestPaymentCardAccountImages(GlobalMockAPITestCase):
         self.assertIsInstance(json[0]["images"], list)
 
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     def test_images_in_membership_card_response(self, mock_get_midas_balance, _):
         resp = self.client.get(reverse("membership-cards"), **self.auth_headers)
         self.assertEqual(resp.status_code, 200)
@@ -132,7 +132,7 @@ class TestResources(GlobalMockAPITestCase):
         self.assertIn("dark_mode_url", image_v1_3)
         self.assertIn("cta_url", image_v1_3)
 
-    @patch("ubiquity.versioning.base.serializers.async_balance", autospec=True)
+    @patch("ubiquity.versioning.base.serializers.request_wallet_balance_refresh", autospec=True)
     @patch.object(MembershipTransactionsMixin, "_get_hades_transactions")
     @patch.object(SchemeAccount, "_get_midas_balance")
     def test_membership_card_versioning(self, *_):
@@ -20,6 +20,7 @@ from rest_framework.validators import UniqueValidator
 from shared_config_storage.ubiquity.bin_lookup import bin_to_provider
 
 from common.models import check_active_image
+from hermes.http_client import hades
 from payment_card.models import Issuer, PaymentCard, PaymentCardAccount
 from payment_card.serializers import CreatePaymentCardAccountSerializer
 from scheme.credentials import credential_types_set
@@ -31,12 +32,11 @@ from scheme.models import (
     SchemeCredentialQuestion,
     SchemeDetail,
     ThirdPartyConsentLink,
-    VoucherScheme,
 )
 from scheme.serializers import JoinSerializer, SchemeAnswerSerializer, UserConsentSerializer
 from scheme.vouchers import VoucherStateStr
 from ubiquity import reason_codes
-from ubiquity.channel_vault import retry_session
+from ubiquity.censor_empty_fields import censored_representation
 from ubiquity.models import (
     AccountLinkStatus,
     MembershipPlanDocument,
@@ -45,7 +45,7 @@ from ubiquity.models import (
     ServiceConsent,
 )
 from ubiquity.reason_codes import get_state_reason_code_and_text
-from ubiquity.tasks import async_balance
+from ubiquity.tasks import request_wallet_balance_refresh
 from user.exceptions import UserConflictError
 from user.models import CustomUser
 from user.serializers import UbiquityRegisterSerializer
@@ -63,9 +63,8 @@ def _add_base_media_url(image: dict) -> dict:
 class MembershipTransactionsMixin:
     @staticmethod
     def hades_request(url: str, method: str = "GET", **kwargs) -> "Response":
-        session = retry_session()
         try:
-            resp = session.request(method, url, **kwargs)
+            resp = hades.request(method, url, **kwargs)
             resp.raise_for_status()
             return resp
         except requests.RequestException:
@@ -290,6 +289,7 @@ class PaymentCardSerializer:
 
         return [_add_base_media_url(account_images.get(image_type, image)) for image_type, image in base_images.items()]
 
+    @censored_representation
     def to_representation(self, instance):
         status = "active" if instance.status == PaymentCardAccount.ACTIVE else "pending"
         return {
@@ -547,31 +547,40 @@ class MembershipPlanSerializer(serializers.ModelSerializer):
 
         return formatted_fields
 
-    def _get_scheme_consents(self, scheme):
+    @staticmethod
+    def _split_by_journey(items) -> dict[str, list]:
+        # works for both credential questions and consent links as they share the journey flag fields
+        return {
+            journey: [item for item in items if getattr(item, field) is True]
+            for journey, field in (
+                ("add", "add_field"),
+                ("authorise", "auth_field"),
+                ("register", "register_field"),
+                ("enrol", "enrol_field"),
+            )
+        }
+
+    def _get_client_consents(self, scheme):
+        # plans compiled in bulk by ubiquity.plan_documents come with the client's consents prefetched
+        if (client_consents := getattr(scheme, "client_consents", None)) is not None:
+            return client_consents
+
         try:
             client = self.context["request"].user.client
         except KeyError as e:
             raise RuntimeError("Missing request object in context for retrieving client app information") from e
 
-        all_consents = ThirdPartyConsentLink.objects.filter(client_app=client, scheme=scheme).all()
-
-        consents = {
-            "add": [consent for consent in all_consents if consent.add_field is True],
-            "authorise": [consent for consent in all_consents if consent.auth_field is True],
-            "register": [consent for consent in all_consents if consent.register_field is True],
-            "enrol": [consent for consent in all_consents if consent.enrol_field is True],
-        }
+        return ThirdPartyConsentLink.objects.filter(client_app=client, scheme=scheme).all()
 
-        return consents
+    def _get_scheme_consents(self, scheme):
+        return self._split_by_journey(self._get_client_consents(scheme))
 
     def to_representation(self, instance: Scheme) -> dict:
+        # related rows are read through .all() and split here so that prefetched plans need no further queries
         images = instance.images.all()
         balances = instance.schemebalancedetails_set.all()
-        tiers = instance.schemedetail_set.filter(type=0).all()
-        add_fields = instance.questions.filter(add_field=True).all()
-        authorise_fields = instance.questions.filter(auth_field=True).all()
-        registration_fields = instance.questions.filter(register_field=True).all()
-        enrol_fields = instance.questions.filter(enrol_field=True).all()
+        tiers = [tier for tier in instance.schemedetail_set.all() if tier.type == 0]
+        fields = self._split_by_journey(instance.questions.all())
         # To get here status must be active (i.e. suspended currently maps to inactive)
         # if changed for real status is required call channels_permit.scheme_status_name(instance.id)
         status = "active"
@@ -626,75 +635,99 @@ class MembershipPlanSerializer(serializers.ModelSerializer):
                 "forgotten_password_url": instance.forgotten_password_url,
                 "tiers": SchemeDetailSerializer(tiers, many=True).data,
                 "add_fields": (
-                    self._format_add_fields(add_fields) + UbiquityConsentSerializer(consents["add"], many=True).data
+                    self._format_add_fields(fields["add"]) + UbiquityConsentSerializer(consents["add"], many=True).data
                 ),
                 "authorise_fields": (
-                    SchemeQuestionSerializer(authorise_fields, many=True).data
+                    SchemeQuestionSerializer(fields["authorise"], many=True).data
                     + UbiquityConsentSerializer(consents["authorise"], many=True).data
                 ),
                 "registration_fields": (
-                    SchemeQuestionSerializer(registration_fields, many=True).data
+                    SchemeQuestionSerializer(fields["register"], many=True).data
                     + UbiquityConsentSerializer(consents["register"], many=True).data
                 ),
                 "enrol_fields": (
-                    SchemeQuestionSerializer(enrol_fields, many=True).data
+                    SchemeQuestionSerializer(fields["enrol"], many=True).data
                     + UbiquityConsentSerializer(consents["enrol"], many=True).data
                 ),
             },
             "balances": SchemeBalanceDetailSerializer(balances, many=True).data,
         }
 
-        if VoucherScheme.objects.filter(scheme_id=instance.id).exists():
+        if instance.voucherscheme_set.all():
             plan["has_vouchers"] = True
 
         return plan
 
 
-class MembershipCardImageSerializer(UbiquityImageSerializer):
-    url = serializers.URLField()
-    type = serializers.IntegerField()
-    encoding = serializers.CharField(max_length=30)
+class MembershipCardListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Balance refreshes are collected while each card is serialized and requested as a single task, and the valid
+        # images of each plan are only worked out once for all the cards of that plan
+        self.child.pending_balance_refreshes = []
+        self.child.valid_plan_images = {}
+        representation = super().to_representation(data)
+        request_wallet_balance_refresh(self.child.pending_balance_refreshes)
+        self.child.pending_balance_refreshes = None
+        self.child.valid_plan_images = None
+        return representation
 
 
 class MembershipCardSerializer(serializers.Serializer, MembershipTransactionsMixin):
-    image_serializer_class = MembershipCardImageSerializer
+    """
+    Serializes a SchemeAccount for the user in context["user_id"]. The user's SchemeAccountEntry can be given
+    instead, as the list view does, to save looking it up again for every card.
+    """
+
+    pending_balance_refreshes = None
+    valid_plan_images = None
+
+    class Meta:
+        list_serializer_class = MembershipCardListSerializer
 
     @staticmethod
-    def _filter_valid_images(account_images: dict, base_images: dict, today: int) -> t.ValuesView[dict[str, dict]]:
-        images = {}
-        for image_type in ["images", "tier_images"]:
-            valid_account_images = {
-                image_type: image["payload"]
-                for image_type, images in account_images.get(image_type, {}).items()
-                for image in images.values()
-                if image and check_active_image(image.get("validity", {}), today)
-            }
-            valid_base_images = {
+    def _filter_valid_images(formatted_images: dict, today: float) -> dict[str, dict]:
+        return {
+            image_group: {
                 image_type: image["payload"]
-                for image_type, images in base_images.get(image_type, {}).items()
+                for image_type, images in formatted_images.get(image_group, {}).items()
                 for image in images.values()
                 if image and check_active_image(image.get("validity", {}), today)
             }
-            images[image_type] = {"valid_account_images": valid_account_images, "valid_base_images": valid_base_images}
+            for image_group in ("images", "tier_images")
+        }
+
+    def _get_valid_plan_images(self, scheme: "Scheme", today: float) -> dict[str, dict]:
+        if self.valid_plan_images is None:
+            return self._filter_valid_images(scheme.formatted_images, today)
+
+        if scheme.id not in self.valid_plan_images:
+            self.valid_plan_images[scheme.id] = self._filter_valid_images(scheme.formatted_images, today)
+
+        return self.valid_plan_images[scheme.id]
 
-        return images.values()
+    @staticmethod
+    def _image_payload(image: dict) -> dict:
+        return {
+            "id": image["id"],
+            "type": image["type"],
+            "url": join(settings.CONTENT_URL, image["url"]),
+            "description": image["description"],
+            "encoding": image["encoding"],
+        }
 
     def _get_images(self, instance: "SchemeAccount", scheme: "Scheme", tier: str) -> list:
         today = arrow.utcnow().timestamp()
-        account_images = instance.formatted_images
-        base_images = scheme.formatted_images
-        images, tier_images = self._filter_valid_images(account_images, base_images, today)
+        account_images = self._filter_valid_images(instance.formatted_images, today)
+        plan_images = self._get_valid_plan_images(scheme, today)
 
         filtered_images = [
-            _add_base_media_url(images["valid_account_images"].get(image_type, base_image))
-            for image_type, base_image in images["valid_base_images"].items()
+            self._image_payload(account_images["images"].get(image_type, plan_image))
+            for image_type, plan_image in plan_images["images"].items()
         ]
 
-        tier_image = tier_images["valid_account_images"].get(tier, None) or tier_images["valid_base_images"].get(
-            tier, None
-        )
+        tier_image = account_images["tier_images"].get(tier) or plan_images["tier_images"].get(tier)
         if tier_image:
-            filtered_images.append(_add_base_media_url(tier_image))
+            filtered_images.append(self._image_payload(tier_image))
 
         return filtered_images
 
@@ -773,11 +806,21 @@ class MembershipCardSerializer(serializers.Serializer, MembershipTransactionsMix
                 voucher["state"] = VoucherStateStr.ISSUED.value
                 voucher["conversion_date"] = None
 
-    def to_representation(self, instance: "SchemeAccount") -> dict:
-        scheme_account_entry = instance.schemeaccountentry_set.get(user_id=self.context["user_id"])
+    def _refresh_balance(self, scheme_account_entry: "SchemeAccountEntry") -> None:
+        if self.pending_balance_refreshes is not None:
+            self.pending_balance_refreshes.append(scheme_account_entry)
+        else:
+            request_wallet_balance_refresh([scheme_account_entry])
+
+    @censored_representation
+    def to_representation(self, instance: "SchemeAccount | SchemeAccountEntry") -> dict:
+        if isinstance(instance, SchemeAccountEntry):
+            scheme_account_entry, instance = instance, instance.scheme_account
+        else:
+            scheme_account_entry = instance.schemeaccountentry_set.get(user_id=self.context["user_id"])
 
         if scheme_account_entry.link_status not in AccountLinkStatus.exclude_balance_statuses():
-            async_balance.delay(scheme_account_entry)
+            self._refresh_balance(scheme_account_entry)
         try:
             reward_tier = instance.balances[0]["reward_tier"]
         except (ValueError, KeyError):
@@ -819,7 +862,7 @@ class MembershipCardSerializer(serializers.Serializer, MembershipTransactionsMix
                 "barcode_type": scheme.barcode_type,
                 "colour": scheme.colour,
             },
-            "images": self.image_serializer_class(images, many=True).data,
+            "images": images,
             "account": {"tier": reward_tier},
             "balances": balances,
             "vouchers": vouchers,
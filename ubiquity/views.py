@@ -19,6 +19,7 @@ from shared_config_storage.credentials.encryption import BLAKE2sHash
 from shared_config_storage.credentials.utils import AnswerTypeChoices
 
 from hermes.channels import Permit
+from hermes.db_router import ReplicaReadMixin
 from hermes.settings import Version
 from history.data_warehouse import (
     addauth_request_lc_event,
@@ -52,7 +53,7 @@ from scheme.mixins import (
 from scheme.models import JourneyTypes, Scheme, SchemeAccount, SchemeCredentialQuestion, ThirdPartyConsentLink
 from scheme.views import RetrieveDeleteAccount
 from ubiquity.authentication import PropertyAuthentication, PropertyOrServiceAuthentication
-from ubiquity.cache_decorators import CacheApiRequest, membership_plan_key
+from ubiquity.cache_decorators import CacheApiRequest, membership_plan_generation, membership_plan_key
 from ubiquity.censor_empty_fields import censor_and_decorate
 from ubiquity.channel_vault import KeyType, SecretKeyName, get_bundle_key, get_secret_key
 from ubiquity.exceptions import AlreadyExistsError, CardAuthError
@@ -66,6 +67,7 @@ from ubiquity.models import (
     ServiceConsent,
     VopActivation,
 )
+from ubiquity.plan_documents import get_plan_documents
 from ubiquity.tasks import (
     async_all_balance,
     async_balance_with_updated_credentials,
@@ -442,6 +444,7 @@ class PaymentCardView(
 
 
 class ListPaymentCardView(
+    ReplicaReadMixin,
     ListCreatePaymentCardAccount,
     VersionedSerializerMixin,
     PaymentCardCreationMixin,
@@ -1387,7 +1390,7 @@ class MembershipCardView(
         return allowed_types
 
 
-class ListMembershipCardView(MembershipCardView):
+class ListMembershipCardView(ReplicaReadMixin, MembershipCardView):
     current_scheme = None
     scheme_questions = None
     authentication_classes = (PropertyAuthentication,)
@@ -1398,11 +1401,9 @@ class ListMembershipCardView(MembershipCardView):
     def list(self, request, *args, **kwargs):
         entries = self.filter_queryset(self.get_queryset()).exclude(link_status=AccountLinkStatus.JOIN)
 
-        accounts = [sae.scheme_account for sae in entries.all()]
-
         # auth_provided_mapping = MembershipCardSerializer.get_mcard_user_auth_provided_map(request, accounts)
         response = self.get_serializer_by_request(
-            accounts,
+            list(entries),
             many=True,
             context={
                 # "mcard_user_auth_provided_map": auth_provided_mapping,
@@ -1667,14 +1668,24 @@ class MembershipPlanView(VersionedSerializerMixin, ModelViewSet):
     def get_queryset(self):
         return self.request.channels_permit.scheme_query(Scheme.objects)
 
-    @CacheApiRequest(settings.REDIS_MPLANS_CACHE_PREFIX, settings.REDIS_MPLANS_CACHE_EXPIRY, membership_plan_key)
+    @CacheApiRequest(
+        settings.REDIS_MPLANS_CACHE_PREFIX,
+        settings.REDIS_MPLANS_CACHE_EXPIRY,
+        membership_plan_key,
+        membership_plan_generation,
+        soft_expiry=settings.REDIS_MPLANS_CACHE_SOFT_EXPIRY,
+    )
     @censor_and_decorate
     def retrieve(self, request, *args, **kwargs):
-        self.serializer_class = self.get_serializer_class_by_request()
-        return super().retrieve(request, *args, **kwargs)
+        scheme_id = get_object_or_404(self.get_queryset().values_list("id", flat=True), pk=kwargs["pk"])
+        plans = get_plan_documents([scheme_id], get_api_version(request), self.get_serializer_context())
+        if not plans:
+            # the scheme went between being looked up and compiled
+            raise NotFound
+        return Response(plans[0])
 
 
-class ListMembershipPlanView(VersionedSerializerMixin, ModelViewSet, IdentifyCardMixin):
+class ListMembershipPlanView(ReplicaReadMixin, VersionedSerializerMixin, ModelViewSet, IdentifyCardMixin):
     authentication_classes = (PropertyAuthentication,)
     serializer_class = MembershipPlanSerializer
     response_serializer = SelectSerializer.MEMBERSHIP_PLAN
@@ -1682,11 +1693,17 @@ class ListMembershipPlanView(VersionedSerializerMixin, ModelViewSet, IdentifyCar
     def get_queryset(self):
         return self.request.channels_permit.scheme_query(Scheme.objects)
 
-    @CacheApiRequest(settings.REDIS_MPLANS_CACHE_PREFIX, settings.REDIS_MPLANS_CACHE_EXPIRY, membership_plan_key)
+    @CacheApiRequest(
+        settings.REDIS_MPLANS_CACHE_PREFIX,
+        settings.REDIS_MPLANS_CACHE_EXPIRY,
+        membership_plan_key,
+        membership_plan_generation,
+        soft_expiry=settings.REDIS_MPLANS_CACHE_SOFT_EXPIRY,
+    )
     @censor_and_decorate
     def list(self, request, *args, **kwargs):
-        self.serializer_class = self.get_serializer_class_by_request()
-        return super().list(request, *args, **kwargs)
+        scheme_ids = list(self.get_queryset().values_list("id", flat=True))
+        return Response(get_plan_documents(scheme_ids, get_api_version(request), self.get_serializer_context()))
 
     @censor_and_decorate
     def identify(self, request):
@@ -5,9 +5,16 @@ from django import forms
 from django.contrib import admin, messages
 from django.contrib.admin import SimpleListFilter
 from django.contrib.auth.admin import UserAdmin
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
-from scheme.admin import CacheResetAdmin, check_active_scheme
+from hermes.channel_cache import invalidate_channel_config
+from scheme.admin import (
+    CacheResetAdmin,
+    check_active_scheme,
+    membership_plan_cache_scope,
+    reset_membership_plans_cache,
+)
 from scheme.models import SchemeBundleAssociation
 from ubiquity.models import PaymentCardAccountEntry, PllUserAssociation, SchemeAccountEntry, ServiceConsent
 from ubiquity.tasks import bulk_deleted_membership_card_cleanup
@@ -308,6 +315,9 @@ class ClientApplicationBundleAdmin(CacheResetAdmin):
                         f" to {SchemeBundleAssociation.STATUSES[old_status][1]} because {message}",
                     )
                     SchemeBundleAssociation.objects.filter(scheme_id=scheme.id).update(status=old_status)
+                    transaction.on_commit(invalidate_channel_config)
+                    # the status is reverted in every bundle the scheme is in, not just this one
+                    reset_membership_plans_cache(membership_plan_cache_scope([scheme]))
 
     def save_model(self, request, obj, form, change):
         current_bundles = SchemeBundleAssociation.objects.filter(bundle__bundle_id=obj.bundle_id).values(
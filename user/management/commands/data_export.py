@@ -1,10 +1,15 @@
 import csv
+from concurrent.futures import ThreadPoolExecutor
 
 from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
 
 from scheme.models import SchemeAccount
 from user.models import CustomUser
 
+DEFAULT_CHUNK_SIZE = 2000
+
 # key: export file name.
 # model: model to query the objects from.
 # fields: field tree used to traverse the model's fields and generate the report. null value signifies a leaf node.
@@ -39,87 +44,119 @@ exports = {
 }
 
 
-def get_field_values(obj, field_spec):
+def get_field_lookups(field_spec, parent_key=""):
     """
-    generates a tree of object property values from the given property tree.
-    :param obj: the object to traverse.
+    flattens the field tree into (column name, queryset lookup) pairs for each leaf node.
+
+    for example, given the following:
+    {'user': {'name': None}}
+    return this:
+    [('user.name', 'user__name')]
+
+    this works on unlimited levels of nested dictionaries.
     :param field_spec: a tree of dicts specifying the fields to obtain.
-    :return: a property value tree.
+    :param parent_key: the compound column name. this is used for recursion and should be left as default.
+    :return: a list of column names and the lookups used to select them.
     """
-    field_values = {}
+    lookups = []
     for field, children in field_spec.items():
-        attr = getattr(obj, field)
+        new_key = f"{parent_key}.{field}" if parent_key else field
         if children:
-            sub_dict = get_field_values(attr, children)
-            field_values[field] = sub_dict
+            lookups.extend(get_field_lookups(children, new_key))
         else:
-            field_values[field] = attr
-    return field_values
+            lookups.append((new_key, new_key.replace(".", "__")))
+    return lookups
 
 
-def flatten_field_values(field_values, parent_key=""):
+def get_pk_ranges(model, partitions):
     """
-    flattens a given a tree of nested dicts into a dictionary with compound key names.
-
-    for example, given the following:
-    {'user': {'name': 'Jerry'}}
-    return this:
-    {'user.name': 'Jerry'}
-
-    this works on unlimited levels of nested dictionaries.
-    :param field_values: the dict tree to flatten.
-    :param parent_key: the compound dictionary key. this is used for recursion and should be left as default.
-    :return: a dictionary mapping compounded key names to leaf node values.
+    splits the model's primary keys into contiguous ranges of roughly equal width.
+    :param model: the model to partition.
+    :param partitions: the number of ranges to split the primary keys into.
+    :return: a list of (first pk, last pk) tuples, empty if there are no rows.
     """
-    items = []
-    for k, v in field_values.items():
-        new_key = f"{parent_key}.{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(flatten_field_values(v, new_key).items())
-        else:
-            items.append((new_key, v))
-    return dict(items)
+    bounds = model.objects.aggregate(first=Min("pk"), last=Max("pk"))
+    if bounds["first"] is None:
+        return []
+
+    width = (bounds["last"] - bounds["first"]) // partitions + 1
+    return [
+        (first, min(first + width - 1, bounds["last"])) for first in range(bounds["first"], bounds["last"] + 1, width)
+    ]
 
 
-def create_export(spec):
+def create_export(spec, chunk_size=DEFAULT_CHUNK_SIZE, pk_range=None):
     """
-    create an export-ready dataset from the given export specification.
+    streams export rows for the given export specification.
+    rows are fetched chunk_size at a time from a server-side cursor, so memory use doesn't grow with the table.
     :param spec: the config to use for the data export.
-    :return: a list of dictionaries containing export data.
+    :param chunk_size: the number of rows fetched from the database at a time.
+    :param pk_range: an optional (first pk, last pk) tuple to limit the export to.
+    :return: the column names, and an iterator of row value tuples.
     """
-    model_instances = spec["model"].objects.all()
-    field_spec = spec["fields"]
-
-    rows = []
-
-    for instance in model_instances:
-        field_values = get_field_values(instance, field_spec)
-        flat = flatten_field_values(field_values)
-        rows.append(flat)
+    lookups = get_field_lookups(spec["fields"])
+    queryset = spec["model"].objects.all()
+    if pk_range:
+        queryset = queryset.filter(pk__range=pk_range)
 
-    return rows
+    rows = queryset.order_by("pk").values_list(*(lookup for _, lookup in lookups)).iterator(chunk_size=chunk_size)
+    return [column for column, _ in lookups], rows
 
 
-def write_csv(rows, filename):
+def write_csv(fieldnames, rows, filename):
     """
-    writes a given list of dicts to a csv file, using dict keys as headings.
-    :param rows: a list of dicts to write.
+    writes rows to a csv file as they are produced.
+    :param fieldnames: the csv headings.
+    :param rows: an iterable of row value tuples to write.
     :param filename: the file to write the csv data to.
     """
-    fieldnames = rows[0].keys()
-
     with open(f"{filename}.csv", "w") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        for row in rows:
+            writer.writerow(row)
+
+
+def export_partition(spec, filename, chunk_size, pk_range):
+    try:
+        write_csv(*create_export(spec, chunk_size, pk_range), filename)
+    finally:
+        # runs in a worker thread, which has its own connection
+        connection.close()
 
 
 class Command(BaseCommand):
     help = "Creates a CSV data export for issue mitigation and reporting purposes."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Number of rows fetched from the database at a time.",
+        )
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            default=1,
+            help="Splits each export into this many primary key ranges, exported in parallel to separate files.",
+        )
+
     def handle(self, *args, **options):
         for filename, spec in exports.items():
             self.stdout.write(self.style.MIGRATE_LABEL(f"processing {filename}.csv"))
-            rows = create_export(spec)
-            write_csv(rows, filename)
+            if options["partitions"] > 1:
+                self.export_partitions(spec, filename, options["chunk_size"], options["partitions"])
+            else:
+                write_csv(*create_export(spec, options["chunk_size"]), filename)
         self.stdout.write(self.style.SUCCESS("data export successful."))
+
+    def export_partitions(self, spec, filename, chunk_size, partitions):
+        pk_ranges = get_pk_ranges(spec["model"], partitions)
+        with ThreadPoolExecutor(max_workers=partitions) as executor:
+            futures = [
+                executor.submit(export_partition, spec, f"{filename}-{i}", chunk_size, pk_range)
+                for i, pk_range in enumerate(pk_ranges)
+            ]
+            for future in futures:
+                future.result()
@@ -4,7 +4,9 @@ from unittest.mock import patch
 from django.core.management import call_command
 
 from history.utils import GlobalMockAPITestCase
+from scheme.models import SchemeAccount
 from ubiquity.tests.factories import SchemeAccountEntryFactory
+from user.management.commands.data_export import create_export, exports, get_pk_ranges
 
 
 class DataExportTest(GlobalMockAPITestCase):
@@ -19,3 +21,31 @@ class DataExportTest(GlobalMockAPITestCase):
         call_command("data_export", stdout=out)
         self.assertIn("data export successful.", out.getvalue())
         self.assertEqual(mock_write_csv.call_count, 2)
+
+    def test_export_rows_are_selected_by_lookup(self):
+        fieldnames, rows = create_export(exports["scheme-accounts"], chunk_size=4)
+        rows = list(rows)
+
+        self.assertEqual(fieldnames, ["scheme.name", "order", "card_number", "barcode", "alt_main_answer"])
+        self.assertEqual(len(rows), SchemeAccount.objects.count())
+        scheme_account = SchemeAccount.objects.select_related("scheme").order_by("pk").first()
+        self.assertEqual(
+            rows[0],
+            (
+                scheme_account.scheme.name,
+                scheme_account.order,
+                scheme_account.card_number,
+                scheme_account.barcode,
+                scheme_account.alt_main_answer,
+            ),
+        )
+
+    def test_pk_ranges_cover_every_row_once(self):
+        pk_ranges = get_pk_ranges(SchemeAccount, 4)
+        exported = []
+        for pk_range in pk_ranges:
+            _, rows = create_export({"model": SchemeAccount, "fields": {"id": None}}, pk_range=pk_range)
+            exported.extend(pk for (pk,) in rows)
+
+        self.assertLessEqual(len(pk_ranges), 4)
+        self.assertEqual(exported, list(SchemeAccount.objects.order_by("pk").values_list("pk", flat=True)))